@@ -711,7 +711,7 @@ def InitAVSwitch():
 			except:
 				open("/proc/stb/audio/audio_delay_bitstream", "w").write(format(configElement.value * 90, "x"))
 		config.av.audiodelay = ConfigSelectionNumber(-1000, 1000, 5, default=0)
-		config.av.audiodelay.addNotifier(setAudioDelay)
+		config.av.audiodelay.addNotifier(setAudioDelay, coalesce=100)
 	else:
 		config.av.audiodelay = ConfigNothing()
 	BoxInfo.setItem("CanAACTranscode", aacTranscode)
@@ -742,7 +742,7 @@ def InitAVSwitch():
 			fileWriteLine("/proc/stb/audio/btaudio_delay", format(configElement.value * 90, "x"), source=MODULE_NAME)
 
 		config.av.btaudiodelay = ConfigSelectionNumber(min=-1000, max=1000, stepwidth=5, default=0)
-		config.av.btaudiodelay.addNotifier(setBTAudioDelay)
+		config.av.btaudiodelay.addNotifier(setBTAudioDelay, coalesce=100)
 	else:
 		config.av.btaudiodelay = ConfigNothing()
 	if exists("/proc/stb/vmpeg/0/pep_scaler_sharpness"):
@@ -759,7 +759,7 @@ def InitAVSwitch():
 
 		default = 5 if MODEL in ("gbquad", "gbquadplus") else 13
 		config.av.scaler_sharpness = ConfigSlider(default=default, limits=(0, 26))
-		config.av.scaler_sharpness.addNotifier(setScalerSharpness)
+		config.av.scaler_sharpness.addNotifier(setScalerSharpness, coalesce=100)
 	else:
 		config.av.scaler_sharpness = NoSave(ConfigNothing())
 
@@ -44,6 +44,7 @@ class EpgCacheLoadCheckPoller:
 
 	def createLoadCheckJob(self):
 		job = Components.Task.Job(_("EPG Cache Check"))
+		job.addResource("epgcache")
 		if config.epg.cacheloadsched.value:
 			task = Components.Task.PythonTask(job, _("Reloading EPG Cache..."))
 			task.work = self.JobEpgCacheLoad
@@ -84,6 +85,7 @@ class EpgCacheSaveCheckPoller:
 
 	def createSaveCheckJob(self):
 		job = Components.Task.Job(_("EPG Cache Check"))
+		job.addResource("epgcache")
 		if config.epg.cachesavesched.value:
 			task = Components.Task.PythonTask(job, _("Saving EPG Cache..."))
 			task.work = self.JobEpgCacheSave
@@ -0,0 +1,175 @@
+# -*- coding: utf-8 -*-
+from marshal import dumps, loads
+from os import lstat, rename, scandir
+from os.path import join, normpath
+from threading import Lock
+from time import time
+
+from Tools.Directories import SCOPE_CONFIG, resolveFilename
+
+FOLDER_SIZE_CACHE_FILE = "foldersize.cache"
+FOLDER_SIZE_CACHE_VERSION = 2
+# the mtime of a directory does not change when a file in it grows (like a
+# running recording) or is rewritten, so directories with recently modified
+# files are rescanned every time and all others when their entry is older
+# than MAX_AGE
+RECENT_TIME = 3600
+MAX_AGE = 6 * 3600
+# the cache file is written at most once in SAVE_INTERVAL, as the sizes of
+# growing recordings change on every call
+SAVE_INTERVAL = 300
+
+
+class FolderSizeCache:
+	# Disk usage of directory trees, like "du -s".
+	#
+	# Every directory is stored as (mtime_ns, bytes, links, subdirectories, recent,
+	# scanned) where bytes is the usage of the directory itself and its files with
+	# a single link, and links are the ((st_dev, st_ino), bytes) of files with more
+	# links.  Those are counted once per tree, the entry is reused while the mtime
+	# of the directory is unchanged and it was scanned less than MAX_AGE ago.
+	def __init__(self, filename=None):
+		self.filename = filename or resolveFilename(SCOPE_CONFIG, FOLDER_SIZE_CACHE_FILE)
+		self.directories = {}
+		self.totals = {}
+		self.dirty = False
+		self.saveTime = 0
+		self.lock = Lock()
+		self.queue = []
+		self.running = False
+		self.callbacks = {}
+		self.loaded = False
+
+	def load(self):
+		self.loaded = True
+		try:
+			with open(self.filename, "rb") as fd:
+				data = loads(fd.read())
+			if data[0] == FOLDER_SIZE_CACHE_VERSION:
+				self.directories, self.totals = data[1], data[2]
+		except (OSError, EOFError, ValueError, TypeError, IndexError):
+			pass
+
+	def save(self, force=False):
+		if not self.dirty or not force and time() - self.saveTime < SAVE_INTERVAL:
+			return
+		self.dirty = False
+		self.saveTime = time()
+		try:
+			with open(self.filename + ".writing", "wb") as fd:
+				fd.write(dumps((FOLDER_SIZE_CACHE_VERSION, self.directories, self.totals)))
+			rename(self.filename + ".writing", self.filename)
+		except (OSError, ValueError) as err:
+			print("[FolderSize] Failed to write %s:" % self.filename, err)
+
+	def forget(self, path):
+		prefix = path + "/"
+		for key in [key for key in self.directories if key == path or key.startswith(prefix)]:
+			del self.directories[key]
+
+	def scanDirectory(self, path):
+		try:
+			st = lstat(path)
+		except OSError:
+			self.forget(path)
+			return None
+		now = time()
+		entry = self.directories.get(path)
+		if entry is not None and entry[0] == st.st_mtime_ns and not entry[4] and now - MAX_AGE < entry[5] <= now:
+			return entry
+		size = st.st_blocks * 512
+		links = []
+		dirs = []
+		recent = False
+		limit = now - RECENT_TIME
+		try:
+			with scandir(path) as items:
+				for item in items:
+					try:
+						if item.is_dir(follow_symlinks=False):
+							dirs.append(item.name)
+							continue
+						if item.is_symlink():
+							continue
+						fst = item.stat(follow_symlinks=False)
+					except OSError:
+						continue
+					if fst.st_nlink > 1:
+						links.append(((fst.st_dev, fst.st_ino), fst.st_blocks * 512))
+					else:
+						size += fst.st_blocks * 512
+					if fst.st_mtime > limit:
+						recent = True
+		except OSError as err:
+			print("[FolderSize] Failed to read %s:" % path, err)
+		if entry is not None:
+			for name in set(entry[3]).difference(dirs):
+				self.forget(join(path, name))
+		new = self.directories[path] = (st.st_mtime_ns, size, tuple(links), tuple(dirs), recent, now)
+		if entry is None or entry[:5] != new[:5]:
+			self.dirty = True
+		return new
+
+	def calculate(self, path):
+		with self.lock:
+			if not self.loaded:
+				self.load()
+			total = 0
+			seen = set()
+			paths = [path]
+			while paths:
+				dirpath = paths.pop()
+				entry = self.scanDirectory(dirpath)
+				if entry is None:
+					continue
+				total += entry[1]
+				for key, size in entry[2]:
+					if key not in seen:
+						seen.add(key)
+						total += size
+				paths.extend(join(dirpath, name) for name in entry[3])
+			if self.totals.get(path) != total:
+				self.totals[path] = total
+				self.dirty = True
+			self.save()
+			return total
+
+	def getSizeSync(self, path):
+		return self.calculate(normpath(path))
+
+	# Returns the last known size of path (None if there is none) without
+	# touching the disk, the callback is called with (path, size) when the
+	# size has been recalculated in the background.
+	def getSize(self, path, callback=None):
+		path = normpath(path)
+		if not self.loaded:
+			with self.lock:
+				if not self.loaded:
+					self.load()
+		if callback is not None:
+			self.callbacks.setdefault(path, []).append(callback)
+		if path not in self.queue:
+			self.queue.append(path)
+		self.refreshNext()
+		return self.totals.get(path)
+
+	def refreshNext(self):
+		if self.running or not self.queue:
+			return
+		from twisted.internet import threads
+		self.running = True
+		path = self.queue.pop(0)
+		threads.deferToThread(self.calculate, path).addBoth(self.refreshDone, path)
+
+	def refreshDone(self, result, path):
+		self.running = False
+		if isinstance(result, int):
+			for callback in self.callbacks.pop(path, []):
+				callback(path, result)
+		else:
+			print("[FolderSize] Failed to calculate the size of %s:" % path, result)
+			self.callbacks.pop(path, None)
+		self.refreshNext()
+
+
+folderSizeCache = FolderSizeCache()
@@ -1,10 +1,12 @@
 # -*- coding: utf-8 -*-
 import os
+import select
 import time
 from Tools.CList import CList
 from Components.SystemInfo import BoxInfo
 from Components.Console import Console
 from Components import Task
+from Components.FolderSize import folderSizeCache
 from Tools.StbHardware import getBoxProc
 import re
 
@@ -18,17 +20,70 @@ def readFile(filename):
 	return data
 
 
+class MountTable:
+	# The parsed /proc/mounts, it is only read again when the kernel reports a
+	# change of the mount table by flagging POLLPRI on an open /proc/self/mounts,
+	# or after invalidate() (hotplug events).
+	def __init__(self):
+		self.mounts = None
+		self.mountpoints = {}
+		self.poller = None
+		self.watch = None
+		try:
+			self.watch = open("/proc/self/mounts", "r")
+			self.poller = select.poll()
+			self.poller.register(self.watch, select.POLLPRI | select.POLLERR)
+		except (OSError, AttributeError) as ex:
+			print("[Harddisk] Unable to watch /proc/self/mounts, the mount table will not be cached:", ex)
+			self.poller = None
+
+	def invalidate(self):
+		self.mounts = None
+
+	def changed(self):
+		if self.poller is None:
+			return True
+		return any(events & (select.POLLPRI | select.POLLERR) for fd, events in self.poller.poll(0))
+
+	def load(self):
+		if self.changed() or self.mounts is None:  # The poll also resets the change flag.
+			try:
+				with open("/proc/mounts", "r") as fd:
+					mounts = [line.strip().split(" ") for line in fd]
+			except OSError as ex:
+				print("[Harddisk] Failed to open /proc/mounts", ex)
+				mounts = []
+			for item in mounts:
+				# Spaces are encoded as \040 in mounts
+				item[1] = item[1].replace("\\040", " ")
+			self.mounts = mounts
+			# Index of the mount points for the longest prefix lookups in findMountPoint().
+			self.mountpoints = dict((item[1], item) for item in mounts if len(item) > 2)
+		return self.mounts
+
+	def getMounts(self):
+		return [item[:] for item in self.load()]
+
+	def findMountPoint(self, path):
+		self.load()
+		path = os.path.abspath(path)
+		while path not in self.mountpoints:
+			parent = os.path.dirname(path)
+			if parent == path:
+				break
+			path = parent
+		return path
+
+	def isMountPoint(self, path):
+		self.load()
+		return os.path.abspath(path) in self.mountpoints
+
+
+mountTable = MountTable()
+
+
 def getProcMounts():
-	try:
-		mounts = open("/proc/mounts", 'r')
-	except IOError as ex:
-		print("[Harddisk] Failed to open /proc/mounts", ex)
-		return []
-	result = [line.strip().split(' ') for line in mounts]
-	for item in result:
-		# Spaces are encoded as \040 in mounts
-		item[1] = item[1].replace('\\040', ' ')
-	return result
+	return mountTable.getMounts()
 
 
 def isFileSystemSupported(filesystem):
@@ -43,10 +98,7 @@ def isFileSystemSupported(filesystem):
 
 def findMountPoint(path):
 	'Example: findMountPoint("/media/hdd/some/file") returns "/media/hdd"'
-	path = os.path.abspath(path)
-	while not os.path.ismount(path):
-		path = os.path.dirname(path)
-	return path
+	return mountTable.findMountPoint(path)
 
 
 def getFolderSize(path):
@@ -55,22 +107,7 @@ def getFolderSize(path):
 	if os.path.isfile(path):
 		st = os.lstat(path)
 		return (st.st_size, st.st_blocks * 512)
-	total_bytes = 0
-	have = []
-	for dirpath, dirnames, filenames in os.walk(path):
-		total_bytes += os.lstat(dirpath).st_blocks * 512
-		for f in filenames:
-			fp = os.path.join(dirpath, f)
-			if os.path.islink(fp):
-				continue
-			st = os.lstat(fp)
-			if st.st_ino in have:
-				continue  # skip hardlinks which were already counted
-			have.append(st.st_ino)
-			total_bytes += st.st_blocks * 512
-		for d in dirnames:
-			dp = os.path.join(dirpath, d)
-	return total_bytes
+	return folderSizeCache.getSizeSync(path)  # Use folderSizeCache.getSize() to get the size without blocking.
 
 
 def Freespace(dev):
@@ -371,6 +408,7 @@ class Harddisk:
 	def createInitializeJob(self):
 		print("[Harddisk] Initializing storage device...")
 		job = Task.Job(_("Initializing storage device..."))
+		job.addResource("device:%s" % self.device)
 		size = self.diskSize()
 		print("[Harddisk] size: %s MB" % size)
 
@@ -484,6 +522,7 @@ class Harddisk:
 
 	def createCheckJob(self):
 		job = Task.Job(_("Checking filesystem..."))
+		job.addResource("device:%s" % self.device)
 		if self.findMount():
 			# Create unmount task if it was not mounted
 			UnmountTask(job, self)
@@ -775,6 +814,7 @@ class HarddiskManager:
 	def addHotplugPartition(self, device, physdev=None):
 		# device is the device name, without /dev
 		# physdev is the physical device path, which we (might) use to determine the userfriendly name
+		mountTable.invalidate()
 		if not physdev:
 			dev, part = self.splitDeviceName(device)
 			try:
@@ -817,6 +857,7 @@ class HarddiskManager:
 		return error, blacklisted, removable, is_cdrom, partitions, medium_found
 
 	def removeHotplugPartition(self, device):
+		mountTable.invalidate()
 		for x in self.partitions[:]:
 			if x.device == device:
 				self.partitions.remove(x)
@@ -976,29 +1017,33 @@ class MountTask(Task.LoggingTask):
 
 
 class MkfsTask(Task.LoggingTask):
+	OUTPUT_SEPARATORS = b"\n\b"  # mkfs overwrites the inode table progress using backspaces.
+
+	def __init__(self, job, name):
+		Task.LoggingTask.__init__(self, job, name)
+		self.addOutputPattern(r"Writing inode tables:", self.inodeTables)
+		self.addOutputPattern(r"Creating journal", self.creatingJournal)
+		self.addOutputPattern(r"Writing superblocks ", self.writingSuperblocks)
+		self.addOutputPattern(r"^\s*(\d+)/(\d+)\s*$", self.inodeProgress)
+
 	def prepare(self):
 		self.fsck_state = None
 
-	def processOutput(self, data):
-		print("[Mkfs]", data)
-		if 'Writing inode tables:' in data:
-			self.fsck_state = 'inode'
-		elif 'Creating journal' in data:
-			self.fsck_state = 'journal'
-			self.setProgress(80)
-		elif 'Writing superblocks ' in data:
-			self.setProgress(95)
-		elif self.fsck_state == 'inode':
-			if '/' in data:
-				try:
-					d = data.strip(' \x08\r\n').split('/', 1)
-					if '\x08' in d[1]:
-						d[1] = d[1].split('\x08', 1)[0]
-					self.setProgress(80 * int(d[0]) / int(d[1]))
-				except Exception as e:
-					print("[Mkfs] E:", e)
-				return  # don't log the progess
-		self.log.append(data)
+	def inodeTables(self, match):
+		self.fsck_state = 'inode'
+
+	def creatingJournal(self, match):
+		self.fsck_state = 'journal'
+		self.setProgress(80)
+
+	def writingSuperblocks(self, match):
+		self.setProgress(95)
+
+	def inodeProgress(self, match):
+		if self.fsck_state == 'inode':
+			if int(match.group(2)):
+				self.setProgress(80 * int(match.group(1)) / int(match.group(2)))
+			return True  # don't log the progess
 
 
 harddiskmanager = HarddiskManager()
@@ -0,0 +1,170 @@
+# -*- coding: utf-8 -*-
+import os
+import struct
+from json import dump, load
+
+from enigma import iServiceInformation
+
+# metadata of the movies of a directory is kept in this file inside the directory
+MOVIE_CACHE_FILE = ".e2moviecache"
+MOVIE_CACHE_VERSION = 1
+
+cutsParser = struct.Struct('>QI')  # big-endian, 64-bit PTS and 32-bit type
+
+
+def readCutsLastPosition(cutsFileName):
+	# returns the last stop position of a .cuts file, raises IOError if there is none
+	lastPosition = None
+	with open(cutsFileName, 'rb') as f:
+		while True:
+			data = f.read(cutsParser.size)
+			if len(data) < cutsParser.size:
+				break
+			cut, cutType = cutsParser.unpack(data)
+			if cutType == 3:  # undocumented, but 3 appears to be the stop
+				lastPosition = cut
+	return lastPosition
+
+
+def fileKey(path, names, name):
+	# (mtime, size) of a file, None if the directory listing does not contain it
+	if name not in names:
+		return None
+	try:
+		st = os.stat(os.path.join(path, name))
+	except OSError:
+		return None
+	return [st.st_mtime, st.st_size]
+
+
+class MovieDirectoryCache:
+	def __init__(self, path):
+		self.path = path
+		self.filename = os.path.join(path, MOVIE_CACHE_FILE)
+		self.entries = {}
+		self.keys = {}
+		self.names = set()
+		self.dirty = False
+		try:
+			with open(self.filename, "r") as fd:
+				data = load(fd)
+			if data.get("version") == MOVIE_CACHE_VERSION:
+				self.entries = data["entries"]
+		except (IOError, OSError, ValueError, KeyError, AttributeError):
+			pass
+
+	def scan(self):
+		# one directory listing, the stat() calls are done per listed movie
+		self.keys = {}
+		try:
+			self.names = set(os.listdir(self.path))
+		except OSError:
+			self.names = set()
+		for name in [name for name in self.entries if name not in self.names]:
+			del self.entries[name]
+			self.dirty = True
+
+	def getEntry(self, name):
+		key = self.keys.get(name)
+		if key is None:
+			key = self.keys[name] = (fileKey(self.path, self.names, name), fileKey(self.path, self.names, name + ".meta"))
+		entry = self.entries.get(name)
+		if entry is None or entry.get("key") != list(key):
+			entry = self.entries[name] = {"key": list(key)}
+			self.dirty = True
+		return entry
+
+	def getCutsLastPosition(self, name):
+		# the .cuts file changes while the listing stays the same, so it is always stat'ed
+		try:
+			st = os.stat(os.path.join(self.path, name + ".cuts"))
+		except OSError:
+			raise IOError("no cuts file")
+		cutsKey = [st.st_mtime, st.st_size]
+		entry = self.getEntry(name)
+		cuts = entry.get("cuts")
+		if cuts is None or cuts[0] != cutsKey:
+			cuts = entry["cuts"] = [cutsKey, readCutsLastPosition(os.path.join(self.path, name + ".cuts"))]
+			self.dirty = True
+		return cuts[1]
+
+	def save(self):
+		if not self.dirty:
+			return
+		self.dirty = False
+		try:
+			with open(self.filename + ".writing", "w") as fd:
+				dump({"version": MOVIE_CACHE_VERSION, "entries": self.entries}, fd, separators=(',', ':'))
+			os.rename(self.filename + ".writing", self.filename)
+		except (IOError, OSError) as e:
+			# read only media, the cache stays in memory only
+			print("[MovieCache] Failed to write %s:" % self.filename, e)
+
+
+class CachedServiceInfo:
+	# iStaticServiceInformation of a movie which answers name, length, begin time
+	# and tags from the directory cache, the real info is only created when needed
+	def __init__(self, cache, entry, getInfo):
+		self.cache = cache
+		self.entry = entry
+		self.getServiceInfo = getInfo
+		self.serviceInfo = None
+
+	def __getattr__(self, name):
+		if self.serviceInfo is None:
+			self.serviceInfo = self.getServiceInfo()
+		return getattr(self.serviceInfo, name)
+
+	def getCached(self, key, fnc, *args):
+		value = self.entry.get(key)
+		if value is None:
+			if self.serviceInfo is None:
+				self.serviceInfo = self.getServiceInfo()
+			value = self.entry[key] = getattr(self.serviceInfo, fnc)(*args)
+			if self.cache is not None:
+				self.cache.dirty = True
+		return value
+
+	def getName(self, serviceref):
+		return self.getCached("name", "getName", serviceref)
+
+	def getLength(self, serviceref):
+		return self.getCached("len", "getLength", serviceref)
+
+	def getInfo(self, serviceref, w):
+		if w == iServiceInformation.sTimeCreate:
+			return self.getCached("begin", "getInfo", serviceref, w)
+		return self.__getattr__("getInfo")(serviceref, w)
+
+	def getInfoString(self, serviceref, w):
+		if w == iServiceInformation.sTags:
+			return self.getCached("tags", "getInfoString", serviceref, w)
+		return self.__getattr__("getInfoString")(serviceref, w)
+
+
+class MovieInfoCache:
+	def __init__(self):
+		self.directories = {}
+
+	def openDirectory(self, path):
+		# (re)reads the directory listing, returns the cache of the directory
+		path = os.path.normpath(path)
+		cache = self.directories.get(path)
+		if cache is None:
+			cache = self.directories[path] = MovieDirectoryCache(path)
+		cache.scan()
+		return cache
+
+	def getCutsLastPosition(self, cutsFileName):
+		path, name = os.path.split(cutsFileName[:-5])
+		cache = self.directories.get(os.path.normpath(path))
+		if cache is None:
+			return readCutsLastPosition(cutsFileName)
+		return cache.getCutsLastPosition(name)
+
+	def save(self):
+		for cache in self.directories.values():
+			cache.save()
+
+
+movieInfoCache = MovieInfoCache()
@@ -4,14 +4,16 @@ from Tools.FuzzyDate import FuzzyTime
 from ServiceReference import ServiceReference
 from Components.MultiContent import MultiContentEntryText, MultiContentEntryPixmapAlphaBlend, MultiContentEntryProgress
 from Components.config import config
+from Components.MovieCache import CachedServiceInfo, cutsParser, movieInfoCache
 import os
-import struct
 import random
 from time import localtime, strftime
+from Tools.BoundFunction import boundFunction
 from Tools.LoadPixmap import LoadPixmap
 from Tools.Directories import SCOPE_CURRENT_SKIN, resolveFilename
 from Screens.LocationBox import defaultInhibitDirs
 import NavigationInstance
+from twisted.internet import threads
 
 from enigma import eListboxPythonMultiContent, eListbox, gFont, iServiceInformation, RT_HALIGN_LEFT, RT_HALIGN_RIGHT, eServiceReference, eServiceCenter, eTimer, RT_VALIGN_CENTER, BT_SCALE, BT_KEEP_ASPECT_RATIO, BT_ALIGN_CENTER
 
@@ -21,9 +23,6 @@ IMAGE_EXTENSIONS = frozenset((".jpg", ".png", ".gif", ".bmp", ".jpeg", ".jpe", "
 MOVIE_EXTENSIONS = frozenset((".mpg", ".vob", ".m4v", ".mkv", ".avi", ".divx", ".dat", ".flv", ".mp4", ".mov", ".wmv", ".asf", ".3gp", ".3g2", ".mpeg", ".mpe", ".rm", ".rmvb", ".ogm", ".ogv", ".m2ts", ".mts", ".webm", ".pva", ".wtv", ".stream", ".ts"))
 KNOWN_EXTENSIONS = MOVIE_EXTENSIONS.union(IMAGE_EXTENSIONS, DVD_EXTENSIONS, AUDIO_EXTENSIONS)
 
-cutsParser = struct.Struct('>QI')  # big-endian, 64-bit PTS and 32-bit type
-
-
 class MovieListData:
 	pass
 
@@ -60,6 +59,13 @@ class StubInfo:
 justStubInfo = StubInfo()
 
 
+def getServiceInfo(serviceHandler, serviceref):
+	info = serviceHandler.info(serviceref)
+	if info is None:
+		info = justStubInfo
+	return info
+
+
 def lastPlayPosFromCache(ref):
 	from Screens.InfoBarGenerics import resumePointsInstance
 	return resumePointsInstance.resumePointCache.get(ref.toString(), None)
@@ -68,17 +74,8 @@ def lastPlayPosFromCache(ref):
 def moviePlayState(cutsFileName, ref, length):
 	'''Returns None, 0..100 for percentage'''
 	try:
-		# read the cuts file first
-		f = open(cutsFileName, 'rb')
-		lastPosition = None
-		while True:
-			data = f.read(cutsParser.size)
-			if len(data) < cutsParser.size:
-				break
-			cut, cutType = cutsParser.unpack(data)
-			if cutType == 3:  # undocumented, but 3 appears to be the stop
-				lastPosition = cut
-		f.close()
+		# read the cuts file first (or its last position from the movie cache)
+		lastPosition = movieInfoCache.getCutsLastPosition(cutsFileName)
 		# See what we have in RAM (it might help)
 		last = lastPlayPosFromCache(ref)
 		if last:
@@ -191,6 +188,14 @@ class MovieList(GUIComponent):
 		self.root = None
 		self._playInBackground = None
 		self._char = ''
+		self.loadTimer = eTimer()
+		self.loadTimer.callback.append(self.loadNextEntries)
+		self.loadGeneration = 0
+		self.loadState = None
+		self.loadSorting = False
+		self.loadBatchSize = 50
+		self.onLoadProgress = []
+		self.onLoadFinished = []
 
 		if root is not None:
 			self.reload(root)
@@ -604,23 +609,37 @@ class MovieList(GUIComponent):
 	def preWidgetRemove(self, instance):
 		instance.setContent(None)
 		instance.selectionChanged.get().remove(self.selectionChanged)
+		# drop a running load, the screen is gone
+		self.loadTimer.stop()
+		self.loadGeneration += 1
+		self.loadSorting = False
+		movieInfoCache.save()
 
-	def reload(self, root=None, filter_tags=None):
+	def reload(self, root=None, filter_tags=None, progressive=False):
 		if self.reloadDelayTimer is not None:
 			self.reloadDelayTimer.stop()
 			self.reloadDelayTimer = None
-		if root is not None:
-			self.load(root, filter_tags)
-		else:
-			self.load(self.root, filter_tags)
+		if root is None:
+			root = self.root
 		self.l.setBuildFunc(self.buildMovieListEntry)  # don't move that to __init__ as this will create memory leak when calling MovieList from WebIf
-		self.l.setList(self.list)
+		if progressive:
+			# onLoadFinished is called when the list is complete
+			self.loadProgressive(root, filter_tags)
+		else:
+			self.load(root, filter_tags)
+			self.l.setList(self.list)
 
 	def removeService(self, service):
 		index = self.findService(service)
 		if index is not None:
+			directory = self.list[index][0].flags & eServiceReference.mustDescent
 			del self.list[index]
 			self.l.setList(self.list)
+			if self.loadSorting:
+				# the running sort works on a copy, which still has the service
+				if directory:
+					self.loadState[3] -= 1  # numberOfDirs
+				self.startSort()
 
 	def findService(self, service):
 		if service is None:
@@ -642,6 +661,25 @@ class MovieList(GUIComponent):
 	def load(self, root, filter_tags):
 		# this lists our root service, then building a
 		# nice list
+		if self.loadStart(root, filter_tags):
+			self.loadEntries()
+			self.loadFinished(self.loadGeneration, self.sortList(*self.prepareSort(), *self.loadState[1:]))
+
+	def loadProgressive(self, root, filter_tags):
+		# like load(), but the listing is done in batches from the mainloop and the list
+		# is shown while it grows. sorting and tagging are done in a thread afterwards.
+		if self.loadStart(root, filter_tags):
+			self.loadTimer.start(0, True)
+		else:
+			self.l.setList(self.list)
+			for f in self.onLoadFinished:
+				f()
+
+	def loadStart(self, root, filter_tags):
+		self.loadTimer.stop()
+		self.loadGeneration += 1
+		self.loadState = None
+		self.loadSorting = False
 		del self.list[:]
 		serviceHandler = eServiceCenter.getInstance()
 		numberOfDirs = 0
@@ -649,9 +687,7 @@ class MovieList(GUIComponent):
 		reflist = root and serviceHandler.list(root)
 		if reflist is None:
 			print("listing of movies failed")
-			return
-		realtags = set()
-		autotags = {}
+			return False
 		rootPath = os.path.normpath(root.getPath())
 		parent = None
 		# Don't navigate above the "root"
@@ -665,22 +701,38 @@ class MovieList(GUIComponent):
 				ref.flags = eServiceReference.flagDirectory
 				self.list.append((ref, None, 0, -1))
 				numberOfDirs += 1
-		while True:
+		# (reflist, movie cache, filter tags) and the arguments of sortList()
+		self.loadState = [(reflist, movieInfoCache.openDirectory(rootPath), filter_tags), root, parent, numberOfDirs, set(), {}]
+		return True
+
+	def loadEntries(self, count=None):
+		# lists up to count entries, returns True if there are more
+		(reflist, movieCache, filter_tags), root, parent, numberOfDirs, realtags, autotags = self.loadState
+		serviceHandler = eServiceCenter.getInstance()
+		while count is None or count > 0:
 			serviceref = reflist.getNext()
 			if not serviceref.valid():
-				break
+				self.loadState[3] = numberOfDirs
+				movieCache.save()
+				return False
+			if count is not None:
+				count -= 1
 			if config.ParentalControl.servicepinactive.value and config.ParentalControl.storeservicepin.value != "never":
 				from Components.ParentalControl import parentalControl
 				if not parentalControl.sessionPinCached and parentalControl.isProtected(serviceref) and config.ParentalControl.storeservicepin.value != 'never' and config.ParentalControl.hideBlacklist.value:
 					continue
-			info = serviceHandler.info(serviceref)
-			if info is None:
-				info = justStubInfo
-			begin = info.getInfo(serviceref, iServiceInformation.sTimeCreate)
 			if serviceref.flags & eServiceReference.mustDescent:
+				# the name is fetched here, so sorting needs no service information calls
+				info = CachedServiceInfo(None, {}, lambda serviceref=serviceref: getServiceInfo(serviceHandler, serviceref))
+				info.getName(serviceref)
+				begin = info.getInfo(serviceref, iServiceInformation.sTimeCreate)
 				self.list.append((serviceref, info, begin, -1))
 				numberOfDirs += 1
 				continue
+			# name, begin time, tags and length come from the movie cache while the files did not change
+			entry = movieCache.getEntry(os.path.basename(serviceref.getPath()))
+			info = CachedServiceInfo(movieCache, entry, lambda serviceref=serviceref: getServiceInfo(serviceHandler, serviceref))
+			begin = info.getInfo(serviceref, iServiceInformation.sTimeCreate)
 			# convert separe-separated list of tags into a set
 			this_tags = info.getInfoString(serviceref, iServiceInformation.sTags).split(' ')
 			name = info.getName(serviceref)
@@ -706,46 +758,93 @@ class MovieList(GUIComponent):
 					continue
 
 			self.list.append((serviceref, info, begin, -1))
+		self.loadState[3] = numberOfDirs
+		return True
 
-		self.firstFileEntry = numberOfDirs
-		self.parentDirectory = 0
+	def loadNextEntries(self):
+		more = self.loadEntries(self.loadBatchSize)
+		index = self.instance and self.getCurrentIndex() or 0
+		self.l.setList(self.list)
+		if self.instance and index:
+			self.instance.moveSelectionTo(index)
+		for f in self.onLoadProgress:
+			f()
+		if more:
+			self.loadTimer.start(0, True)
+		else:
+			self.startSort()
+
+	def startSort(self):
+		# a newer sort replaces a running one
+		self.loadGeneration += 1
+		generation = self.loadGeneration
+		self.loadSorting = True
+		threads.deferToThread(self.sortList, *self.prepareSort(), *self.loadState[1:]).addCallbacks(boundFunction(self.loadSorted, generation), boundFunction(self.loadFailed, generation))
+
+	def prepareSort(self):
+		# the sort runs in a thread, so everything it needs of the services and
+		# their information is read here on the mainloop: (entry, name, is a
+		# directory, is a user service, directory path) for every entry
+		items = []
+		for x in self.list:
+			ref = x[0]
+			directory = bool(ref.flags & eServiceReference.mustDescent)
+			items.append((x, x[1] and x[1].getName(ref), directory, ref.type >= eServiceReference.idUser, directory and self.getDirectoryPath(ref) or None))
+		return items, self.root and self.getDirectoryPath(self.root) or None
+
+	def getDirectoryPath(self, ref):
+		path = os.path.normpath(ref.getPath())
+		if not path.endswith('/'):
+			path += '/'
+		return path
+
+	def loadSorted(self, generation, result):
+		if self.loadFinished(generation, result):
+			self.l.setList(self.list)
+			for f in self.onLoadFinished:
+				f()
+
+	def loadFailed(self, generation, failure):
+		print("[MovieList] sorting the list failed:", failure)
+		if generation == self.loadGeneration:
+			# finish the load with the unsorted list, the screen waits for onLoadFinished
+			root, parent, numberOfDirs, realtags, autotags = self.loadState[1:]
+			self.loadSorted(generation, (self.list, root, 0, 0, dict((tag, set([tag])) for tag in realtags)))
+
+	def sortList(self, items, rootPath, root, parent, numberOfDirs, realtags, autotags):
+		# only works on python data (see prepareSort()), so it can be run in a thread
+		firstFileEntry = numberOfDirs
+		parentDirectory = 0
 		if self.sort_type == MovieList.SORT_ALPHANUMERIC:
-			self.list.sort(key=self.buildAlphaNumericSortKey)
+			items.sort(key=self.buildAlphaNumericSortKey)
 		elif self.sort_type == MovieList.SORT_ALPHANUMERIC_FLAT:
-			self.list.sort(key=self.buildAlphaNumericFlatSortKey)
+			items.sort(key=self.buildAlphaNumericFlatSortKey)
 		elif self.sort_type == MovieList.SORT_ALPHANUMERIC_FLAT_REVERSE:
-			self.list.sort(key=self.buildAlphaNumericFlatSortKey, reverse=True)
+			items.sort(key=self.buildAlphaNumericFlatSortKey, reverse=True)
 		elif self.sort_type == MovieList.SORT_RECORDED:
-			self.list.sort(key=self.buildBeginTimeSortKey)
+			items.sort(key=self.buildBeginTimeSortKey)
 		else:
 			# always sort first this way to avoid shuffle and reverse-sort directories
-			self.list.sort(key=self.buildGroupwiseSortkey)
+			items.sort(key=self.buildGroupwiseSortkey)
 			if self.sort_type == MovieList.SHUFFLE:
-				dirlist = self.list[:numberOfDirs]
-				shufflelist = self.list[numberOfDirs:]
+				dirlist = items[:numberOfDirs]
+				shufflelist = items[numberOfDirs:]
 				random.shuffle(shufflelist)
-				self.list = dirlist + shufflelist
+				items = dirlist + shufflelist
 			elif self.sort_type == MovieList.SORT_ALPHANUMERIC_REVERSE:
-				self.list = self.list[:numberOfDirs] + sorted(self.list[numberOfDirs:], key=self.buildAlphaNumericSortKey, reverse=True)
+				items = items[:numberOfDirs] + sorted(items[numberOfDirs:], key=self.buildAlphaNumericSortKey, reverse=True)
 			elif self.sort_type == MovieList.SORT_RECORDED_REVERSE:
-				self.list = self.list[:numberOfDirs] + sorted(self.list[numberOfDirs:], key=self.buildBeginTimeSortKey, reverse=True)
+				items = items[:numberOfDirs] + sorted(items[numberOfDirs:], key=self.buildBeginTimeSortKey, reverse=True)
 
-		if self.root and numberOfDirs > 0:
-			rootPath = os.path.normpath(self.root.getPath())
-			if not rootPath.endswith('/'):
-				rootPath += '/'
+		if rootPath and numberOfDirs > 0:
 			if rootPath != parent:
 				# with new sort types directories may be in between files, so scan whole
 				# list for parentDirectory index. Usually it is the first one anyway
-				for index, item in enumerate(self.list):
-					if item[0].flags & eServiceReference.mustDescent:
-						itempath = os.path.normpath(item[0].getPath())
-						if not itempath.endswith('/'):
-							itempath += '/'
-						if itempath == rootPath:
-							self.parentDirectory = index
-							break
-		self.root = root
+				for index, item in enumerate(items):
+					if item[4] == rootPath:
+						parentDirectory = index
+						break
+		items = [item[0] for item in items]
 		# finally, store a list of all tags which were found. these can be presented
 		# to the user to filter the list
 		# ML: Only use the tags that occur more than once in the list OR that were
@@ -760,13 +859,13 @@ class MovieList(GUIComponent):
 				if not item:
 					rautotags[movies] = item
 				item.append(tag)
-		self.tags = {}
-		for movies, tags in rautotags.items():
+		tags = {}
+		for movies, movietags in rautotags.items():
 			movie = movies[0]
 			# format the tag lists so that they are in 'original' order
-			tags.sort(key=movie.find)
-			first = movie.find(tags[0])
-			last = movie.find(tags[-1]) + len(tags[-1])
+			movietags.sort(key=movie.find)
+			first = movie.find(movietags[0])
+			last = movie.find(movietags[-1]) + len(movietags[-1])
 			match = movie
 			start = 0
 			end = len(movie)
@@ -783,28 +882,37 @@ class MovieList(GUIComponent):
 						break
 			# Adding the longest common sentence to the tag list
 			if match:
-				self.tags[match] = set(tags)
+				tags[match] = set(movietags)
 			else:
-				match = ' '.join(tags)
+				match = ' '.join(movietags)
 				if (len(match) > 2) or (match in realtags):  # Omit small words, only for auto tags
-					self.tags[match] = set(tags)
+					tags[match] = set(movietags)
 		# Adding the realtags to the tag list
 		for tag in realtags:
-			self.tags[tag] = set([tag])
+			tags[tag] = set([tag])
+		return items, root, firstFileEntry, parentDirectory, tags
+
+	def loadFinished(self, generation, result):
+		if generation != self.loadGeneration:
+			# a newer load was started while this one was sorted
+			return False
+		self.list, self.root, self.firstFileEntry, self.parentDirectory, self.tags = result
+		self.loadState = None
+		self.loadSorting = False
+		return True
 
+	# the sort keys are built from the items of prepareSort()
 	def buildAlphaNumericSortKey(self, x):
-		# x = ref,info,begin,...
-		ref = x[0]
-		name = x[1] and x[1].getName(ref)
-		if ref.flags & eServiceReference.mustDescent:
-			return (0, name and name.lower() or "", -x[2])
-		return (1, name and name.lower() or "", -x[2])
+		# x = (ref,info,begin,...),name,directory,...
+		name = x[1]
+		if x[2]:
+			return (0, name and name.lower() or "", -x[0][2])
+		return (1, name and name.lower() or "", -x[0][2])
 
 	def buildAlphaNumericFlatSortKey(self, x):
-		# x = ref,info,begin,...
-		ref = x[0]
-		name = x[1] and x[1].getName(ref)
-		if name and ref.flags & eServiceReference.mustDescent:
+		# x = (ref,info,begin,...),name,directory,...
+		name = x[1]
+		if name and x[2]:
 			# only use directory basename for sorting
 			p = os.path.split(name)
 			if not p[1]:
@@ -813,18 +921,16 @@ class MovieList(GUIComponent):
 			name = p[1]
 		# print "Sorting for -%s-" % name
 
-		return (1, name and name.lower() or "", -x[2])
+		return (1, name and name.lower() or "", -x[0][2])
 
 	def buildBeginTimeSortKey(self, x):
-		ref = x[0]
-		if ref.flags & eServiceReference.mustDescent:
-			return (0, "", -x[2])
-		return (1, "", -x[2])
+		if x[2]:
+			return (0, "", -x[0][2])
+		return (1, "", -x[0][2])
 
 	def buildGroupwiseSortkey(self, x):
 		# Sort recordings by date, sort MP3 and stuff by name
-		ref = x[0]
-		if ref.type >= eServiceReference.idUser or ref.flags & eServiceReference.mustDescent:
+		if x[3] or x[2]:
 			return self.buildAlphaNumericSortKey(x)
 		else:
 			return self.buildBeginTimeSortKey(x)
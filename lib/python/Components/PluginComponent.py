@@ -1,10 +1,13 @@
 # -*- coding: utf-8 -*-
 import os
+import sys
 from enigma import eProfileWrite
 from bisect import insort
 from Components.ActionMap import loadKeymap
 from Tools.Directories import fileExists, resolveFilename, SCOPE_PLUGINS
 from Tools.Import import my_import
+from Tools.Profile import profileSpan
+from Components.PluginManifest import configItemsChanged, getConfigItems, getPluginStamp, pluginManifest
 from Plugins.Plugin import PluginDescriptor
 
 
@@ -43,9 +46,15 @@ class PluginComponent:
 			if x == PluginDescriptor.WHERE_AUTOSTART:
 				plugin(reason=1)
 
-	def readPluginList(self, directory):
-		"""enumerates plugins"""
+	def readPluginList(self, directory, lazy=False):
+		"""enumerates plugins, with lazy the plugins in the manifest are imported when they are used"""
 		new_plugins = []
+		if not pluginManifest.loaded:
+			pluginManifest.load()
+		pluginManifest.directory = directory
+		from Components.International import international
+		locale = international.getLocale()
+		keys = set()
 		for c in os.listdir(directory):
 			directory_category = os.path.join(directory, c)
 			if not os.path.isdir(directory_category):
@@ -56,11 +65,27 @@ class PluginComponent:
 				path = os.path.join(directory_category, pluginname)
 				if os.path.isdir(path):
 						eProfileWrite('plugin ' + pluginname)
+						key = c + "/" + pluginname
+						keys.add(key)
+						stamp = getPluginStamp(path, locale)
+						plugins = pluginManifest.getDescriptors(key, stamp) if lazy else None
 						try:
-							plugin = my_import('.'.join(["Plugins", c, pluginname, "plugin"]))
-							plugins = plugin.Plugins(path=path)
+							if plugins is None:
+								name = '.'.join(["Plugins", c, pluginname, "plugin"])
+								imported = name in sys.modules
+								configItems = getConfigItems()
+								with profileSpan(key, "plugin"):
+									plugin = my_import(name)
+									plugins = plugin.Plugins(path=path)
+								definesConfig = None if imported else configItemsChanged(configItems)
+								# allow single entry not to be a list
+								if not isinstance(plugins, list):
+									plugins = [plugins]
+								plugins = [p for p in plugins if p]
+								pluginManifest.addPlugin(key, stamp, plugins, definesConfig)
 						except Exception as exc:
 							print("Plugin ", c + "/" + pluginname, "failed to load:", exc)
+							pluginManifest.forget(key)
 							# supress errors due to missing plugin.py* files (badly removed plugin)
 							for fn in ('plugin.py', 'plugin.pyc'):
 								if os.path.exists(os.path.join(path, fn)):
@@ -76,14 +101,9 @@ class PluginComponent:
 									pass
 							continue
 
-						# allow single entry not to be a list
-						if not isinstance(plugins, list):
-							plugins = [plugins]
-
 						for p in plugins:
-							if p:
-								p.updateIcon(path)
-								new_plugins.append(p)
+							p.updateIcon(path)
+							new_plugins.append(p)
 
 						keymap = os.path.join(path, "keymap.xml")
 						if fileExists(keymap):
@@ -121,6 +141,9 @@ class PluginComponent:
 			self.firstRun = False
 			self.installedPluginList = self.pluginList
 
+		pluginManifest.prune(keys)
+		pluginManifest.save()
+
 	def getPlugins(self, where):
 		"""Get list of plugins in a specific category"""
 		if not isinstance(where, list):
@@ -0,0 +1,258 @@
+# -*- coding: utf-8 -*-
+from inspect import Parameter, Signature, getfullargspec
+from marshal import dumps, loads
+from os import rename, scandir
+from os.path import join
+
+from Components.config import ConfigSubDict, ConfigSubList, ConfigSubsection, config
+from Plugins.Plugin import PluginDescriptor
+from Tools.Directories import SCOPE_CONFIG, resolveFilename
+from Tools.Import import my_import
+
+PLUGIN_MANIFEST_FILE = "plugins.manifest"
+PLUGIN_MANIFEST_VERSION = 3
+
+# plugins with a descriptor for one of these are needed during the start
+# (or on every zap) and are always imported
+EAGER_WHERE = frozenset((
+	PluginDescriptor.WHERE_AUTOSTART,
+	PluginDescriptor.WHERE_WIZARD,
+	PluginDescriptor.WHERE_SESSIONSTART,
+	PluginDescriptor.WHERE_NETWORKCONFIG_READ,
+	PluginDescriptor.WHERE_INFOBAR_SCREEN,
+	PluginDescriptor.WHERE_SECONDINFOBAR_SCREEN,
+	PluginDescriptor.WHERE_PLAYSERVICE,
+	PluginDescriptor.WHERE_INFOBARLOADED
+))
+
+# the fields of a descriptor record
+NAME, DESCRIPTION, WHERE, ICON, WEIGHT, NEEDS_RESTART, INTERNAL, ARGSPEC = range(8)
+
+
+def getPluginStamp(path, locale):
+	# the plugin is read again when one of its modules or the language changes
+	latest = 0
+	count = 0
+	try:
+		with scandir(path) as items:
+			for item in items:
+				if item.name.endswith((".py", ".pyc")):
+					latest = max(latest, item.stat().st_mtime_ns)
+					count += 1
+	except OSError:
+		return None
+	return (latest, count, locale) if count else None
+
+
+def getConfigItems():
+	# settings defined by a plugin when it is imported are needed before it is
+	# used (like config.plugins.softwaremanager by the software update), so all
+	# items of the config tree are collected as {path: item}
+	items = {}
+	pending = [((), config)]
+	while pending:
+		path, item = pending.pop()
+		items[path] = item
+		if isinstance(item, ConfigSubsection):
+			pending.extend((path + (name,), child) for name, child in item.content.items.items())
+		elif isinstance(item, ConfigSubList):
+			pending.extend((path + (index,), child) for index, child in enumerate(item))
+		elif isinstance(item, ConfigSubDict):
+			pending.extend((path + (key,), child) for key, child in item.items())
+	return items
+
+
+def configItemsChanged(items):
+	# the items are compared by identity, so settings defined again are noticed too
+	current = getConfigItems()
+	return len(current) != len(items) or any(items.get(path) is not item for path, item in current.items())
+
+
+def getArgSpec(fnc):
+	# only what the plugin lists look at: the names of the arguments and the
+	# local variables of the function
+	spec = getfullargspec(fnc)
+	return (tuple(spec.args), spec.varargs, spec.varkw, tuple(spec.kwonlyargs), len(spec.defaults or ()), fnc.__code__.co_varnames)
+
+
+class LazyCode:
+	def __init__(self, argspec):
+		self.co_varnames = argspec[5]
+		self.co_argcount = len(argspec[0])
+
+
+class LazyPluginFunction:
+	# The fnc of a descriptor of a plugin which is not imported before it is
+	# used.  It is created from the record of the descriptor in the manifest,
+	# imports the plugin on the first call and forwards the calls to the fnc of
+	# the real descriptor.  The entries of a WHERE_MENU descriptor may depend on
+	# the settings, so they are not remembered and a menu imports the plugin.
+	def __init__(self, manifest, key, stamp, index, record, fnc=None):
+		self.manifest = manifest
+		self.key = key
+		self.identity = (key, stamp, index)
+		self.index = index
+		self.record = record
+		self.fnc = fnc
+
+	def __eq__(self, other):
+		if isinstance(other, LazyPluginFunction):
+			return self.identity == other.identity
+		return NotImplemented
+
+	def __ne__(self, other):
+		result = self.__eq__(other)
+		return result if result is NotImplemented else not result
+
+	def __hash__(self):
+		return hash(self.identity)
+
+	@property
+	def __code__(self):
+		return LazyCode(self.record[ARGSPEC]) if self.fnc is None else self.fnc.__code__
+
+	@property
+	def __signature__(self):
+		args, varargs, varkw, kwonlyargs, defaults, varnames = self.record[ARGSPEC]
+		kind = Parameter.POSITIONAL_OR_KEYWORD
+		parameters = [Parameter(name, kind, default=None if index >= len(args) - defaults else Parameter.empty) for index, name in enumerate(args)]
+		if varargs:
+			parameters.append(Parameter(varargs, Parameter.VAR_POSITIONAL))
+		parameters += [Parameter(name, Parameter.KEYWORD_ONLY, default=None) for name in kwonlyargs]
+		if varkw:
+			parameters.append(Parameter(varkw, Parameter.VAR_KEYWORD))
+		return Signature(parameters)
+
+	def __call__(self, *args, **kwargs):
+		if self.fnc is None:
+			self.fnc = self.manifest.loadFunction(self.key, self.index, self.record)
+			if self.fnc is None:
+				return [] if PluginDescriptor.WHERE_MENU in self.record[WHERE] else None
+		return self.fnc(*args, **kwargs)
+
+
+class PluginManifest:
+	# The descriptors of the plugins which are not needed during the start,
+	# stored as {"category/plugin": (stamp, [record, ...])}, see getPluginStamp()
+	# and the fields of the records above.  Plugins which define settings when
+	# they are imported are stored as (stamp, None) and always imported.
+	def __init__(self, filename=None):
+		self.filename = filename or resolveFilename(SCOPE_CONFIG, PLUGIN_MANIFEST_FILE)
+		self.directory = None
+		self.plugins = {}
+		self.loaded = False
+		self.dirty = False
+
+	def load(self):
+		self.loaded = True
+		try:
+			with open(self.filename, "rb") as fd:
+				data = loads(fd.read())
+			if data[0] == PLUGIN_MANIFEST_VERSION:
+				self.plugins = data[1]
+		except (OSError, EOFError, ValueError, TypeError, IndexError):
+			pass
+
+	def save(self):
+		if not self.dirty:
+			return
+		self.dirty = False
+		try:
+			with open(self.filename + ".writing", "wb") as fd:
+				fd.write(dumps((PLUGIN_MANIFEST_VERSION, self.plugins)))
+			rename(self.filename + ".writing", self.filename)
+		except (OSError, ValueError) as err:
+			print("[PluginManifest] Failed to write %s:" % self.filename, err)
+
+	def forget(self, key):
+		if self.plugins.pop(key, None) is not None:
+			self.dirty = True
+
+	def prune(self, keys):
+		for key in [key for key in self.plugins if key not in keys]:
+			self.forget(key)
+
+	def createRecord(self, descriptor):
+		# None if the descriptor can't be created without importing the plugin
+		if descriptor.wakeupfnc is not None or descriptor._icon is not None or EAGER_WHERE.intersection(descriptor.where):
+			return None
+		if not isinstance(descriptor.name, str) or not isinstance(descriptor.description, str) or not hasattr(descriptor.fnc, "__code__"):
+			return None
+		try:
+			argspec = getArgSpec(descriptor.fnc)
+		except TypeError:
+			return None
+		return [descriptor.name, descriptor.description, list(descriptor.where), descriptor.iconstr, descriptor.weight, descriptor.needsRestart, descriptor.internal, argspec]
+
+	def addPlugin(self, key, stamp, descriptors, definesConfig):
+		# Records the descriptors of an imported plugin.  The functions of
+		# the descriptors are wrapped, so that they compare equal with the
+		# ones created from the manifest on the next start.  definesConfig is
+		# None when the plugin was imported before, then it is unknown.
+		for descriptor in descriptors:
+			if isinstance(descriptor.fnc, LazyPluginFunction):  # the plugin returned the same descriptors again
+				descriptor.fnc = descriptor.fnc.fnc
+		if stamp is None:
+			return
+		entry = self.plugins.get(key)
+		if definesConfig is None:
+			if entry is None or entry[0] != stamp:
+				self.forget(key)  # recorded again when it is imported on the next start
+				return
+			definesConfig = entry[1] is None
+		if definesConfig:
+			if entry != (stamp, None):
+				self.plugins[key] = (stamp, None)
+				self.dirty = True
+			return
+		records = [self.createRecord(descriptor) for descriptor in descriptors]
+		if not records or None in records:
+			self.forget(key)
+			return
+		if entry != (stamp, records):
+			self.plugins[key] = (stamp, records)
+			self.dirty = True
+		for index, (descriptor, record) in enumerate(zip(descriptors, records)):
+			descriptor.fnc = LazyPluginFunction(self, key, stamp, index, record, descriptor.fnc)
+
+	def getDescriptors(self, key, stamp):
+		# the descriptors of a plugin which was not changed since it was recorded
+		entry = self.plugins.get(key)
+		if stamp is None or entry is None or entry[0] != stamp or entry[1] is None:
+			return None
+		descriptors = []
+		for index, record in enumerate(entry[1]):
+			descriptor = PluginDescriptor(name=record[NAME], where=record[WHERE], description=record[DESCRIPTION], icon=record[ICON], needsRestart=record[NEEDS_RESTART], internal=record[INTERNAL], weight=record[WEIGHT])
+			descriptor.fnc = LazyPluginFunction(self, key, stamp, index, record)
+			descriptors.append(descriptor)
+		return descriptors
+
+	def loadFunction(self, key, index, record):
+		category, pluginname = key.split("/")
+		path = join(self.directory, category, pluginname)
+		print("[PluginManifest] Loading plugin %s." % key)
+		try:
+			plugins = my_import(".".join(["Plugins", category, pluginname, "plugin"])).Plugins(path=path)
+		except Exception as err:
+			print("[PluginManifest] Plugin %s failed to load:" % key, err)
+			from traceback import print_exc
+			print_exc()
+			self.forget(key)
+			self.save()
+			return None
+		if not isinstance(plugins, list):
+			plugins = [plugins]
+		plugins = [p for p in plugins if p]
+		# the descriptor at the same place, or else the one with the same name and places
+		candidates = plugins[index:index + 1] + plugins
+		for descriptor in candidates:
+			if descriptor.name == record[NAME] and descriptor.where == record[WHERE]:
+				fnc = descriptor.fnc
+				return fnc.fnc if isinstance(fnc, LazyPluginFunction) else fnc
+		print("[PluginManifest] Plugin %s has no descriptor %s any more." % (key, record[NAME]))
+		self.forget(key)
+		self.save()
+		return None
+
+
+pluginManifest = PluginManifest()
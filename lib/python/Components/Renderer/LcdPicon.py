@@ -6,6 +6,7 @@ from Tools.Directories import pathExists, SCOPE_CURRENT_SKIN, resolveFilename
 from Components.SystemInfo import BoxInfo
 from Components.config import config
 from Components.Renderer.Picon import PiconLocator
+from Tools.LoadPixmap import pixmapCache
 
 
 def useLcdPicons():
@@ -63,6 +64,7 @@ class LcdPicon(Renderer):
 	def updatePicon(self, picInfo=None):
 		ptr = self.PicLoad.getData()
 		if ptr is not None:
+			pixmapCache.add(("ePicLoad", self.pngname) + tuple(self.piconsize), ptr.__deref__())
 			self.instance.setPixmap(ptr.__deref__())
 			self.instance.show()
 
@@ -73,7 +75,11 @@ class LcdPicon(Renderer):
 				if not pathExists(pngname):  # no picon for service found
 					pngname = self.defaultpngname
 				if self.pngname != pngname:
-					if pngname:
+					ptr = pngname and pixmapCache.lookup(("ePicLoad", pngname) + tuple(self.piconsize))
+					if ptr:
+						self.instance.setPixmap(ptr)
+						self.instance.show()
+					elif pngname:
 						self.PicLoad.setPara((self.piconsize[0], self.piconsize[1], 0, 0, 1, 1, "#FF000000"))
 						if self.PicLoad.startDecode(pngname):
 							# if this has failed, then another decode is probably already in progress
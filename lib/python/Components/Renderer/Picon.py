@@ -1,21 +1,32 @@
 # -*- coding: utf-8 -*-
 import os
 import re
+import time
 import unicodedata
 from Components.Renderer.Renderer import Renderer
-from enigma import ePixmap
+from enigma import ePixmap, getDesktop
 from Tools.Alternatives import GetWithAlternative
 from Tools.Directories import pathExists, SCOPE_SKIN_IMAGE, SCOPE_CURRENT_SKIN, resolveFilename, sanitizeFilename
+from Tools.LoadPixmap import pixmapCache
 from Components.Harddisk import harddiskmanager
 from ServiceReference import ServiceReference
 
 
+# resolved service -> picon lookups kept in memory (including misses)
+PICON_CACHE_SIZE = 4096
+# the indexed picon directories are checked for changes at most this often (seconds)
+PICON_REFRESH_INTERVAL = 60
+
+
 class PiconLocator:
 	def __init__(self, piconDirectories=['picon']):
 		harddiskmanager.on_partition_list_change.append(self.__onPartitionChange)
 		self.piconDirectories = piconDirectories
 		self.activePiconPath = None
 		self.searchPaths = []
+		self.piconFiles = {}  # search path -> (mtime, set of picon file names)
+		self.piconCache = {}  # service reference -> picon file name, oldest first
+		self.nextRefresh = time.time() + PICON_REFRESH_INTERVAL
 		for mp in ('/usr/share/enigma2/', '/'):
 			self.__onMountpointAdded(mp)
 		for part in harddiskmanager.getMountedPartitions():
@@ -26,19 +37,24 @@ class PiconLocator:
 			try:
 				path = os.path.join(mountpoint, piconDirectory) + '/'
 				if os.path.isdir(path) and path not in self.searchPaths:
-					for fn in os.listdir(path):
-						if fn.endswith('.png') or fn.endswith('.svg'):
-							print("[Picon] adding path:", path)
-							self.searchPaths.append(path)
-							break
+					if self.indexPath(path):
+						print("[Picon] adding path:", path)
+						self.searchPaths.append(path)
+						self.piconCache.clear()
+					else:
+						del self.piconFiles[path]
 			except:
 				pass
 
 	def __onMountpointRemoved(self, mountpoint):
 		for piconDirectory in self.piconDirectories:
-			path = os.path.join(mountpoint, self.piconDirectories) + '/'
+			path = os.path.join(mountpoint, piconDirectory) + '/'
 			try:
 				self.searchPaths.remove(path)
+				self.piconFiles.pop(path, None)
+				if self.activePiconPath == path:
+					self.activePiconPath = None
+				self.piconCache.clear()
 				print("[Picon] removed path:", path)
 			except:
 				pass
@@ -49,19 +65,51 @@ class PiconLocator:
 		elif why == 'remove':
 			self.__onMountpointRemoved(part.mountpoint)
 
+	def indexPath(self, path):
+		# one listing per picon directory, lookups are done in memory
+		try:
+			mtime = os.stat(path).st_mtime
+			files = set(fn for fn in os.listdir(path) if fn.endswith('.png') or fn.endswith('.svg'))
+		except OSError:
+			mtime = None
+			files = set()
+		self.piconFiles[path] = (mtime, files)
+		return files
+
+	def refreshIndex(self):
+		# picons may be added while running, so the directories are checked
+		# for changes from time to time instead of on every lookup
+		now = time.time()
+		if now < self.nextRefresh:
+			return
+		self.nextRefresh = now + PICON_REFRESH_INTERVAL
+		for path in self.searchPaths:
+			try:
+				mtime = os.stat(path).st_mtime
+			except OSError:
+				mtime = None
+			indexed = self.piconFiles.get(path)
+			if indexed is None or indexed[0] != mtime:
+				print("[Picon] reindexing path:", path)
+				self.indexPath(path)
+				self.piconCache.clear()
+
 	def findPicon(self, serviceName):
+		self.refreshIndex()
 		if self.activePiconPath is not None:
-			for ext in ('.png', '.svg'):
-				pngname = self.activePiconPath + serviceName + ext
-				if pathExists(pngname):
-					return pngname
+			files = self.piconFiles.get(self.activePiconPath)
+			if files is not None:
+				for ext in ('.png', '.svg'):
+					if serviceName + ext in files[1]:
+						return self.activePiconPath + serviceName + ext
 		else:
 			for path in self.searchPaths:
-				for ext in ('.png', '.svg'):
-					pngname = path + serviceName + ext
-					if pathExists(pngname):
-						self.activePiconPath = path
-						return pngname
+				files = self.piconFiles.get(path)
+				if files is not None:
+					for ext in ('.png', '.svg'):
+						if serviceName + ext in files[1]:
+							self.activePiconPath = path
+							return path + serviceName + ext
 		return ""
 
 	def addSearchPath(self, value):
@@ -69,9 +117,23 @@ class PiconLocator:
 			if not value.endswith('/'):
 				value += '/'
 			if not value.startswith('/media/net') and not value.startswith('/media/autofs') and value not in self.searchPaths:
+				self.indexPath(value)
 				self.searchPaths.append(value)
+				self.piconCache.clear()
 
 	def getPiconName(self, serviceName):
+		# channel lists ask for the picon of every visible row, so the results
+		# (also the misses) are kept in a LRU cache
+		self.refreshIndex()
+		pngname = self.piconCache.pop(serviceName, None)
+		if pngname is None:
+			pngname = self.lookupPicon(serviceName)
+			if len(self.piconCache) >= PICON_CACHE_SIZE:
+				del self.piconCache[next(iter(self.piconCache))]
+		self.piconCache[serviceName] = pngname
+		return pngname
+
+	def lookupPicon(self, serviceName):
 		#remove the path and name fields, and replace ':' by '_'
 		fields = GetWithAlternative(serviceName).split(':', 10)[:10]
 		if not fields or len(fields) < 10:
@@ -99,7 +161,7 @@ class PiconLocator:
 		if not pngname: # picon default
 			tmp = resolveFilename(SCOPE_CURRENT_SKIN, "picon_default.png") # picon_default in current active skin
 			tmp2 = self.findPicon("picon_default") # picon_default in picon folder
-			if pathExists(tmp2):
+			if tmp2:
 				pngname = tmp2
 			else:
 				if pathExists(tmp):
@@ -152,7 +214,8 @@ class Picon(Renderer):
 				if self.pngname != pngname:
 					if pngname:
 						self.instance.setScale(1)
-						self.instance.setPixmapFromFile(pngname)
+						size = self.instance.size()
+						self.instance.setPixmap(pixmapCache.get(pngname, getDesktop(0), size.width(), size.height()))
 						self.instance.show()
 					else:
 						self.instance.hide()
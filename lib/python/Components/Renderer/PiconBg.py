@@ -1,7 +1,8 @@
-from enigma import ePixmap
+from enigma import ePixmap, getDesktop
 from Components.config import config
 from Components.Renderer.Renderer import Renderer
 from Tools.Directories import SCOPE_GUISKIN, resolveFilename
+from Tools.LoadPixmap import pixmapCache
 
 
 class PiconBg(Renderer):
@@ -22,7 +23,7 @@ class PiconBg(Renderer):
 				if self.pngname != pngname:
 					if pngname:
 						self.instance.setScale(1)
-						self.instance.setPixmapFromFile(pngname)
+						self.instance.setPixmap(pixmapCache.get(pngname, getDesktop(0)))
 						self.instance.show()
 					else:
 						self.instance.hide()
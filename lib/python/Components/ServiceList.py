@@ -888,6 +888,10 @@ class ServiceList(ServiceListBase, ServiceListTemplateParser):
 		self.numberoffset = 0
 		self.PlayableIgnoreService = eServiceReference()
 		self.recordingList = {}
+		self.rowCache = {}  # (service, status, serviceAvail, events): entry of the current minute
+		self.rowCacheMinute = None
+		self.piconCache = {}
+		self.alternatives = {}  # alternatives group: member references
 		if self.session:
 			self.session.nav.RecordTimer.on_state_change.append(self.onTimerEntryStateChange)
 		config.channelSelection.showTimers.addNotifier(self.getRecordingList, initial_call=True)
@@ -1036,17 +1040,36 @@ class ServiceList(ServiceListBase, ServiceListTemplateParser):
 		# addtimedisplayWidth = self._calcTextWidth(textTpl, font=self.additionalInfoFont, size=eSize(self.desktopWidth // 3, 0))
 		return addtimedisplay, addtimedisplayWidth
 
+	def clearRowCache(self):
+		self.rowCache = {}
+		self.alternatives = {}
+
+	def getAlternativeMembers(self, service):
+		key = service.toString()
+		members = self.alternatives.get(key)
+		if members is None:
+			members = []
+			alist = ServiceReference(service).list()
+			while alist:
+				aservice = alist.getNext()
+				if not aservice.valid():
+					break
+				members.append(aservice.toString())
+			members = self.alternatives[key] = tuple(members)
+		return members
+
 	def buildOptionEntryServicePicon(self, service):
+		key = service.toString()
+		if key in self.piconCache:
+			return self.piconCache[key]
 		if service.flags & eServiceReference.mustDescent:
-			alist = ServiceReference(service).list()
-			first_in_alternative = alist and alist.getNext()
-			service_str = first_in_alternative.toString() if first_in_alternative else service.toString()
+			members = self.getAlternativeMembers(service)
+			service_str = members[0] if members else key
 		else:
-			service_str = service.toString()
+			service_str = key
 		picon = getPiconName(service_str)
-		if exists(picon):
-			return loadPNG(picon)
-		return None
+		pixmap = self.piconCache[key] = loadPNG(picon) if exists(picon) else None
+		return pixmap
 
 	def buildOptionEntryServicePixmap(self, service):
 		pixmap = None
@@ -1076,16 +1099,12 @@ class ServiceList(ServiceListBase, ServiceListTemplateParser):
 			if service.toString() in self.recordingList:
 				return True
 			if isPlayable and len(self.recordingList) and service.flags & eServiceReference.mustDescent:
-				alist = ServiceReference(service).list()
-				while True:
-					aservice = alist.getNext()
-					if not aservice.valid():
-						break
-					if aservice.toString() in self.recordingList:
-						return True
+				return not self.recordingList.keys().isdisjoint(self.getAlternativeMembers(service))
 		return False
 
 	def reloadSkin(self):
+		self.clearRowCache()
+		self.piconCache = {}
 		if componentTemplates.isChanged():
 			reloadSkinTemplates(clear=True)
 			self.readTemplate(config.channelSelection.widgetStyle.value)
@@ -1156,6 +1175,8 @@ class ServiceList(ServiceListBase, ServiceListTemplateParser):
 	def onHide(self):
 		GUIComponent.onHide(self)
 		self.reloadTimer.stop()
+		self.clearRowCache()
+		self.piconCache = {}
 
 	def doReload(self):
 		self.l.refresh()
@@ -1181,8 +1202,17 @@ class ServiceList(ServiceListBase, ServiceListTemplateParser):
 	def setPlayableIgnoreService(self, ref):
 		self.PlayableIgnoreService = ref
 
+	def setRoot(self, root, justSet=False):
+		self.clearRowCache()
+		ServiceListBase.setRoot(self, root, justSet)
+
+	def resetRoot(self):
+		self.clearRowCache()
+		ServiceListBase.resetRoot(self)
+
 	def setMode(self, mode):
 		self.mode = mode
+		self.clearRowCache()
 		self.setItemSize()
 		self.l.setRecordIndicatorMode(self.recordIndicatorMode)
 		self.l.setHideNumberMarker(config.usage.hide_number_markers.value)
@@ -1262,7 +1292,6 @@ class ServiceList(ServiceListBase, ServiceListTemplateParser):
 		res = [None]
 
 		info = self.service_center.info(service)
-		serviceName = info and info.getName(service) or "<n/a>"
 
 		isPlayableValue = 0
 		serviceAvail = 0
@@ -1276,6 +1305,7 @@ class ServiceList(ServiceListBase, ServiceListTemplateParser):
 
 		events = []
 		serviceNumber = ""
+		eventsQuery = None
 		if self.mode == self.MODE_BOUQUETS:
 			if isMarker:
 				templateItems = self.templateDataBouquetsMarker
@@ -1286,10 +1316,10 @@ class ServiceList(ServiceListBase, ServiceListTemplateParser):
 			defaults = self.templateDefaultsBouquets
 			maxEvents = defaults.get("maxevents")
 			if not isMarker and maxEvents:
-				events = eEPGCache.getInstance().lookupEvent(["BDTS%d" % maxEvents, (service.toString(), 0, -1, 360)])
+				eventsQuery = "BDTS%d" % maxEvents
 				serviceNumber = service.getChannelNum()
 		elif self.mode == self.MODE_SERVICES:
-			events = eEPGCache.getInstance().lookupEvent(["BDTS1", (service.toString(), 0, -1, 360)])
+			eventsQuery = "BDTS1"
 			defaults = self.templateDefaultsServices
 			templateItems = self.templateDataServices
 			serviceNumber = service.getChannelNum()
@@ -1302,6 +1332,21 @@ class ServiceList(ServiceListBase, ServiceListTemplateParser):
 			else:
 				templateItems = self.templateDataOther
 
+		# the rows of the current minute are reused as long as the status and
+		# the events of the service are unchanged
+		serviceString = service.toString()
+		if eventsQuery:
+			events = eEPGCache.getInstance().lookupEvent([eventsQuery, (serviceString, 0, -1, 360)]) or []
+		minute = int(time()) // 60
+		if minute != self.rowCacheMinute:
+			self.rowCache = {}
+			self.rowCacheMinute = minute
+		key = (serviceString, status, serviceAvail, tuple(events))
+		cached = self.rowCache.get(key)
+		if cached is not None:
+			return cached
+
+		serviceName = info and info.getName(service) or "<n/a>"
 		autoFitData = {}
 
 		try:
@@ -1418,4 +1463,5 @@ class ServiceList(ServiceListBase, ServiceListTemplateParser):
 			import traceback
 			traceback.print_exc()
 
+		self.rowCache[key] = res
 		return res
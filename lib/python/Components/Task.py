@@ -2,8 +2,36 @@
 # A Job consists of many "Tasks".
 # A task is the run of an external tool, with proper methods for failure handling
 
+from collections import deque
+from os import major, minor, stat
+from os.path import basename, dirname, exists, realpath
+from re import compile
+
 from Tools.CList import CList
 
+# Jobs declare the resources they use, the JobManager runs jobs concurrently as
+# long as no resource is used by more jobs than its limit allows. Jobs without
+# resources use RESOURCE_DEFAULT, so they still run one after another.
+RESOURCE_DEFAULT = "default"
+RESOURCE_CPU = "cpu"
+RESOURCE_NETWORK = "network"
+
+
+def deviceResource(path):
+	# Returns the resource of the block device holding path, partitions of a disk share one resource.
+	while path and not exists(path):
+		path = dirname(path.rstrip("/"))
+	try:
+		st = stat(path or "/")
+	except OSError:
+		return "device:unknown"
+	device = realpath("/sys/dev/block/%d:%d" % (major(st.st_dev), minor(st.st_dev)))
+	if exists(device):
+		if exists(device + "/partition"):
+			device = dirname(device)
+		return "device:%s" % basename(device)
+	return "device:%d:%d" % (major(st.st_dev), minor(st.st_dev))  # Network and virtual file systems.
+
 
 class Job:
 	NOT_STARTED, IN_PROGRESS, FINISHED, FAILED = range(4)
@@ -23,6 +51,15 @@ class Job:
 		self.state_changed = CList()
 		self.status = self.NOT_STARTED
 		self.onSuccess = None
+		self.resources = []
+		self.priority = 0  # Waiting jobs with a higher priority are started first.
+
+	def addResource(self, resource):
+		if resource not in self.resources:
+			self.resources.append(resource)
+
+	def getResources(self):
+		return self.resources or [RESOURCE_DEFAULT]
 
 	# description is a dict
 	def fromDescription(self, description):
@@ -116,7 +153,47 @@ class Job:
 		return "Components.Task.Job name=%s #tasks=%s" % (self.name, len(self.tasks))
 
 
+class LineSplitter:
+	# Splits the output of a tool into lines as it arrives. Only the unterminated
+	# end of the last chunk is kept, so the cost is linear in the output size.
+	# Extra separators (like "\r" or "\b" of progress output) end a line too,
+	# empty lines are dropped when they are used.
+	MAX_LINE = 65536  # Longer lines are passed on in pieces.
+
+	def __init__(self, callback, separators=b"\n"):
+		self.callback = callback
+		self.table = None if separators == b"\n" else bytes.maketrans(separators, b"\n" * len(separators))
+		self.rest = bytearray()
+
+	def feed(self, data):
+		if self.table:
+			data = data.translate(self.table)
+		end = data.rfind(b"\n")
+		if end == -1:
+			self.rest += data
+			if len(self.rest) > self.MAX_LINE:
+				self.flush()
+			return
+		if self.rest:
+			end += len(self.rest)
+			self.rest += data
+			data = bytes(self.rest)
+		self.rest = bytearray(data[end + 1:])
+		callback = self.callback
+		for line in data[:end].split(b"\n"):
+			if line or self.table is None:
+				callback(line.decode(errors="replace") + "\n")
+
+	def flush(self):
+		if self.rest:
+			line = bytes(self.rest)
+			self.rest = bytearray()
+			self.callback(line.decode(errors="replace") + "\n")
+
+
 class Task:
+	OUTPUT_SEPARATORS = b"\n"
+
 	def __init__(self, job, name):
 		self.name = name
 		self.immediate_preconditions = []
@@ -133,7 +210,8 @@ class Task:
 		self.args = []
 		self.cmdline = None
 		self.task_progress_changed = None
-		self.output_line = ""
+		self.outputSplitter = LineSplitter(self.processLine, self.OUTPUT_SEPARATORS)
+		self.outputPatterns = []
 		job.addTask(self)
 		self.container = None
 
@@ -203,19 +281,31 @@ class Task:
 		pass
 
 	def processStdout(self, data):
-		self.processOutput(data.decode())
+		self.processOutputData(data)
 
 	def processStderr(self, data):
-		self.processOutput(data.decode())
+		self.processOutputData(data)
+
+	def processOutputData(self, data):
+		if getattr(self.processOutput, "__func__", None) is Task.processOutput:
+			self.outputSplitter.feed(data)
+		else:  # Tasks overriding processOutput() get the decoded chunks.
+			self.processOutput(data.decode(errors="replace"))
 
 	def processOutput(self, data):
-		self.output_line += data
-		while True:
-			i = self.output_line.find('\n')
-			if i == -1:
-				break
-			self.processOutputLine(self.output_line[:i + 1])
-			self.output_line = self.output_line[i + 1:]
+		self.outputSplitter.feed(data.encode() if isinstance(data, str) else data)
+
+	# The callback is called with the match object for every output line the
+	# pattern is found in, a callback returning True consumes the line.
+	def addOutputPattern(self, pattern, callback):
+		self.outputPatterns.append((compile(pattern), callback))
+
+	def processLine(self, line):
+		for regex, callback in self.outputPatterns:
+			match = regex.search(line)
+			if match and callback(match):
+				return
+		self.processOutputLine(line)
 
 	def processOutputLine(self, line):
 		print("[Task] %s" % self.name, line[:-1])
@@ -231,6 +321,7 @@ class Task:
 		self.finish(aborted=True)
 
 	def finish(self, aborted=False):
+		self.outputSplitter.flush()
 		self.afterRun()
 		not_met = []
 		if aborted:
@@ -267,13 +358,31 @@ class Task:
 
 
 class LoggingTask(Task):
+	LOG_LINES = 100  # Only the last lines of the output are kept in memory.
+
 	def __init__(self, job, name):
 		Task.__init__(self, job, name)
-		self.log = []
+		self.log = deque(maxlen=self.LOG_LINES)
+		self.logFile = None  # Set this to a file name to write the full output to it.
+		self.logFd = None
 
-	def processOutput(self, data):
-		print("[Task] %s" % self.name, data,
-		self.log.append(data))
+	def processOutputLine(self, line):
+		print("[Task] %s" % self.name, line[:-1])
+		self.log.append(line)
+		if self.logFile:
+			try:
+				if self.logFd is None:
+					self.logFd = open(self.logFile, "a")
+				self.logFd.write(line)
+			except OSError as err:
+				print("[Task] Error: Unable to write log file '%s'!  (%s)" % (self.logFile, err))
+				self.logFile = None
+
+	def finish(self, aborted=False):
+		Task.finish(self, aborted)
+		if self.logFd:
+			self.logFd.close()
+			self.logFd = None
 
 
 class PythonTask(Task):
@@ -349,19 +458,36 @@ class ConditionTask(Task):
 		if res:
 			self.finish()
 
-# The jobmanager will execute multiple jobs, each after another.
+# The jobmanager will execute multiple jobs, several at once when their resources allow it.
 # later, it will also support suspending jobs (and continuing them after reboot etc)
 # It also supports a notification when some error occurred, and possibly a retry.
 
 
 class JobManager:
 	def __init__(self):
-		self.active_jobs = []
+		self.active_jobs = []  # Jobs waiting to be started.
+		self.running_jobs = []  # Started jobs, failed jobs stay here until the retry question is answered.
 		self.failed_jobs = []
 		self.job_classes = []
 		self.in_background = False
 		self.visible = False
-		self.active_job = None
+		self.resourceLimits = {
+			RESOURCE_DEFAULT: 1,
+			RESOURCE_CPU: 1,
+			RESOURCE_NETWORK: 2
+		}
+
+	def getActiveJob(self):
+		return self.running_jobs[0] if self.running_jobs else None
+
+	active_job = property(getActiveJob)
+
+	def setResourceLimit(self, resource, limit):
+		self.resourceLimits[resource] = limit
+		self.kick()
+
+	def getResourceLimit(self, resource):
+		return self.resourceLimits.get(resource, 1)
 
 	# Set onSuccess to popupTaskView to get a visible notification.
 	# onFail defaults to notifyFailed which tells the user that it went south.
@@ -374,17 +500,34 @@ class JobManager:
 		self.active_jobs.append(job)
 		self.kick()
 
+	def getStartableJob(self):
+		usage = {}
+		for job in self.running_jobs:
+			for resource in job.getResources():
+				usage[resource] = usage.get(resource, 0) + 1
+		# Resources of a job which has to wait are not given to jobs queued behind it.
+		blocked = set()
+		for job in sorted(self.active_jobs, key=lambda job: -job.priority):
+			resources = job.getResources()
+			if not blocked.intersection(resources) and all(usage.get(resource, 0) < self.getResourceLimit(resource) for resource in resources):
+				return job
+			blocked.update(resources)
+		return None
+
 	def kick(self):
-		if self.active_job is None:
-			if self.active_jobs:
-				self.active_job = self.active_jobs.pop(0)
-				self.active_job.start(self.jobDone)
+		job = self.getStartableJob()
+		while job is not None:
+			print("[Task] Starting job '%s' using %s." % (job.name, ", ".join(job.getResources())))
+			self.active_jobs.remove(job)
+			self.running_jobs.append(job)
+			job.start(self.jobDone)
+			job = self.getStartableJob()
 
 	def notifyFailed(self, job, task, problems):
 		from Tools.Notifications import AddNotification, AddNotificationWithCallback
 		from Screens.MessageBox import MessageBox
 		if problems[0].RECOVERABLE:
-			AddNotificationWithCallback(self.errorCB, MessageBox, _("Error: %s\nRetry?") % (problems[0].getErrorMessage(task)))
+			AddNotificationWithCallback(lambda answer: self.errorCB(answer, job), MessageBox, _("Error: %s\nRetry?") % (problems[0].getErrorMessage(task)))
 			return True
 		else:
 			AddNotification(MessageBox, job.name + "\n" + _("Error") + (': %s') % (problems[0].getErrorMessage(task)), type=MessageBox.TYPE_ERROR)
@@ -394,9 +537,10 @@ class JobManager:
 		print("[Task] job", job, "completed with", problems, "in", task)
 		if problems:
 			if not job.onFail(job, task, problems):
-				self.errorCB(False)
+				self.errorCB(False, job)
 		else:
-			self.active_job = None
+			if job in self.running_jobs:
+				self.running_jobs.remove(job)
 			if job.onSuccess:
 				job.onSuccess(job)
 			self.kick()
@@ -409,22 +553,24 @@ class JobManager:
 			self.visible = True
 			AddNotification(JobView, job)
 
-	def errorCB(self, answer):
+	def errorCB(self, answer, job=None):
+		if job is None:
+			failed = [x for x in self.running_jobs if x.status == x.FAILED]
+			job = failed[0] if failed else self.active_job
+		if job is None:
+			return
 		if answer:
 			print("[Task] retrying job")
-			self.active_job.retry()
+			job.retry()
 		else:
 			print("[Task] not retrying job.")
-			self.failed_jobs.append(self.active_job)
-			self.active_job = None
+			if job in self.running_jobs:
+				self.running_jobs.remove(job)
+			self.failed_jobs.append(job)
 			self.kick()
 
 	def getPendingJobs(self):
-		list = []
-		if self.active_job:
-			list.append(self.active_job)
-		list += self.active_jobs
-		return list
+		return self.running_jobs + self.active_jobs
 
 # some examples:
 # class PartitionExistsPostcondition:
@@ -0,0 +1,228 @@
+# -*- coding: utf-8 -*-
+from bisect import bisect_left, insort
+import time
+
+DAY = 86400
+WEEK = 7 * DAY
+# repeated timers are folded onto one local week; the margin covers
+# daylight saving shifts, the exact check is still done by the caller
+WEEK_MARGIN = 3600
+# isInTimer stretches timers by up to a minute, search a bit wider
+EVENT_MARGIN = 120
+
+# localtime() results are cached per utc hour (the utc offset cannot change
+# within one) and per timer begin, the caches are dropped when the timezone changes
+localCacheZone = None
+utcOffsets = {}
+timerDayMinutes = {}
+
+
+def checkLocalCache():
+	global localCacheZone
+	zone = (time.tzname, time.timezone)
+	if zone != localCacheZone or len(utcOffsets) > 4096 or len(timerDayMinutes) > 4096:
+		localCacheZone = zone
+		utcOffsets.clear()
+		timerDayMinutes.clear()
+
+
+def localDayMinute(t):
+	# returns (tm_wday, minute of the day) of localtime(t)
+	checkLocalCache()
+	t = int(t)
+	hour = t // 3600
+	offset = utcOffsets.get(hour)
+	if offset is None:
+		offset = utcOffsets[hour] = time.localtime(t).tm_gmtoff
+	local = t + offset
+	return (local // DAY + 3) % 7, local % DAY // 60
+
+
+def timerDayMinute(timer):
+	# returns (minute of the day of the timer begin, timer ends on another day)
+	# as used by the repeated timer checks in RecordTimer
+	timer_end = timer.end
+	if timer.justplay and (timer_end - timer.begin) <= 1:
+		timer_end += 60
+	key = (timer.begin, timer_end)
+	checkLocalCache()
+	value = timerDayMinutes.get(key)
+	if value is None:
+		xbt = time.localtime(timer.begin)
+		xet = time.localtime(timer_end)
+		value = timerDayMinutes[key] = (xbt.tm_hour * 60 + xbt.tm_min, xbt.tm_yday != xet.tm_yday)
+	return value
+
+
+def serviceKey(refstr):
+	# timers and events are matched on the first 11 fields of the service reference
+	return ':'.join(refstr.split(':')[:11])
+
+
+class IntervalList:
+	# intervals are kept sorted by begin, so every interval overlapping a
+	# query starts somewhere in [begin - maxLength, end) and is found by bisect
+	def __init__(self):
+		self.entries = []
+		self.maxLength = 0
+
+	def __len__(self):
+		return len(self.entries)
+
+	def add(self, begin, end, item):
+		insort(self.entries, (begin, end, id(item), item))
+		if end - begin > self.maxLength:
+			self.maxLength = end - begin
+
+	def remove(self, begin, end, item):
+		entries = self.entries
+		pos = bisect_left(entries, (begin, end, id(item)))
+		if pos < len(entries) and entries[pos][3] is item:
+			del entries[pos]
+		if not entries:
+			self.maxLength = 0
+
+	def overlaps(self, begin, end):
+		entries = self.entries
+		pos = bisect_left(entries, (begin - self.maxLength,))
+		count = len(entries)
+		while pos < count:
+			entry = entries[pos]
+			if entry[0] >= end:
+				break
+			if entry[1] > begin:
+				yield entry[3]
+			pos += 1
+
+
+def weekIntervals(begin, end, repeated=0):
+	# returns the (begin, end) pairs of a timer mapped onto the local week,
+	# monday 00:00 is 0 and the repeated bits are the weekdays as in timer.py
+	length = end - begin
+	if length + 2 * WEEK_MARGIN >= WEEK:
+		return [(0, WEEK)]
+	local = time.localtime(begin)
+	offset = local.tm_hour * 3600 + local.tm_min * 60 + local.tm_sec
+	if repeated:
+		days = [day for day in range(7) if repeated & (1 << day)]
+	else:
+		days = [local.tm_wday]
+	intervals = []
+	for day in days:
+		wbegin = (day * DAY + offset - WEEK_MARGIN) % WEEK
+		wend = wbegin + length + 2 * WEEK_MARGIN
+		if wend > WEEK:
+			intervals.append((wbegin, WEEK))
+			intervals.append((0, wend - WEEK))
+		else:
+			intervals.append((wbegin, wend))
+	return intervals
+
+
+class TimerIntervalIndex:
+	# Incrementally maintained overlap index of timer entries.
+	#
+	# Single shot timers are stored with their absolute begin/end, and all
+	# timers are also stored folded onto the local week so repeated timers
+	# (and timers checked against them) can be matched without unfolding them
+	# over the whole time range of the timer list. The index is a conservative
+	# pre-filter: it may return timers which do not really overlap, but it
+	# never misses one that does.
+	def __init__(self):
+		self.single = IntervalList()
+		self.weeklySingle = IntervalList()
+		self.weeklyRepeated = IntervalList()
+		self.timers = {}
+
+	def __len__(self):
+		return len(self.timers)
+
+	def __contains__(self, timer):
+		return id(timer) in self.timers
+
+	def add(self, timer):
+		key = (timer.begin, timer.end, timer.repeated)
+		stored = self.timers.get(id(timer))
+		if stored is not None:
+			if stored[1] == key:
+				return
+			self.remove(timer)
+		intervals = []
+		if timer.repeated:
+			for begin, end in weekIntervals(timer.begin, timer.end, timer.repeated):
+				intervals.append((self.weeklyRepeated, begin, end))
+		else:
+			intervals.append((self.single, timer.begin, timer.end))
+			for begin, end in weekIntervals(timer.begin, timer.end):
+				intervals.append((self.weeklySingle, begin, end))
+		for intervalList, begin, end in intervals:
+			intervalList.add(begin, end, timer)
+		self.timers[id(timer)] = (timer, key, intervals)
+
+	update = add
+
+	def remove(self, timer):
+		stored = self.timers.pop(id(timer), None)
+		if stored is not None:
+			for intervalList, begin, end in stored[2]:
+				intervalList.remove(begin, end, timer)
+
+	def retain(self, timers):
+		keep = set(id(timer) for timer in timers)
+		for key in [key for key in self.timers if key not in keep]:
+			self.remove(self.timers[key][0])
+
+	def clear(self):
+		self.__init__()
+
+	def getOverlapping(self, timer):
+		# returns all indexed timers which may overlap with the given timer,
+		# the given timer itself is never part of the result
+		found = {}
+		if timer.repeated:
+			for begin, end in weekIntervals(timer.begin, timer.end, timer.repeated):
+				for intervalList in (self.weeklySingle, self.weeklyRepeated):
+					for x in intervalList.overlaps(begin, end):
+						found[id(x)] = x
+		else:
+			for x in self.single.overlaps(timer.begin, timer.end):
+				found[id(x)] = x
+			for begin, end in weekIntervals(timer.begin, timer.end):
+				for x in self.weeklyRepeated.overlaps(begin, end):
+					found[id(x)] = x
+		found.pop(id(timer), None)
+		return list(found.values())
+
+
+class ServiceTimerIndex:
+	# Snapshot of a timer list grouped by normalized service reference.
+	#
+	# Single shot timers of a service are kept in an IntervalList, repeated
+	# timers are always candidates. getTimers() returns the candidates in the
+	# order of the original list, so callers see the same results as when
+	# iterating over the whole list.
+	def __init__(self, timers):
+		self.services = {}
+		self.serviceKeys = {}
+		for pos, timer in enumerate(timers):
+			key = serviceKey(timer.service_ref.ref.toString())
+			services = self.services.get(key)
+			if services is None:
+				services = self.services[key] = (IntervalList(), [])
+			if timer.repeated:
+				services[1].append((pos, timer))
+			else:
+				services[0].add(timer.begin, timer.end, (pos, timer))
+
+	def getTimers(self, service, begin, end):
+		key = self.serviceKeys.get(service)
+		if key is None:
+			key = self.serviceKeys[service] = serviceKey(service)
+		services = self.services.get(key)
+		if services is None:
+			return []
+		found = list(services[0].overlaps(begin - EVENT_MARGIN, end + EVENT_MARGIN))
+		if services[1]:
+			found.extend(services[1])
+			found.sort(key=lambda x: x[0])
+		return [x[1] for x in found]
@@ -9,10 +9,11 @@ from Components.config import config
 
 
 class TimerSanityCheck:
-	def __init__(self, timerlist, newtimer=None):
+	def __init__(self, timerlist, newtimer=None, index=None):
 		self.localtimediff = 25 * 3600 - mktime(gmtime(25 * 3600))
 		self.timerlist = timerlist
 		self.newtimer = newtimer
+		self.index = index
 		self.simultimer = []
 		self.rep_eventlist = []
 		self.nrep_eventlist = []
@@ -101,9 +102,15 @@ class TimerSanityCheck:
 
 ##################################################################################
 # now process existing timers
+# with an interval index only the timers overlapping the new timer can conflict with it
+		if self.index is not None:
+			overlapping = set(self.index.getOverlapping(self.newtimer))
+			timerlist = [timer for timer in self.timerlist if timer in overlapping or timer not in self.index]
+		else:
+			timerlist = self.timerlist
 		self.check_timerlist = []
 		idx = 0
-		for timer in self.timerlist:
+		for timer in timerlist:
 			if timer != self.newtimer:
 				if timer.disabled or not timer.conflict_detection or not timer.service_ref or '%3a//' in timer.service_ref.ref.toString() or timer.state == TimerEntry.StateEnded:
 					continue
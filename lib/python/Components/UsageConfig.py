@@ -8,6 +8,7 @@ from Components.Harddisk import harddiskmanager
 from Components.International import international
 from Components.Console import Console
 from Components.config import ConfigSubsection, ConfigDirectory, ConfigYesNo, config, ConfigSelection, ConfigText, ConfigNumber, ConfigSet, ConfigLocations, ConfigSelectionNumber, ConfigSelectionInteger, ConfigClock, ConfigSlider, ConfigEnableDisable, ConfigSubDict, ConfigDictionarySet, ConfigInteger, ConfigSequence, ConfigPassword, ConfigIP, NoSave, ConfigBoolean, configfile
+from Tools.LoadPixmap import pixmapCache
 from Tools.Directories import SCOPE_HDD, SCOPE_TIMESHIFT, defaultRecordingLocation, resolveFilename, fileWriteLine, fileReadXML, SCOPE_SKIN
 from enigma import setTunerTypePriorityOrder, setPreferredTuner, setSpinnerOnOff, setEnableTtCachingOnOff, eEnv, eDVBDB, Misc_Options, eBackgroundFileEraser, eServiceEvent, eSubtitleSettings, eSettings, eDVBLocalTimeHandler, eEPGCache
 from Components.About import GetIPsFromNetworkInterfaces
@@ -184,6 +185,12 @@ def InitUsageConfig():
 		("lightgrey", _("Light Grey")),
 		("grey", _("Grey"))
 	])
+	config.usage.pixmap_cache_size = ConfigSelection(default="8", choices=[(str(x), _("%d MB") % x) for x in (2, 4, 8, 16, 32, 64)])
+
+	def PixmapCacheSizeChanged(configElement):
+		pixmapCache.setBudget(int(configElement.value) * 1024 * 1024)
+	config.usage.pixmap_cache_size.addNotifier(PixmapCacheSizeChanged)
+
 	config.usage.servicelist_cursor_behavior = ConfigSelection(default="keep", choices=[
 		("standard", _("Standard")),
 		("keep", _("Keep service")),
@@ -1,14 +1,20 @@
 from copy import copy as shallowcopy
-from os import fsync, rename, sep
+from marshal import dumps, loads
+from os import fsync, rename, sep, stat
 from os.path import realpath
-from time import localtime, strftime, struct_time
+from time import localtime, perf_counter, strftime, struct_time
 
-from enigma import getPrevAsciiCode
+from enigma import eTimer, getPrevAsciiCode
 
 from Tools.Directories import SCOPE_CONFIG, fileAccess, resolveFilename
 from Tools.NumericalTextInput import NumericalTextInput
 from Components.Harddisk import harddiskmanager  # This import is order critical!
 
+# Config elements and trees whose saved values changed since the settings file was written.
+dirtyElements = set()
+# Config entries found by Config.resolveKey(), cleared whenever entries are added.
+resolvedKeys = {}
+
 ACTIONKEY_LEFT = 0
 ACTIONKEY_RIGHT = 1
 ACTIONKEY_SELECT = 2
@@ -77,6 +83,81 @@ def NoSave(element):
 	return element
 
 
+# Calls the notifiers of config elements, records how long they take and
+# delivers coalesced notifiers (see ConfigElement.addNotifier) from a timer.
+#
+# A coalesced notifier is called at most once per coalesce window with the
+# latest value of the element, a window of 0 delivers it on the next mainloop
+# iteration so all changes made while handling one key press are merged.
+#
+class NotifierDispatcher:
+	WARNING_TIME = 0.05  # Notifiers taking longer than this (in seconds) are reported in the log.
+
+	def __init__(self):
+		self.pending = {}  # (id(element), notifier) -> (due time, element, notifier)
+		self.timer = None
+		self.statistics = {}  # Notifier name -> [calls, total time, slowest call]
+		self.coalesced = 0  # Changes which did not cause an extra notifier call.
+
+	def getName(self, notifier):
+		return f"{getattr(notifier, '__module__', None)}.{getattr(notifier, '__qualname__', notifier)}"
+
+	def call(self, element, notifier, extraArgs=None):
+		start = perf_counter()
+		if extraArgs is None:
+			notifier(element)
+		else:
+			notifier(element, extraArgs)
+		duration = perf_counter() - start
+		name = self.getName(notifier)
+		statistics = self.statistics.get(name)
+		if statistics is None:
+			statistics = self.statistics[name] = [0, 0.0, 0.0]
+		statistics[0] += 1
+		statistics[1] += duration
+		if duration > statistics[2]:
+			statistics[2] = duration
+		if duration > self.WARNING_TIME:
+			print(f"[Config] Warning: Notifier '{name}' took {duration * 1000:.1f}ms!")
+
+	def schedule(self, element, notifier, delay):
+		key = (id(element), notifier)
+		if key in self.pending:
+			self.coalesced += 1
+			return
+		self.pending[key] = (perf_counter() + delay / 1000.0, element, notifier)
+		self.startTimer()
+
+	def cancel(self, element, notifier=None):
+		for key in [key for key in self.pending if key[0] == id(element) and (notifier is None or key[1] == notifier)]:
+			del self.pending[key]
+
+	def startTimer(self):
+		if self.timer is None:
+			self.timer = eTimer()
+			self.timer.callback.append(self.deliver)
+		due = min(entry[0] for entry in self.pending.values())
+		self.timer.start(max(int((due - perf_counter()) * 1000), 0), True)
+
+	def deliver(self):
+		now = perf_counter() + 0.001
+		for key, (due, element, notifier) in list(self.pending.items()):
+			if due <= now and self.pending.pop(key, None) is not None:
+				element.callNotifier(notifier)
+		if self.pending:
+			self.startTimer()
+
+	def getStatistics(self):
+		return {
+			"pending": len(self.pending),
+			"coalesced": self.coalesced,
+			"notifiers": dict((name, tuple(values)) for name, values in self.statistics.items())
+		}
+
+
+notifierDispatcher = NotifierDispatcher()
+
+
 # ConfigElement, the base class of all ConfigElements.
 #
 # It stores:
@@ -110,6 +191,7 @@ class ConfigElement:
 		self.currentValue = None
 		self.immediateNotifiers = []
 		self.finalNotifiers = []
+		self.coalescedNotifiers = {}  # Notifier -> coalesce window in ms.
 		self.extraArgs = []
 		self.callback = None
 
@@ -132,7 +214,10 @@ class ConfigElement:
 		if self.loadValue is None:
 			self.loadValue = self.default if self.saved_value is None else self.fromString(self.saved_value)
 		# print(f"[Config] save DEBUG: Load='{self.loadValue}', Value='{self.value}'.")
+		savedValue = self.saved_value
 		self.saved_value = None if self.save_disabled or (self.value == self.default and not self.saveForced) else self.toString(self.value)
+		if self.saved_value != savedValue:
+			dirtyElements.add(self)
 		if self.value != self.loadValue:
 			self.changedFinal()  # Call non-immediate_feedback notifiers, immediate_feedback notifiers are called as the values chanage.
 
@@ -215,21 +300,19 @@ class ConfigElement:
 		# print("[Config] changed DEBUG: Changed method has been called.")
 		if self.immediateNotifiers:
 			for notifier in self.immediateNotifiers:
-				extraArgs = self.getExtraArgs(notifier)
-				if extraArgs is not None:
-					notifier(self, extraArgs)
+				if notifier in self.coalescedNotifiers:
+					notifierDispatcher.schedule(self, notifier, self.coalescedNotifiers[notifier])
 				else:
-					notifier(self)
+					self.callNotifier(notifier)
 
 	def changedFinal(self):  # This calls all the final notifiers as the last action on an edited element.
 		# print("[Config] changedFinal DEBUG: Final changed method has been called.")
 		if self.finalNotifiers:
 			for notifier in self.finalNotifiers:
-				extraArgs = self.getExtraArgs(notifier)
-				if extraArgs is not None:
-					notifier(self, extraArgs)
-				else:
-					notifier(self)
+				self.callNotifier(notifier)
+
+	def callNotifier(self, notifier):
+		notifierDispatcher.call(self, notifier, self.getExtraArgs(notifier))
 
 	def getExtraArgs(self, notifier):
 		for extraArg in self.extraArgs:
@@ -273,8 +356,13 @@ class ConfigElement:
 	# for call_on_save_or_cancel:
 	# 	True = Call notifier always on save/cancel, even when value have not changed!
 	# 	DEBUG: What is the point of this?
+	# For coalesce:
+	# 	None = Call an immediate_feedback notifier synchronously on every value change.
+	# 	Milliseconds = Call an immediate_feedback notifier at most once per this time with
+	# 	the latest value, 0 merges all changes made before the next mainloop iteration.
+	# 	(Use this for expensive notifiers of elements changed by held keys, like sliders.)
 	#
-	def addNotifier(self, notifier, initial_call=True, immediate_feedback=True, extra_args=None, call_on_save_or_cancel=None):  # TODO: camelCase the variables!
+	def addNotifier(self, notifier, initial_call=True, immediate_feedback=True, extra_args=None, call_on_save_or_cancel=None, coalesce=None):  # TODO: camelCase the variables!
 		if not callable(notifier):
 			raise TypeError("[Config] Error: Notifiers must be callable!")
 		extraArgs = extra_args  # This can be removed when all calling code is updated.
@@ -282,6 +370,8 @@ class ConfigElement:
 			self.extraArgs.append((notifier, extraArgs))
 		if immediate_feedback:
 			self.immediateNotifiers.append(notifier)
+			if coalesce is not None:
+				self.coalescedNotifiers[notifier] = coalesce
 		else:
 			self.finalNotifiers.append(notifier)
 		# CHECKME:
@@ -292,23 +382,22 @@ class ConfigElement:
 		#   ever been read though that's not so easy to detect as
 		#   the entry could just be new.  (Currently Yes)
 		if initial_call:
-			if extraArgs:
-				notifier(self, extraArgs)
-			else:
-				notifier(self)
+			notifierDispatcher.call(self, notifier, extraArgs if extraArgs else None)
 
 	def removeNotifier(self, notifier):
 		while notifier in self.immediateNotifiers:
 			self.immediateNotifiers.remove(notifier)
 		while notifier in self.finalNotifiers:
 			self.finalNotifiers.remove(notifier)
-		for index in range(len(self.extraArgs)):
-			if self.extraArgs[index][0] == notifier:
-				del self.extraArgs[index]
+		self.extraArgs = [extraArg for extraArg in self.extraArgs if extraArg[0] != notifier]
+		self.coalescedNotifiers.pop(notifier, None)
+		notifierDispatcher.cancel(self, notifier)
 
 	def clearNotifiers(self):
 		self.immediateNotifiers = []
 		self.finalNotifiers = []
+		self.coalescedNotifiers = {}
+		notifierDispatcher.cancel(self)
 
 	def verifyNotifiers(self, notifiers):
 		if any([not callable(notifier) for notifier in notifiers]):
@@ -623,7 +712,10 @@ class ConfigDictionarySet(ConfigElement):
 			self.changed()
 			if callable(self.callback):
 				self.callback()
+		savedValue = self.saved_value
 		self.saved_value = self.toString(self.dirs)
+		if self.saved_value != savedValue:
+			dirtyElements.add(self)
 
 	def handleKey(self, key, callback=None):
 		self.callback = callback
@@ -2156,6 +2248,7 @@ class ConfigSubList(list):
 	def append(self, item):
 		index = str(len(self))
 		list.append(self, item)
+		resolvedKeys.clear()
 		if index in self.stored_values:
 			item.saved_value = self.stored_values[index]
 			item.load()
@@ -2174,6 +2267,7 @@ class ConfigSubDict(dict):
 
 	def __setitem__(self, key, item):
 		dict.__setitem__(self, key, item)
+		resolvedKeys.clear()
 		if str(key) in self.stored_values:
 			item.saved_value = self.stored_values[str(key)]
 			item.load()
@@ -2235,7 +2329,10 @@ class ConfigSubsection:
 			raise TypeError("[Config] Error: 'ConfigSubsection' can only store ConfigSubsections, ConfigSubLists, ConfigSubDicts or ConfigElements!")
 		content = self.content
 		content.items[name] = value
+		resolvedKeys.clear()
 		val = content.stored_values.get(name, None)
+		if isinstance(val, bytes):  # Not yet used subtree of the settings snapshot.
+			val = content.stored_values[name] = loads(val)
 		if val is not None:
 			# print(f"[Config] Ok, now we have a new item '{name}' and have the following value for it '{str(val)}'.")
 			value.saved_value = val
@@ -2268,6 +2365,8 @@ class ConfigSubsection:
 		self.content.stored_values = values
 		for (key, val) in self.content.items.items():
 			value = values.get(key, None)
+			if isinstance(value, bytes):  # Not yet used subtree of the settings snapshot.
+				value = values[key] = loads(value)
 			if value is not None:
 				val.saved_value = value
 
@@ -2292,6 +2391,8 @@ class Config(ConfigSubsection):
 	def pickleThis(self, prefix, toPickle, result):
 		for (key, val) in sorted(toPickle.items(), key=lambda x: str(x[0]) if x[0].isdigit() else x[0].lower()):
 			name = ".".join((prefix, key))
+			if isinstance(val, bytes):  # Not yet used subtree of the settings snapshot.
+				val = loads(val)
 			if isinstance(val, dict):
 				self.pickleThis(name, val, result)
 			elif isinstance(val, tuple):
@@ -2305,8 +2406,13 @@ class Config(ConfigSubsection):
 		return "".join(result)
 
 	def unpickle(self, lines, baseFile=True):
-		tree = {}
-		configBase = tree.setdefault("config", {})
+		self.setSavedValue(self.parseLines(lines, baseFile))
+		dirtyElements.add(self)
+
+	# Return the tree of the "config" entries in the lines of a settings file.
+	#
+	def parseLines(self, lines, baseFile=True):
+		configBase = {}
 		for line in lines:
 			if not line or line[0] == "#":
 				continue
@@ -2321,15 +2427,33 @@ class Config(ConfigSubsection):
 				base = base.setdefault(name, {})
 			base[names[-1]] = val
 			if not baseFile:  # Not the initial config file.
-				try:
-					configEntry = eval(key)
-					if configEntry is not None:  # Update config.x.y.value when it exists.
-						configEntry.value = val
-				except (SyntaxError, KeyError):
-					pass
-		# We inherit from ConfigSubsection so object.__setattr__(self, "saved_value", tree["config"])
-		if "config" in tree:
-			self.setSavedValue(tree["config"])
+				configEntry = self.resolveKey(key)
+				if isinstance(configEntry, ConfigElement):  # Update config.x.y.value when it exists.
+					configEntry.value = val
+		return configBase
+
+	# Return the config entry of a settings key like "config.usage.setup_level"
+	# or None if there is no such entry.  Subsections, sub lists and sub dicts are
+	# walked through their dict() and the results are cached.
+	#
+	def resolveKey(self, key):
+		if key in resolvedKeys:
+			return resolvedKeys[key]
+		names = key.split(".")
+		entry = self if names[0] == "config" else None
+		for name in names[1:]:
+			if entry is None:
+				break
+			try:
+				items = entry.dict()
+			except AttributeError:  # A config element has no entries.
+				entry = None
+				break
+			entry = items.get(name)
+			if entry is None and name.isdigit():  # A ConfigSubDict with integer keys.
+				entry = items.get(int(name))
+		resolvedKeys[key] = entry
+		return entry
 
 	def loadFromFile(self, filename, baseFile=True, base_file=None):  # DEBUG: base_file is deprecated, only used in Components/PackageInfo.py
 		if base_file is not None:
@@ -2348,35 +2472,131 @@ class Config(ConfigSubsection):
 			print(f"[Config] Error {err.errno}: Couldn't write '{filename}'!  ({err.strerror})")
 
 
+# The settings file stays the only real storage of the settings.  The parsed
+# settings are also kept in a binary snapshot, which is used at startup as long
+# as the size and modification time of the settings file are unchanged.  Each
+# top level subtree is stored separately and is only unpacked when it is used.
+# The snapshot is only written by the save at shutdown and at startup when it
+# is outdated, not on every save.
+#
+SNAPSHOT_VERSION = 1
+
+
 class ConfigFile:
 	CONFIG_FILE = resolveFilename(SCOPE_CONFIG, "settings")
+	SNAPSHOT_FILE = resolveFilename(SCOPE_CONFIG, "settings.snapshot")
+
+	def __init__(self):
+		self.saveTimer = None
+		self.savePending = False
+		self.saveRequests = 0  # Number of save() calls.
+		self.saveCoalesced = 0  # Number of save() calls merged into an already pending write.
+		self.saveSkipped = 0  # Number of writes skipped as no setting was changed.
+		self.saveWrites = 0  # Number of times the settings file was written.
+		self.writtenKey = None  # Snapshot key of the settings file as it was last written.
+		self.snapshotKey = None  # Snapshot key of the settings in the snapshot.
 
 	def load(self):
+		if self.savePending:  # A pending save() must not be lost or read back as the old file.
+			self.writeSettings()
+		tree = self.loadSnapshot()
+		if tree is not None:
+			config.setSavedValue(tree)
+			return
 		try:
-			config.loadFromFile(self.CONFIG_FILE, baseFile=True)
+			with open(self.CONFIG_FILE, encoding="UTF-8") as fd:
+				tree = config.parseLines(fd)
+			config.setSavedValue(tree)
+			self.saveSnapshot(tree)
 		except OSError as err:
 			print(f"[Config] Error {err.errno}: Unable to load config file '{self.CONFIG_FILE}', assuming defaults.  ({err.strerror})")
 
-	def save(self):
+	# Save requests are merged into one write when the mainloop is idle, use
+	# immediate=True when the settings file must be up to date on return and
+	# snapshot=True to also update the snapshot (at shutdown).
+	#
+	def save(self, immediate=False, snapshot=False):
 		# config.save()
+		self.saveRequests += 1
+		if immediate or snapshot:
+			self.writeSettings(snapshot)
+		elif self.savePending:
+			self.saveCoalesced += 1
+		else:
+			if self.saveTimer is None:
+				self.saveTimer = eTimer()
+				self.saveTimer.callback.append(self.writeSettings)
+			self.savePending = True
+			self.saveTimer.start(0, True)
+
+	def writeSettings(self, snapshot=False):
+		if self.savePending:
+			self.savePending = False
+			self.saveTimer.stop()
+		if not dirtyElements:
+			self.saveSkipped += 1
+			if snapshot:
+				self.updateSnapshot()
+			return
+		dirtyElements.clear()
+		self.saveWrites += 1
 		config.saveToFile(self.CONFIG_FILE)
+		try:
+			self.writtenKey = self.getSnapshotKey()
+		except OSError:
+			self.writtenKey = None
+		if snapshot:
+			self.updateSnapshot()
+
+	# Write the snapshot from the settings in memory, without reading the
+	# settings file back.  This is only done while the file is the one which was
+	# last written from memory.
+	#
+	def updateSnapshot(self):
+		try:
+			key = self.getSnapshotKey()
+		except OSError:
+			return
+		if key == self.writtenKey and key != self.snapshotKey:
+			self.saveSnapshot(config.parseLines(config.pickle().splitlines()))
+
+	def getStatistics(self):
+		return {"requests": self.saveRequests, "coalesced": self.saveCoalesced, "skipped": self.saveSkipped, "writes": self.saveWrites, "dirty": len(dirtyElements)}
 
-	def __resolveValue(self, pickles, cmap):
-		key = pickles[0]
-		if key in cmap:
-			return self.__resolveValue(pickles[1:], cmap[key].dict()) if len(pickles) > 1 else str(cmap[key].value)
+	def getSnapshotKey(self):
+		status = stat(self.CONFIG_FILE)
+		return [SNAPSHOT_VERSION, status.st_mtime_ns, status.st_size]
+
+	def loadSnapshot(self):
+		try:
+			key = self.getSnapshotKey()
+			with open(self.SNAPSHOT_FILE, "rb") as fd:
+				data = loads(fd.read())
+			if data[0] == key:
+				self.snapshotKey = key
+				return data[1]
+		except (OSError, EOFError, ValueError, TypeError, IndexError):
+			pass
 		return None
 
+	def saveSnapshot(self, tree):
+		try:
+			key = self.getSnapshotKey()
+			subtrees = dict((name, dumps(value) if isinstance(value, dict) else value) for name, value in tree.items())
+			with open(f"{self.SNAPSHOT_FILE}.writing", "wb") as fd:
+				fd.write(dumps((key, subtrees)))
+			rename(f"{self.SNAPSHOT_FILE}.writing", self.SNAPSHOT_FILE)
+			self.snapshotKey = key
+		except (OSError, ValueError) as err:
+			print(f"[Config] Error: Unable to write the settings snapshot '{self.SNAPSHOT_FILE}'!  ({err})")
+
 	# If silent is True don't display an error on a missing key just return None
 	# to indicate this fact to the calling code.
 	#
 	def getResolvedKey(self, key, silent=False):
-		names = key.split(".")
-		if len(names) > 1:
-			if names[0] == "config":
-				val = self.__resolveValue(names[1:], config.content.items)
-				if val and len(val) or val == "":
-					return val
+		configEntry = config.resolveKey(key) if "." in key else None
+		if isinstance(configEntry, ConfigElement):
+			return str(configEntry.value)
 		if silent:
 			return None
 		print(f"[Config] Error: getResolvedKey '{key}' failed!  (Typo?)")
@@ -1,5 +1,5 @@
 from os import remove
-from Components.Task import Task, Job, DiskspacePrecondition, Condition, ToolExistsPrecondition
+from Components.Task import RESOURCE_CPU, Task, Job, DiskspacePrecondition, Condition, ToolExistsPrecondition
 from Components.Harddisk import harddiskmanager
 from Screens.MessageBox import MessageBox
 
@@ -269,19 +269,18 @@ class DVDAuthorTask(Task):
 		self.CWD = self.job.workspace
 		self.args += ["-x", self.job.workspace + "/dvdauthor.xml"]
 		self.menupreview = job.menupreview
+		self.addOutputPattern(r"^STAT: VOBU.*?(\d+)MB", self.muxProgress)
+
+	def muxProgress(self, match):
+		progress = int(match.group(1))
+		if progress:
+			self.job.mplextask.progress = progress
+			print("[DVDBurn] DVDAuthorTask update mplextask progress:", self.job.mplextask.progress, "of", self.job.mplextask.end)
 
 	def processOutputLine(self, line):
 		print("[DVDBurn] DVDAuthorTask ", line[:-1])
 		if not self.menupreview and line.startswith("STAT: Processing"):
 			self.callback(self, [], stay_resident=True)
-		elif line.startswith("STAT: VOBU"):
-			try:
-				progress = int(line.split("MB")[0].split(" ")[-1])
-				if progress:
-					self.job.mplextask.progress = progress
-					print("[DVDBurn] DVDAuthorTask update mplextask progress:", self.job.mplextask.progress, "of", self.job.mplextask.end)
-			except Exception:
-				print("[DVDBurn] couldn't set mux progress")
 
 
 class DVDAuthorFinalTask(Task):
@@ -336,17 +335,19 @@ class BurnTask(Task):
 		self.postconditions.append(BurnTaskPostcondition())
 		self.setTool(tool)
 		self.args += extra_args
+		self.addOutputPattern(r"^\s*(\d+\.\d+)% done, ", self.burnProgress)
 
 	def prepare(self):
 		self.error = None
 
+	def burnProgress(self, match):
+		self.progress = float(match.group(1))
+		print("[DVDBurn] progress:", self.progress)
+
 	def processOutputLine(self, line):
 		line = line[:-1]
 		print("[DVDBurn] GROWISOFS %s" % line)
-		if line[8:14] == "done, ":
-			self.progress = float(line[:6])
-			print("[DVDBurn] progress:", self.progress)
-		elif line.find("flushing cache") != -1:
+		if line.find("flushing cache") != -1:
 			self.progress = 100
 		elif line.find("closing disc") != -1:
 			self.progress = 110
@@ -895,6 +896,7 @@ def getISOfilename(isopath, volName):
 class DVDJob(Job):
 	def __init__(self, project, menupreview=False):
 		Job.__init__(self, "DVDBurn Job")
+		self.addResource(RESOURCE_CPU)
 		self.project = project
 		from time import strftime
 		from Tools.Directories import SCOPE_HDD, resolveFilename, createDir
@@ -958,6 +960,7 @@ class DVDJob(Job):
 class DVDdataJob(Job):
 	def __init__(self, project):
 		Job.__init__(self, "Data DVD Burn")
+		self.addResource(RESOURCE_CPU)
 		self.project = project
 		from time import strftime
 		from Tools.Directories import SCOPE_HDD, resolveFilename, createDir
@@ -1005,6 +1008,7 @@ class DVDdataJob(Job):
 class DVDisoJob(Job):
 	def __init__(self, project, imagepath):
 		Job.__init__(self, _("Burn DVD"))
+		self.addResource(RESOURCE_CPU)
 		self.project = project
 		self.menupreview = False
 		from Tools.Directories import getSize
@@ -38,6 +38,9 @@ from Plugins.Plugin import PluginDescriptor
 from Tools.BoundFunction import boundFunction
 
 MAX_TIMELINES = 6
+# the EPG cache has no change counter, so fetched time windows are only
+# reused for this many seconds
+EPG_WINDOW_LIFETIME = 60
 
 config.misc.graph_mepg = ConfigSubsection()
 config.misc.graph_mepg.prev_time = ConfigClock(default=time())
@@ -119,6 +122,12 @@ class EPGList(GUIComponent):
 		self.time_base = None
 		self.time_epoch = time_epoch
 		self.list = None
+		self.eventWindows = {}  # (time_base, time_epoch): (fetch time, {service: (service, service_name, events)})
+		self.rowCache = {}  # (service, time_base, time_epoch, selected): (state, events, entry)
+		self.prefetchQueue = []
+		self.prefetchTimeBase = None
+		self.prefetchTimer = eTimer()
+		self.prefetchTimer.callback.append(self.prefetchNext)
 		self.select_rect = None
 		self.event_rect = None
 		self.service_rect = None
@@ -287,6 +296,7 @@ class EPGList(GUIComponent):
 		self.showServiceTitle = "servicename" in value
 		self.showPicon = "picon" in value
 		self.showChannelNumber = "number" in value
+		self.rowCache = {}
 		self.recalcEntrySize()
 		self.selEntry(0)  # Select entry again so that the clipping region gets updated if needed
 
@@ -393,8 +403,14 @@ class EPGList(GUIComponent):
 
 	GUI_WIDGET = eListbox
 
+	def getItemsPerPage(self):
+		if listscreen:
+			return config.misc.graph_mepg.items_per_page_listscreen.getValue()
+		return config.misc.graph_mepg.items_per_page.getValue()
+
 	def setItemsPerPage(self):
 		global listscreen
+		self.rowCache = {}
 		if self.listHeight > 0:
 			if listscreen:
 				itemHeight = self.listHeight // config.misc.graph_mepg.items_per_page_listscreen.getValue()
@@ -441,6 +457,10 @@ class EPGList(GUIComponent):
 	def preWidgetRemove(self, instance):
 		instance.selectionChanged.get().remove(self.serviceChanged)
 		instance.setContent(None)
+		self.prefetchTimer.stop()
+		self.prefetchQueue = []
+		self.eventWindows = {}
+		self.rowCache = {}
 
 	def recalcEntrySize(self):
 		esize = self.l.getItemSize()
@@ -475,14 +495,31 @@ class EPGList(GUIComponent):
 		xpos, width = self.calcEntryPosAndWidthHelper(ev_start, ev_duration, time_base, time_base + time_epoch * 60, event_rect.width())
 		return xpos + event_rect.left(), width
 
+	def getRowState(self):
+		# everything besides the events which changes how a row looks
+		r1 = self.service_rect
+		r2 = self.event_rect
+		return (self.currentlyPlaying and self.currentlyPlaying.toString(), self.timer.getServiceTimerIndexKey(), int(time()) // 60, r1.w, r1.h, r2.x, r2.w, r2.h)
+
 	def buildEntry(self, service, service_name, events, picon, serviceref):
+		# rows are only rebuilt when the events, the selection or the state changed
+		selected = self.cur_service[0] == service
+		key = (service, self.time_base + self.offs * self.time_epoch * 60, self.time_epoch, selected)
+		state = (self.getRowState(), selected and self.select_rect and self.select_rect.x, picon)
+		cached = self.rowCache.get(key)
+		if cached is not None and cached[0] == state and cached[1] is events:
+			return cached[2]
+		res = self.createEntry(service, service_name, events, picon, serviceref, selected)
+		self.rowCache[key] = (state, events, res)
+		return res
+
+	def createEntry(self, service, service_name, events, picon, serviceref, selected):
 		r1 = self.service_rect
 		r2 = self.event_rect
 		left = r2.left()
 		top = r2.top()
 		width = r2.width()
 		height = r2.height()
-		selected = self.cur_service[0] == service
 
 		# Picon and Service name
 		if CompareWithAlternatives(service, self.currentlyPlaying and self.currentlyPlaying.toString()):
@@ -800,48 +837,96 @@ class EPGList(GUIComponent):
 		self.selectionChanged()
 		return False
 
+	def expireEventWindows(self, time_base):
+		# only the shown time window and its neighbours are kept
+		step = self.time_epoch * 60
+		now = time()
+		for key in [key for key, window in self.eventWindows.items() if key[1] != self.time_epoch or abs(key[0] - time_base) > step or window[0] + EPG_WINDOW_LIFETIME < now]:
+			del self.eventWindows[key]
+		for key in [key for key in self.rowCache if (key[1], key[2]) not in self.eventWindows]:
+			del self.rowCache[key]
+
+	def getEventWindow(self, time_base):
+		window = self.eventWindows.get((time_base, self.time_epoch))
+		if window is None:
+			window = self.eventWindows[(time_base, self.time_epoch)] = (time(), {})
+		return window[1]
+
+	def lookupEventWindow(self, window, refs, time_base):
+		refs = list(dict.fromkeys(refs))  # the same service twice in a row would be returned as one
+		test = [(ref, 0, time_base, self.time_epoch) for ref in refs]
+		test.insert(0, 'XRnITBD')  # return record, service ref, service name, event id, event title, begin time, duration
+		epg_data = [] if self.epgcache is None else self.epgcache.lookupEvent(test)
+		services = []
+		service = None
+		for x in epg_data:
+			if not services or service != x[0]:
+				service = x[0]
+				tmp_list = []
+				services.append((service, x[1], tmp_list))
+			tmp_list.append((x[2], x[3], x[4], x[5]))  # (event_id, event_title, begin_time, duration)
+		# the events are returned in the order of the requested services
+		for ref, (service, sname, tmp_list) in zip(refs, services):
+			window[ref] = (service, sname, tmp_list[0][0] is not None and tmp_list or None)
+
+	def startPrefetch(self, time_base):
+		self.prefetchQueue = None
+		self.prefetchTimeBase = time_base
+		self.prefetchTimer.start(10, True)
+
+	def prefetchNext(self):
+		# the neighbouring time windows are read while the list is idle, first
+		# for the services of the shown page and the pages around it
+		if self.prefetchQueue is None:
+			refs = [service[0] for service in self.list]
+			page = self.getItemsPerPage()
+			first = max(0, self.l.getCurrentSelectionIndex() - 2 * page)
+			last = first + 4 * page
+			step = self.time_epoch * 60
+			self.prefetchQueue = []
+			for services in (refs[first:last], refs[:first] + refs[last:]):
+				if services:
+					self.prefetchQueue += [(self.prefetchTimeBase + step, services), (self.prefetchTimeBase - step, services)]
+		while self.prefetchQueue:
+			time_base, refs = self.prefetchQueue.pop(0)
+			window = self.getEventWindow(time_base)
+			missing = [ref for ref in refs if ref not in window]
+			if missing:
+				self.lookupEventWindow(window, missing, time_base)
+				if self.prefetchQueue:
+					self.prefetchTimer.start(10, True)
+				return
+
 	def fillMultiEPG(self, services, stime=None):
 		if stime is not None:
 			self.time_base = int(stime)
 		if services is None:
 			time_base = self.time_base + self.offs * self.time_epoch * 60
-			test = [(service[0], 0, time_base, self.time_epoch) for service in self.list]
-			serviceList = self.list
-			piconIdx = 3
-			channelIdx = 4
+			refs = [service[0] for service in self.list]
+			picons = [service[3] for service in self.list]
+			serviceList = [service[4] for service in self.list]
 		else:
 			self.cur_event = None
 			self.cur_service = None
-			test = [(service.ref.toString(), 0, self.time_base, self.time_epoch) for service in services]
+			time_base = self.time_base
+			refs = [service.ref.toString() for service in services]
+			picons = [None] * len(refs)
 			serviceList = services
-			piconIdx = 0
-			channelIdx = None
 
-		test.insert(0, 'XRnITBD')  # return record, service ref, service name, event id, event title, begin time, duration
-		epg_data = [] if self.epgcache is None else self.epgcache.lookupEvent(test)
+		self.expireEventWindows(time_base)
+		window = self.getEventWindow(time_base)
+		missing = [ref for ref in refs if ref not in window]
+		if missing:
+			self.lookupEventWindow(window, missing, time_base)
 		self.list = []
-		tmp_list = None
-		service = ""
-		sname = ""
-
-		serviceIdx = 0
-		for x in epg_data:
-			if service != x[0]:
-				if tmp_list is not None:
-					picon = None if piconIdx == 0 else serviceList[serviceIdx][piconIdx]
-					self.list.append((service, sname, tmp_list[0][0] is not None and tmp_list or None, picon, serviceList[serviceIdx] if (channelIdx is None) else serviceList[serviceIdx][channelIdx]))
-					serviceIdx += 1
-				service = x[0]
-				sname = x[1]
-				tmp_list = []
-			tmp_list.append((x[2], x[3], x[4], x[5]))  # (event_id, event_title, begin_time, duration)
-		if tmp_list and len(tmp_list):
-			picon = None if piconIdx == 0 else serviceList[serviceIdx][piconIdx]
-			self.list.append((service, sname, tmp_list[0][0] is not None and tmp_list or None, picon, serviceList[serviceIdx] if (channelIdx is None) else serviceList[serviceIdx][channelIdx]))
-			serviceIdx += 1
+		for ref, picon, serviceref in zip(refs, picons, serviceList):
+			entry = window.get(ref)
+			if entry is not None:
+				self.list.append((entry[0], entry[1], entry[2], picon, serviceref))
 
 		self.l.setList(self.list)
 		self.findBestEvent()
+		self.startPrefetch(time_base)
 
 	def getEventRect(self):
 		rc = self.event_rect
@@ -58,7 +58,7 @@ class BackupScreen(ConfigListScreen, Screen):
 			self.onShown.append(self.doBackup)
 
 	def doBackup(self):
-		configfile.save()
+		configfile.save(immediate=True)
 		if config.plugins.softwaremanager.epgcache.value:
 			eEPGCache.getInstance().save()
 		try:
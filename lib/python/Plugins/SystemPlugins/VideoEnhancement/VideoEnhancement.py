@@ -31,7 +31,7 @@ class VideoEnhancement:
 					self.setConfiguredValues()
 
 			config.pep.contrast = ConfigSlider(default=128, limits=(0, 255))
-			config.pep.contrast.addNotifier(setContrast)
+			config.pep.contrast.addNotifier(setContrast, coalesce=100)
 		else:
 			config.pep.contrast = NoSave(ConfigNothing())
 
@@ -48,7 +48,7 @@ class VideoEnhancement:
 					self.setConfiguredValues()
 
 			config.pep.saturation = ConfigSlider(default=128, limits=(0, 255))
-			config.pep.saturation.addNotifier(setSaturation)
+			config.pep.saturation.addNotifier(setSaturation, coalesce=100)
 		else:
 			config.pep.saturation = NoSave(ConfigNothing())
 
@@ -66,7 +66,7 @@ class VideoEnhancement:
 					self.setConfiguredValues()
 
 			config.pep.hue = ConfigSlider(default=128, limits=(0, 255))
-			config.pep.hue.addNotifier(setHue)
+			config.pep.hue.addNotifier(setHue, coalesce=100)
 		else:
 			config.pep.hue = NoSave(ConfigNothing())
 
@@ -83,7 +83,7 @@ class VideoEnhancement:
 				if not VideoEnhancement.firstRun:
 					self.setConfiguredValues()
 			config.pep.brightness = ConfigSlider(default=128, limits=(0, 255))
-			config.pep.brightness.addNotifier(setBrightness)
+			config.pep.brightness.addNotifier(setBrightness, coalesce=100)
 		else:
 			config.pep.brightness = NoSave(ConfigNothing())
 
@@ -101,7 +101,7 @@ class VideoEnhancement:
 					self.setConfiguredValues()
 
 			config.pep.block_noise_reduction = ConfigSlider(default=0, limits=(0, 5))
-			config.pep.block_noise_reduction.addNotifier(setBlock_noise_reduction)
+			config.pep.block_noise_reduction.addNotifier(setBlock_noise_reduction, coalesce=100)
 		else:
 			config.pep.block_noise_reduction = NoSave(ConfigNothing())
 
@@ -119,7 +119,7 @@ class VideoEnhancement:
 					self.setConfiguredValues()
 
 			config.pep.mosquito_noise_reduction = ConfigSlider(default=0, limits=(0, 5))
-			config.pep.mosquito_noise_reduction.addNotifier(setMosquito_noise_reduction)
+			config.pep.mosquito_noise_reduction.addNotifier(setMosquito_noise_reduction, coalesce=100)
 		else:
 			config.pep.mosquito_noise_reduction = NoSave(ConfigNothing())
 
@@ -137,7 +137,7 @@ class VideoEnhancement:
 					self.setConfiguredValues()
 
 			config.pep.digital_contour_removal = ConfigSlider(default=0, limits=(0, 5))
-			config.pep.digital_contour_removal.addNotifier(setDigital_contour_removal)
+			config.pep.digital_contour_removal.addNotifier(setDigital_contour_removal, coalesce=100)
 		else:
 			config.pep.digital_contour_removal = NoSave(ConfigNothing())
 
@@ -176,7 +176,7 @@ class VideoEnhancement:
 					self.setConfiguredValues()
 
 			config.pep.sharpness = ConfigSlider(default=0, limits=(0, 255))
-			config.pep.sharpness.addNotifier(setSharpness)
+			config.pep.sharpness.addNotifier(setSharpness, coalesce=100)
 		else:
 			config.pep.sharpness = NoSave(ConfigNothing())
 
@@ -194,7 +194,7 @@ class VideoEnhancement:
 					self.setConfiguredValues()
 
 			config.pep.auto_flesh = ConfigSlider(default=0, limits=(0, 4))
-			config.pep.auto_flesh.addNotifier(setAutoflesh)
+			config.pep.auto_flesh.addNotifier(setAutoflesh, coalesce=100)
 		else:
 			config.pep.auto_flesh = NoSave(ConfigNothing())
 
@@ -212,7 +212,7 @@ class VideoEnhancement:
 					self.setConfiguredValues()
 
 			config.pep.green_boost = ConfigSlider(default=0, limits=(0, 4))
-			config.pep.green_boost.addNotifier(setGreenboost)
+			config.pep.green_boost.addNotifier(setGreenboost, coalesce=100)
 		else:
 			config.pep.green_boost = NoSave(ConfigNothing())
 
@@ -230,7 +230,7 @@ class VideoEnhancement:
 					self.setConfiguredValues()
 
 			config.pep.blue_boost = ConfigSlider(default=0, limits=(0, 4))
-			config.pep.blue_boost.addNotifier(setBlueboost)
+			config.pep.blue_boost.addNotifier(setBlueboost, coalesce=100)
 		else:
 			config.pep.blue_boost = NoSave(ConfigNothing())
 
@@ -248,7 +248,7 @@ class VideoEnhancement:
 					self.setConfiguredValues()
 
 			config.pep.dynamic_contrast = ConfigSlider(default=0, limits=(0, 255))
-			config.pep.dynamic_contrast.addNotifier(setDynamic_contrast)
+			config.pep.dynamic_contrast.addNotifier(setDynamic_contrast, coalesce=100)
 		else:
 			config.pep.dynamic_contrast = NoSave(ConfigNothing())
 
@@ -269,7 +269,7 @@ class VideoEnhancement:
 						self.setConfiguredValues()
 
 				config.av.scaler_sharpness = ConfigSlider(default=13, limits=(0, 26))
-				config.av.scaler_sharpness.addNotifier(setScaler_sharpness)
+				config.av.scaler_sharpness.addNotifier(setScaler_sharpness, coalesce=100)
 			else:
 				config.av.scaler_sharpness = NoSave(ConfigNothing())
 
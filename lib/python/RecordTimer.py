@@ -1,10 +1,12 @@
 # -*- coding: utf-8 -*-
 import os
-from enigma import eEPGCache, getBestPlayableServiceReference, eStreamServer, eServiceReference, iRecordableService, quitMainloop, eActionMap, setPreferredTuner
+from json import dumps, loads
+from enigma import eEPGCache, eTimer, getBestPlayableServiceReference, eStreamServer, eServiceReference, iRecordableService, quitMainloop, eActionMap, setPreferredTuner
 
 from Components.config import config
 from Components.UsageConfig import defaultMoviePath
 from Components.SystemInfo import BoxInfo
+from Components.TimerIndex import ServiceTimerIndex, TimerIntervalIndex, localDayMinute, timerDayMinute
 from Components.TimerSanityCheck import TimerSanityCheck
 
 from Screens.MessageBox import MessageBox
@@ -29,6 +31,10 @@ from time import localtime, strftime, ctime, time
 from bisect import insort
 from sys import maxsize
 
+# timer changes are appended to timers.xml.journal, after this many entries
+# the journal is compacted into a new timers.xml
+JOURNAL_LIMIT = 100
+
 # ok, for descriptions etc we have:
 # service reference  (to get the service name)
 # name               (title)
@@ -225,6 +231,7 @@ class RecordTimerEntry(timer.TimerEntry):
 		self.ts_dialog = None
 		self.log_entries = []
 		self.flags = set()
+		self.save_id = None
 		self.resetState()
 
 	def __repr__(self):
@@ -626,7 +633,7 @@ class RecordTimerEntry(timer.TimerEntry):
 
 		dummyentry = RecordTimerEntry(self.service_ref, self.begin, new_end, self.name, self.description, self.eit, disabled=True, justplay=self.justplay, afterEvent=self.afterEvent, dirname=self.dirname, tags=self.tags)
 		dummyentry.disabled = self.disabled
-		timersanitycheck = TimerSanityCheck(NavigationInstance.instance.RecordTimer.timer_list, dummyentry)
+		timersanitycheck = TimerSanityCheck(NavigationInstance.instance.RecordTimer.timer_list, dummyentry, NavigationInstance.instance.RecordTimer.timer_index)
 		if not timersanitycheck.check():
 			simulTimerList = timersanitycheck.getSimulTimerList()
 			if simulTimerList is not None and len(simulTimerList) > 1:
@@ -877,7 +884,16 @@ class RecordTimer(timer.Timer):
 		timer.Timer.__init__(self)
 
 		self.Filename = resolveFilename(SCOPE_CONFIG, "timers.xml")
+		self.JournalFilename = self.Filename + ".journal"
+		self.saved_timers = {}
+		self.next_save_id = 0
+		self.journal_entries = 0
+		self.saveTimerDelay = eTimer()
+		self.saveTimerDelay.callback.append(self.flushTimers)
 		self.fallback_timer_list = []
+		self.timer_index = TimerIntervalIndex()
+		self.service_timer_index = {}
+		self.service_timer_index_generation = 0
 
 		try:
 			self.loadTimer()
@@ -904,11 +920,13 @@ class RecordTimer(timer.Timer):
 				w.state += 1
 
 		self.timer_list.remove(w)
+		self.dequeueActivation(w)
 
 		# did this timer reached the last state?
 		if w.state < RecordTimerEntry.StateEnded:
 			# no, sort it into active list
 			insort(self.timer_list, w)
+			self.queueActivation(w)
 		else:
 			# yes. Process repeated, and re-add.
 			if w.repeated:
@@ -916,6 +934,7 @@ class RecordTimer(timer.Timer):
 				w.state = RecordTimerEntry.StateWaiting
 				w.first_try_prepare = True
 				self.addTimerEntry(w)
+				self.timer_index.update(w)
 			else:
 				# correct wrong running timers
 				self.checkWrongRunningTimers()
@@ -928,6 +947,7 @@ class RecordTimer(timer.Timer):
 					insort(self.processed_timers, w)
 					self.saveTimer()
 
+		self.invalidateServiceTimerIndex()
 		self.stateChanged(w)
 
 	def checkWrongRunningTimers(self):
@@ -938,6 +958,10 @@ class RecordTimer(timer.Timer):
 				timer.state = RecordTimerEntry.StateWaiting
 				self.timeChanged(timer)
 
+	def addTimerEntry(self, entry, noRecalc=0):
+		timer.Timer.addTimerEntry(self, entry, noRecalc)
+		self.invalidateServiceTimerIndex()
+
 	def isRecording(self):
 		for timer in self.timer_list:
 			if timer.isRunning() and not timer.justplay:
@@ -963,10 +987,14 @@ class RecordTimer(timer.Timer):
 
 		root = doc.getroot()
 
+		elements = dict(enumerate(root.findall("timer")))
+		replayed = self.replayJournal(elements)
+
 		checkit = False
 		timer_text = ""
-		for timer in root.findall("timer"):
+		for save_id, timer in elements.items():
 			newTimer = createTimer(timer)
+			newTimer.save_id = save_id
 			conflict_list = self.record(newTimer, ignoreTSC=True, dosave=False, loadtimer=True)
 			if conflict_list:
 				checkit = True
@@ -975,110 +1003,158 @@ class RecordTimer(timer.Timer):
 		if checkit:
 			AddPopup(_("Timer overlap in timers.xml detected!\nPlease recheck it!") + timer_text, type=MessageBox.TYPE_ERROR, timeout=0, id="TimerLoadFailed")
 
-	def saveTimer(self):
-		# root_element = xml.etree.ElementTree.Element('timers')
-		# root_element.text = "\n"
+		self.next_save_id = max(elements, default=-1) + 1
+		self.saved_timers = dict(self.getSaveTimers())
+		if replayed:
+			# the last session did not shut down cleanly, fold its changes into timers.xml
+			self.flushTimers(compact=True)
 
-		# for timer in self.timer_list + self.processed_timers:
-			# some timers (instant records) don't want to be saved.
-			# skip them
-			# if timer.dontSave:
-				#continue
-			# t = xml.etree.ElementTree.SubElement(root_element, 'timers')
-			# t.set("begin", str(int(timer.begin)))
-			# t.set("end", str(int(timer.end)))
-			# t.set("serviceref", str(timer.service_ref))
-			# t.set("repeated", str(timer.repeated))
-			# t.set("name", timer.name)
-			# t.set("description", timer.description)
-			# t.set("afterevent", str({
-			#	AFTEREVENT.NONE: "nothing",
-			#	AFTEREVENT.STANDBY: "standby",
-			#	AFTEREVENT.DEEPSTANDBY: "deepstandby",
-			#	AFTEREVENT.AUTO: "auto"}))
-			# if timer.eit is not None:
-			#	t.set("eit", str(timer.eit))
-			# if timer.dirname is not None:
-			#	t.set("location", str(timer.dirname))
-			# t.set("disabled", str(int(timer.disabled)))
-			# t.set("justplay", str(int(timer.justplay)))
-			# t.text = "\n"
-			# t.tail = "\n"
-
-			#for time, code, msg in timer.log_entries:
-				#l = xml.etree.ElementTree.SubElement(t, 'log')
-				#l.set("time", str(time))
-				#l.set("code", str(code))
-				#l.text = str(msg)
-				#l.tail = "\n"
-
-		#doc = xml.etree.ElementTree.ElementTree(root_element)
-		#doc.write(self.Filename)
+	def replayJournal(self, elements):
+		# applies the changes in timers.xml.journal to the timer elements of timers.xml.
+		# a journal written for another timers.xml (or an incomplete last line) is ignored.
+		try:
+			with open(self.JournalFilename, "r") as fd:
+				lines = fd.readlines()
+		except IOError:
+			return 0
+		replayed = 0
+		try:
+			st = os.stat(self.Filename)
+			if not lines or loads(lines[0]).get("snapshot") != [st.st_mtime_ns, st.st_size]:
+				print("[RecordTimer] ignoring outdated timer journal")
+				lines = []
+		except (OSError, ValueError, AttributeError):
+			lines = []
+		for line in lines[1:]:
+			try:
+				entry = loads(line)
+				if entry[0] == "set":
+					elements[entry[1]] = xml.etree.ElementTree.fromstring(entry[2])
+				elif entry[0] == "del":
+					elements.pop(entry[1], None)
+			except (ValueError, IndexError, SyntaxError):
+				print("[RecordTimer] timer journal is truncated, ignoring the rest")
+				break
+			replayed += 1
+		if not replayed:
+			try:
+				os.remove(self.JournalFilename)
+			except OSError:
+				pass
+		print("[RecordTimer] replayed %d timer journal entries" % replayed)
+		return replayed
 
+	def timerToXML(self, timer):
 		list = []
-
-		list.append('<?xml version="1.0" ?>\n')
-		list.append('<timers>\n')
-
+		list.append('<timer')
+		list.append(' begin="' + str(int(timer.begin)) + '"')
+		list.append(' end="' + str(int(timer.end)) + '"')
+		list.append(' serviceref="' + stringToXML(str(timer.service_ref)) + '"')
+		list.append(' repeated="' + str(int(timer.repeated)) + '"')
+		list.append(' name="' + str(stringToXML(timer.name)) + '"')
+		list.append(' description="' + str(stringToXML(timer.description)) + '"')
+		list.append(' afterevent="' + str(stringToXML({
+			AFTEREVENT.NONE: "nothing",
+			AFTEREVENT.STANDBY: "standby",
+			AFTEREVENT.DEEPSTANDBY: "deepstandby",
+			AFTEREVENT.AUTO: "auto"
+			}[timer.afterEvent])) + '"')
+		if timer.eit is not None:
+			list.append(' eit="' + str(timer.eit) + '"')
+		if timer.dirname:
+			list.append(' location="' + str(stringToXML(timer.dirname)) + '"')
+		if timer.tags:
+			list.append(' tags="' + str(stringToXML(' '.join(timer.tags))) + '"')
+		if timer.disabled:
+			list.append(' disabled="' + str(int(timer.disabled)) + '"')
+		list.append(' justplay="' + str(int(timer.justplay)) + '"')
+		list.append(' always_zap="' + str(int(timer.always_zap)) + '"')
+		list.append(' pipzap="' + str(int(timer.pipzap)) + '"')
+		list.append(' zap_wakeup="' + str(timer.zap_wakeup) + '"')
+		list.append(' rename_repeat="' + str(int(timer.rename_repeat)) + '"')
+		list.append(' conflict_detection="' + str(int(timer.conflict_detection)) + '"')
+		list.append(' descramble="' + str(int(timer.descramble)) + '"')
+		list.append(' record_ecm="' + str(int(timer.record_ecm)) + '"')
+		if timer.flags:
+			list.append(' flags="' + ' '.join([stringToXML(x) for x in timer.flags]) + '"')
+		list.append('>\n')
+
+		if config.recording.debug.value:
+			for time, code, msg in timer.log_entries:
+				list.append('<log')
+				list.append(' code="' + str(code) + '"')
+				list.append(' time="' + str(time) + '"')
+				list.append('>')
+				list.append(str(stringToXML(msg)))
+				list.append('</log>\n')
+
+		list.append('</timer>\n')
+		return ''.join(list)
+
+	def getSaveTimers(self):
+		# returns (save_id, xml) of all timers which have to be saved
 		for timer in self.timer_list + self.processed_timers:
+			# some timers (instant records) don't want to be saved.
 			if timer.dontSave:
 				continue
+			if timer.save_id is None:
+				timer.save_id = self.next_save_id
+				self.next_save_id += 1
+			yield timer.save_id, self.timerToXML(timer)
 
-			list.append('<timer')
-			list.append(' begin="' + str(int(timer.begin)) + '"')
-			list.append(' end="' + str(int(timer.end)) + '"')
-			list.append(' serviceref="' + stringToXML(str(timer.service_ref)) + '"')
-			list.append(' repeated="' + str(int(timer.repeated)) + '"')
-			list.append(' name="' + str(stringToXML(timer.name)) + '"')
-			list.append(' description="' + str(stringToXML(timer.description)) + '"')
-			list.append(' afterevent="' + str(stringToXML({
-				AFTEREVENT.NONE: "nothing",
-				AFTEREVENT.STANDBY: "standby",
-				AFTEREVENT.DEEPSTANDBY: "deepstandby",
-				AFTEREVENT.AUTO: "auto"
-				}[timer.afterEvent])) + '"')
-			if timer.eit is not None:
-				list.append(' eit="' + str(timer.eit) + '"')
-			if timer.dirname:
-				list.append(' location="' + str(stringToXML(timer.dirname)) + '"')
-			if timer.tags:
-				list.append(' tags="' + str(stringToXML(' '.join(timer.tags))) + '"')
-			if timer.disabled:
-				list.append(' disabled="' + str(int(timer.disabled)) + '"')
-			list.append(' justplay="' + str(int(timer.justplay)) + '"')
-			list.append(' always_zap="' + str(int(timer.always_zap)) + '"')
-			list.append(' pipzap="' + str(int(timer.pipzap)) + '"')
-			list.append(' zap_wakeup="' + str(timer.zap_wakeup) + '"')
-			list.append(' rename_repeat="' + str(int(timer.rename_repeat)) + '"')
-			list.append(' conflict_detection="' + str(int(timer.conflict_detection)) + '"')
-			list.append(' descramble="' + str(int(timer.descramble)) + '"')
-			list.append(' record_ecm="' + str(int(timer.record_ecm)) + '"')
-			if timer.flags:
-				list.append(' flags="' + ' '.join([stringToXML(x) for x in timer.flags]) + '"')
-			list.append('>\n')
-
-			if config.recording.debug.value:
-				for time, code, msg in timer.log_entries:
-					list.append('<log')
-					list.append(' code="' + str(code) + '"')
-					list.append(' time="' + str(time) + '"')
-					list.append('>')
-					list.append(str(stringToXML(msg)))
-					list.append('</log>\n')
-
-			list.append('</timer>\n')
-
-		list.append('</timers>\n')
+	def saveTimer(self):
+		# changes are written once per mainloop iteration, however often they are saved
+		self.saveTimerDelay.start(0, True)
+
+	def flushTimers(self, compact=False):
+		self.saveTimerDelay.stop()
+		timers = dict(self.getSaveTimers())
+		changes = [("set", save_id, text) for save_id, text in timers.items() if self.saved_timers.get(save_id) != text]
+		changes.extend([("del", save_id) for save_id in self.saved_timers if save_id not in timers])
+		if not changes and not compact:
+			return
+		if compact or self.journal_entries + len(changes) > JOURNAL_LIMIT or not os.path.exists(self.Filename):
+			self.writeTimerFile(timers)
+		else:
+			self.writeJournal(changes)
+			self.saved_timers = timers
 
+	def writeTimerFile(self, timers):
 		file = open(self.Filename + ".writing", "w")
-		for x in list:
-			file.write(x)
+		file.write('<?xml version="1.0" ?>\n')
+		file.write('<timers>\n')
+		for text in timers.values():
+			file.write(text)
+		file.write('</timers>\n')
 		file.flush()
-
-		import os
 		os.fsync(file.fileno())
 		file.close()
 		os.rename(self.Filename + ".writing", self.Filename)
+		try:
+			os.remove(self.JournalFilename)
+		except OSError:
+			pass
+		self.journal_entries = 0
+		# the ids in the journal refer to the position of the timers in timers.xml
+		save_ids = dict((save_id, pos) for pos, save_id in enumerate(timers))
+		for timer in self.timer_list + self.processed_timers:
+			timer.save_id = save_ids.get(timer.save_id)
+		self.saved_timers = dict((save_ids[save_id], text) for save_id, text in timers.items())
+		self.next_save_id = len(save_ids)
+
+	def writeJournal(self, changes):
+		list = []
+		if not self.journal_entries:
+			st = os.stat(self.Filename)
+			list.append(dumps({"snapshot": [st.st_mtime_ns, st.st_size]}) + "\n")
+		for change in changes:
+			list.append(dumps(change) + "\n")
+		file = open(self.JournalFilename, "a" if self.journal_entries else "w")
+		file.write(''.join(list))
+		file.flush()
+		os.fsync(file.fileno())
+		file.close()
+		self.journal_entries += len(changes)
 
 	def getNextZapTime(self, isWakeup=False):
 		now = time()
@@ -1120,7 +1196,7 @@ class RecordTimer(timer.Timer):
 
 	def record(self, entry, ignoreTSC=False, dosave=True, loadtimer=False):
 		check_timer_list = self.timer_list[:]
-		timersanitycheck = TimerSanityCheck(check_timer_list, entry)
+		timersanitycheck = TimerSanityCheck(check_timer_list, entry, self.timer_index)
 		answer = None
 		if not timersanitycheck.check():
 			if not ignoreTSC:
@@ -1146,7 +1222,11 @@ class RecordTimer(timer.Timer):
 		entry.timeChanged()
 		print("[[RecordTimer]] Record " + str(entry))
 		entry.Timer = self
+		if not loadtimer:
+			# ids of removed timers may have been given to others by a compaction
+			entry.save_id = None
 		self.addTimerEntry(entry)
+		self.timer_index.add(entry)
 		if dosave:
 			self.saveTimer()
 		return answer
@@ -1165,20 +1245,18 @@ class RecordTimer(timer.Timer):
 				return False
 		if timer.justplay and (timer_end - timer.begin) <= 1:
 			timer_end += 60
-		bt = localtime(begin)
-		bday = bt.tm_wday
-		begin2 = 1440 + bt.tm_hour * 60 + bt.tm_min
+		bday, begin2 = localDayMinute(begin)
+		begin2 += 1440
 		end2 = begin2 + duration // 60
-		xbt = localtime(timer.begin)
-		xet = localtime(timer_end)
+		xminute, xnextday = timerDayMinute(timer)
 		offset_day = False
 		checking_time = timer.begin < begin or begin <= timer.begin <= end
-		if xbt.tm_yday != xet.tm_yday:
+		if xnextday:
 			oday = bday - 1
 			if oday == -1:
 				oday = 6
 			offset_day = timer.repeated & (1 << oday)
-		xbegin = 1440 + xbt.tm_hour * 60 + xbt.tm_min
+		xbegin = 1440 + xminute
 		xend = xbegin + ((timer_end - timer.begin) // 60)
 		if xend < xbegin:
 			xend += 1440
@@ -1253,6 +1331,7 @@ class RecordTimer(timer.Timer):
 
 	def setFallbackTimerList(self, list):
 		self.fallback_timer_list = [timer for timer in list if timer.state != 3]
+		self.invalidateServiceTimerIndex()
 
 	def getAllTimersList(self):
 		return self.timer_list + self.fallback_timer_list
@@ -1260,104 +1339,94 @@ class RecordTimer(timer.Timer):
 	def getDisabledTimers(self):
 		return self.processed_timers # TODO add  fallback processed timers too
 
+	def invalidateServiceTimerIndex(self):
+		self.service_timer_index_generation += 1
+
+	def getServiceTimerIndexKey(self):
+		# changes whenever the timers shown in EPG lists may have changed
+		return (self.service_timer_index_generation, len(self.timer_list), len(self.processed_timers), len(self.fallback_timer_list))
+
+	def getServiceTimerIndex(self, disabledTimers=False):
+		# the index is rebuilt lazily after the timer lists changed, EPG lists
+		# then look up all their events against the same snapshot
+		timersList = self.getDisabledTimers() if disabledTimers else self.getAllTimersList()
+		key = self.getServiceTimerIndexKey()
+		cached = self.service_timer_index.get(disabledTimers)
+		if cached is None or cached[0] != key:
+			cached = self.service_timer_index[disabledTimers] = (key, ServiceTimerIndex(timersList))
+		return cached[1]
+
 	def isInTimer(self, eventid, begin, duration, service, disabledTimers=False):
 		returnValue = None
-		bt = None
+		bday = None
 		check_offset_time = not config.recording.margin_before.value and not config.recording.margin_after.value
 		end = begin + duration
-		refstr = ':'.join(service.split(':')[:11])
-		timersList = self.getAllTimersList()[:] if not disabledTimers else self.getDisabledTimers()[:]
-		for x in timersList:
+		for x in self.getServiceTimerIndex(disabledTimers).getTimers(service, begin, end):
 			if disabledTimers and not x.disabled:
 				continue
-			check = ':'.join(x.service_ref.ref.toString().split(':')[:11]) == refstr
-			if check:
-				time_match = type = type_offset = 0
-				timer_end = x.end
-				timer_begin = x.begin
-				timer_repeat = x.repeated
-
-				if not timer_repeat and check_offset_time:
-					if 0 < end - timer_end <= 59:
-						timer_end = end
-					if 0 < timer_begin - begin <= 59:
-						timer_begin = begin
-				if x.justplay:
-					type_offset = 5
-					if (timer_end - x.begin) <= 1:
-						timer_end += 60
-					if x.pipzap and not timer_repeat:
-						type_offset = 30
-				if x.always_zap:
-					type_offset = 10
-
-				# if set 'don't stop current event but disable coming events' for repeat timer
-				running_only_curevent = x.disabled and x.isRunning() and timer_repeat
-				if running_only_curevent:
-					timer_repeat = 0
-					type_offset += 15
-
-				if timer_repeat != 0:
-					type_offset += 15
-					if bt is None:
-						bt = localtime(begin)
-						bday = bt.tm_wday
-						begin2 = 1440 + bt.tm_hour * 60 + bt.tm_min
-						end2 = begin2 + duration // 60
-					xbt = localtime(x.begin)
-					xet = localtime(timer_end)
-					offset_day = False
-					checking_time = x.begin < begin or begin <= x.begin <= end
-					if xbt.tm_yday != xet.tm_yday:
-						oday = bday - 1
-						if oday == -1:
-							oday = 6
-						offset_day = timer_repeat & (1 << oday)
-					xbegin = 1440 + xbt.tm_hour * 60 + xbt.tm_min
-					xend = xbegin + ((timer_end - x.begin) // 60)
-					if xend < xbegin:
-						xend += 1440
-					if timer_repeat & (1 << bday) and checking_time:
-						if begin2 < xbegin <= end2:
-							if xend < end2:
-								# recording within event
-								time_match = (xend - xbegin) * 60
-								type = type_offset + 3
-							else:
-								# recording last part of event
-								time_match = (end2 - xbegin) * 60
-								type = type_offset + 1
-						elif xbegin <= begin2 <= xend:
-							if xend < end2:
-								# recording first part of event
-								time_match = (xend - begin2) * 60
-								type = type_offset + 4
-							else:
-								# recording whole event
-								time_match = (end2 - begin2) * 60
-								type = type_offset + 2
-						elif offset_day:
-							xbegin -= 1440
-							xend -= 1440
-							if begin2 < xbegin <= end2:
-								if xend < end2:
-									# recording within event
-									time_match = (xend - xbegin) * 60
-									type = type_offset + 3
-								else:
-									# recording last part of event
-									time_match = (end2 - xbegin) * 60
-									type = type_offset + 1
-							elif xbegin <= begin2 <= xend:
-								if xend < end2:
-									# recording first part of event
-									time_match = (xend - begin2) * 60
-									type = type_offset + 4
-								else:
-									# recording whole event
-									time_match = (end2 - begin2) * 60
-									type = type_offset + 2
-					elif offset_day and checking_time:
+			time_match = type = type_offset = 0
+			timer_end = x.end
+			timer_begin = x.begin
+			timer_repeat = x.repeated
+
+			if not timer_repeat and check_offset_time:
+				if 0 < end - timer_end <= 59:
+					timer_end = end
+				if 0 < timer_begin - begin <= 59:
+					timer_begin = begin
+			if x.justplay:
+				type_offset = 5
+				if (timer_end - x.begin) <= 1:
+					timer_end += 60
+				if x.pipzap and not timer_repeat:
+					type_offset = 30
+			if x.always_zap:
+				type_offset = 10
+
+			# if set 'don't stop current event but disable coming events' for repeat timer
+			running_only_curevent = x.disabled and x.isRunning() and timer_repeat
+			if running_only_curevent:
+				timer_repeat = 0
+				type_offset += 15
+
+			if timer_repeat != 0:
+				type_offset += 15
+				if bday is None:
+					bday, begin2 = localDayMinute(begin)
+					begin2 += 1440
+					end2 = begin2 + duration // 60
+				xminute, xnextday = timerDayMinute(x)
+				offset_day = False
+				checking_time = x.begin < begin or begin <= x.begin <= end
+				if xnextday:
+					oday = bday - 1
+					if oday == -1:
+						oday = 6
+					offset_day = timer_repeat & (1 << oday)
+				xbegin = 1440 + xminute
+				xend = xbegin + ((timer_end - x.begin) // 60)
+				if xend < xbegin:
+					xend += 1440
+				if timer_repeat & (1 << bday) and checking_time:
+					if begin2 < xbegin <= end2:
+						if xend < end2:
+							# recording within event
+							time_match = (xend - xbegin) * 60
+							type = type_offset + 3
+						else:
+							# recording last part of event
+							time_match = (end2 - xbegin) * 60
+							type = type_offset + 1
+					elif xbegin <= begin2 <= xend:
+						if xend < end2:
+							# recording first part of event
+							time_match = (xend - begin2) * 60
+							type = type_offset + 4
+						else:
+							# recording whole event
+							time_match = (end2 - begin2) * 60
+							type = type_offset + 2
+					elif offset_day:
 						xbegin -= 1440
 						xend -= 1440
 						if begin2 < xbegin <= end2:
@@ -1378,35 +1447,56 @@ class RecordTimer(timer.Timer):
 								# recording whole event
 								time_match = (end2 - begin2) * 60
 								type = type_offset + 2
-				else:
-					if begin < timer_begin <= end:
-						if timer_end < end:
+				elif offset_day and checking_time:
+					xbegin -= 1440
+					xend -= 1440
+					if begin2 < xbegin <= end2:
+						if xend < end2:
 							# recording within event
-							time_match = timer_end - timer_begin
+							time_match = (xend - xbegin) * 60
 							type = type_offset + 3
 						else:
 							# recording last part of event
-							time_match = end - timer_begin
+							time_match = (end2 - xbegin) * 60
 							type = type_offset + 1
-					elif timer_begin <= begin <= timer_end:
-						if timer_end < end:
+					elif xbegin <= begin2 <= xend:
+						if xend < end2:
 							# recording first part of event
-							time_match = timer_end - begin
+							time_match = (xend - begin2) * 60
 							type = type_offset + 4
 						else:
 							# recording whole event
-							time_match = end - begin
+							time_match = (end2 - begin2) * 60
 							type = type_offset + 2
-				if time_match:
-					if type in (2, 7, 12, 17, 22, 27, 32):
-						# When full recording do not look further
-						returnValue = (time_match, [type])
-						break
-					elif returnValue:
-						if type not in returnValue[1]:
-							returnValue[1].append(type)
+			else:
+				if begin < timer_begin <= end:
+					if timer_end < end:
+						# recording within event
+						time_match = timer_end - timer_begin
+						type = type_offset + 3
+					else:
+						# recording last part of event
+						time_match = end - timer_begin
+						type = type_offset + 1
+				elif timer_begin <= begin <= timer_end:
+					if timer_end < end:
+						# recording first part of event
+						time_match = timer_end - begin
+						type = type_offset + 4
 					else:
-						returnValue = (time_match, [type])
+						# recording whole event
+						time_match = end - begin
+						type = type_offset + 2
+			if time_match:
+				if type in (2, 7, 12, 17, 22, 27, 32):
+					# When full recording do not look further
+					returnValue = (time_match, [type])
+					break
+				elif returnValue:
+					if type not in returnValue[1]:
+						returnValue[1].append(type)
+				else:
+					returnValue = (time_match, [type])
 
 		return returnValue
 
@@ -1435,15 +1525,27 @@ class RecordTimer(timer.Timer):
 		if entry in self.processed_timers:
 			# now the timer should be in the processed_timers list. remove it from there.
 			self.processed_timers.remove(entry)
+		self.timer_index.remove(entry)
+		self.invalidateServiceTimerIndex()
 		self.saveTimer()
 
+	def timeChanged(self, entry):
+		timer.Timer.timeChanged(self, entry)
+		if entry in self.timer_index:
+			self.timer_index.update(entry)
+		self.invalidateServiceTimerIndex()
+
 	def shutdown(self):
-		self.saveTimer()
+		self.flushTimers(compact=True)
 
 	def cleanup(self):
 		timer.Timer.cleanup(self)
+		self.timer_index.retain(self.timer_list + self.processed_timers)
+		self.invalidateServiceTimerIndex()
 		self.saveTimer()
 
 	def cleanupDaily(self, days):
 		timer.Timer.cleanupDaily(self, days)
+		self.timer_index.retain(self.timer_list + self.processed_timers)
+		self.invalidateServiceTimerIndex()
 		self.saveTimer()
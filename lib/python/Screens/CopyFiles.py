@@ -124,6 +124,9 @@ def copyFiles(fileList, name):
 	job = Components.Task.Job(name)
 	task = CopyFileTask(job, name)
 	task.openFiles(fileList)
+	for src, dst in fileList:
+		job.addResource(Components.Task.deviceResource(src))
+		job.addResource(Components.Task.deviceResource(dst))
 	Components.Task.job_manager.AddJob(job)
 
 
@@ -132,4 +135,7 @@ def moveFiles(fileList, name):
 	job = Components.Task.Job(name)
 	task = MoveFileTask(job, name)
 	task.openFiles(fileList)
+	for src, dst in fileList:
+		job.addResource(Components.Task.deviceResource(src))
+		job.addResource(Components.Task.deviceResource(dst))
 	Components.Task.job_manager.AddJob(job)
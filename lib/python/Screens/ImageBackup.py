@@ -155,7 +155,7 @@ class ImageBackup(Screen):
 			shutdownOK = config.usage.shutdownOK.value
 			config.usage.shutdownOK.setValue(True)
 			config.usage.shutdownOK.save()
-			configfile.save()
+			configfile.save(immediate=True)
 			# Make sure that the image backup target exists.
 			target = join(target, "images")
 			if not exists(target):
@@ -310,7 +310,7 @@ class MoviePlayer(InfoBarBase, InfoBarShowHide, InfoBarMenu, InfoBarSeek, InfoBa
 					import Tools.Trashcan
 					try:
 						trash = Tools.Trashcan.createTrashFolder(ref.getPath())
-						Screens.MovieSelection.moveServiceFiles(ref, trash)
+						Tools.Trashcan.addToIndex(trash, Screens.MovieSelection.moveServiceFiles(ref, trash))
 						# Moved to trash, okay
 						if answer == "quitanddelete":
 							self.close()
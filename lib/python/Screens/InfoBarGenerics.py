@@ -38,7 +38,7 @@ from ServiceReference import ServiceReference, isPlayableForCur, getStreamRelayR
 
 from Tools.ASCIItranslit import legacyEncode
 from Tools.Directories import fileExists, fileReadLines, fileWriteLine, fileReadLinesISO, getRecordingFilename, moveFiles
-from Tools.Notifications import AddPopup, AddNotificationWithCallback, current_notifications, lock, notificationAdded, notifications, RemovePopup
+from Tools.Notifications import AddPopup, AddNotificationWithCallback, current_notifications, notificationAdded, notifications, RemovePopup
 from keyids import KEYFLAGS, KEYIDNAMES, KEYIDS
 from enigma import eAVControl, eTimer, eServiceCenter, eDVBServicePMTHandler, iServiceInformation, iPlayableService, eServiceReference, eEPGCache, eActionMap, getDesktop, eDVBDB, eDBoxLCD
 from skin import findSkinScreen
@@ -51,6 +51,8 @@ import itertools
 import datetime
 from re import match
 from pickle import load as pickle_load, dump as pickle_dump, HIGHEST_PROTOCOL as pickle_HIGHEST_PROTOCOL
+from json import dumps as json_dumps, loads as json_loads
+from threading import Thread
 
 from RecordTimer import RecordTimerEntry, RecordTimer, findSafeRecordPath
 
@@ -67,43 +69,123 @@ def isStandardInfoBar(self):
 
 
 class ResumePoints():
+	# The resume points are stored as a pickled snapshot plus a log of the
+	# changes made since, one JSON line per change.  Changes are appended in
+	# batches after SAVE_DELAY and the log is merged into the snapshot when
+	# it grew longer than COMPACT_LINES.
+	SAVE_DELAY = 5
+	COMPACT_LINES = 500
+	MOUNT_TIMEOUT = 5  # seconds to wait for a mount before its entries are kept unchecked
+
 	def __init__(self):
 		self.resumePointFile = "/etc/enigma2/resumepoints.pkl"
+		self.resumePointLog = "/etc/enigma2/resumepoints.log"
 		self.resumePointCache = {}
+		self.pendingChanges = {}  # sref: entry or None when deleted
+		self.logLines = 0
+		self.saveTimer = eTimer()
+		self.saveTimer.callback.append(self.saveResumePoints)
 		self.loadResumePoints()
+		self.cleanRunning = False
 		self.cacheCleanTimer = eTimer()
 		self.cacheCleanTimer.callback.append(self.cleanCache)
 		self.cleanCache()  # get rid of stale entries on reboot
 	def loadResumePoints(self):
 		self.resumePointCache.clear()
+		self.pendingChanges.clear()
+		self.logLines = 0
 		if fileExists(self.resumePointFile):
 			with open(self.resumePointFile, "rb") as f:
 				self.resumePointCache.update(pickle_load(f, fix_imports=True, encoding="utf8"))
+		try:
+			with open(self.resumePointLog, "r", encoding="utf-8") as fd:
+				for line in fd:
+					try:
+						sref, entry = json_loads(line)
+					except (ValueError, TypeError):  # the last line of an interrupted write
+						self.compactResumePoints()  # new lines must not be appended to it
+						break
+					if entry is None:
+						self.resumePointCache.pop(sref, None)
+					else:
+						self.resumePointCache[sref] = entry
+					self.logLines += 1
+		except OSError:
+			pass
+	def changed(self, sref):
+		self.pendingChanges[sref] = self.resumePointCache.get(sref)
+		if not self.saveTimer.isActive():
+			self.saveTimer.startLongTimer(self.SAVE_DELAY)
 	def saveResumePoints(self):
-		with open(self.resumePointFile, "wb") as f:
-			pickle_dump(self.resumePointCache, f, pickle_HIGHEST_PROTOCOL)
+		self.saveTimer.stop()
+		if self.logLines + len(self.pendingChanges) > self.COMPACT_LINES:
+			self.compactResumePoints()
+		elif self.pendingChanges:
+			lines = "".join("%s\n" % json_dumps([sref, entry], separators=(",", ":")) for sref, entry in self.pendingChanges.items())
+			try:
+				with open(self.resumePointLog, "a", encoding="utf-8") as fd:
+					fd.write(lines)
+				self.logLines += len(self.pendingChanges)
+				self.pendingChanges.clear()
+			except OSError as err:
+				print("[InfoBarGenerics] Failed to write %s:" % self.resumePointLog, err)
+	def compactResumePoints(self):
+		try:
+			with open(self.resumePointFile + ".writing", "wb") as f:
+				pickle_dump(self.resumePointCache, f, pickle_HIGHEST_PROTOCOL)
+			os.rename(self.resumePointFile + ".writing", self.resumePointFile)
+			if os.path.exists(self.resumePointLog):
+				os.remove(self.resumePointLog)
+			self.logLines = 0
+			self.pendingChanges.clear()
+		except OSError as err:
+			print("[InfoBarGenerics] Failed to write %s:" % self.resumePointFile, err)
 	def delResumePoint(self, ref):
 		if (sref := ref.toString()) in self.resumePointCache:
 			del self.resumePointCache[sref]
-			self.saveResumePoints()
+			self.changed(sref)
 	def cleanCache(self):
-		changed = False
-		now = int(time())
+		# the files are checked in a thread, a slow network mount must not block
 		self.cacheCleanTimer.stop()
-		for sref, v in list(self.resumePointCache.items()):
+		if not self.cleanRunning:
+			from twisted.internet import threads
+			self.cleanRunning = True
+			threads.deferToThread(self.findStaleEntries, list(self.resumePointCache.items()), int(time())).addBoth(self.cleanCacheDone)
+		self.cacheCleanTimer.startLongTimer(24 * 60 * 60)  # clean up daily
+	def findStaleEntries(self, entries, now):
+		stale = []
+		mounts = {}
+		for sref, v in entries:
 			if "%3a//" in sref:  # resume point is stream
 				if now > v[0] + 7 * 24 * 60 * 60:  # keep stream resume points maximum one week
-					del self.resumePointCache[sref]
-					changed = True
+					stale.append((sref, v))
 			else:
-				filepath = os.path.realpath(sref.split(':')[-1])
-				mountpoint = findMountPoint(filepath)
-				if os.path.ismount(mountpoint) and not os.path.exists(filepath):
+				path = sref.split(':')[-1]
+				mounts.setdefault(findMountPoint(path), []).append((sref, v, path))
+		for mountpoint, batch in mounts.items():
+			if not self.isMountAvailable(mountpoint):
+				print("[InfoBarGenerics] Resume points on '%s' not checked, the mount is not available." % mountpoint)
+				continue
+			for sref, v, path in batch:
+				filepath = os.path.realpath(path)
+				if os.path.ismount(findMountPoint(filepath)) and not os.path.exists(filepath):
+					stale.append((sref, v))
+		return stale
+	def isMountAvailable(self, mountpoint):
+		result = []
+		probe = Thread(target=lambda: result.append(os.path.ismount(mountpoint)), daemon=True)
+		probe.start()
+		probe.join(self.MOUNT_TIMEOUT)
+		return bool(result) and result[0]
+	def cleanCacheDone(self, result):
+		self.cleanRunning = False
+		if isinstance(result, list):
+			for sref, v in result:
+				if self.resumePointCache.get(sref) is v:  # not set again in the meantime
 					del self.resumePointCache[sref]
-					changed = True
-		if changed:
-			self.saveResumePoints()
-		self.cacheCleanTimer.startLongTimer(24 * 60 * 60)  # clean up daily
+					self.changed(sref)
+		else:
+			print("[InfoBarGenerics] Failed to clean the resume points:", result)
 	def setResumePoint(self, session):
 		service = session.nav.getCurrentService()
 		ref = session.nav.getCurrentlyPlayingServiceOrGroup()
@@ -116,7 +198,7 @@ class ResumePoints():
 					sref = ref.toString()
 					sl = x[1] if (x := seek.getLength()) else None
 					self.resumePointCache[sref] = [int(time()), pos[1], sl]
-					self.saveResumePoints()
+					self.changed(sref)
 	def getResumePoint(self, session):
 		ref = session.nav.getCurrentlyPlayingServiceOrGroup()
 		if (ref is not None) and (ref.type != 1) and (sref := ref.toString()) in self.resumePointCache:
@@ -3508,12 +3590,7 @@ class InfoBarNotifications:
 			self.checkNotifications()
 
 	def checkNotifications(self):
-		lock.acquire(True)
-		my_notifications = notifications
-		n = my_notifications and my_notifications[0]
-		if n:
-			del my_notifications[0]
-		lock.release()
+		n = notifications.pop()
 		if n:
 			cb = n[0]
 
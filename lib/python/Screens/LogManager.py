@@ -79,6 +79,7 @@ class LogManagerPoller:
 
 	def createTrimJob(self):
 		job = Components.Task.Job(_("LogManager"))
+		job.addResource(Components.Task.deviceResource(config.crash.debug_path.value))
 		task = Components.Task.PythonTask(job, _("Checking Logs..."))
 		task.work = self.JobTrim
 		task.weighting = 1
@@ -86,6 +87,7 @@ class LogManagerPoller:
 
 	def createTrashJob(self):
 		job = Components.Task.Job(_("LogManager"))
+		job.addResource(Components.Task.deviceResource(config.crash.debug_path.value))
 		task = Components.Task.PythonTask(job, _("Checking Logs..."))
 		task.work = self.JobTrash
 		task.weighting = 1
@@ -2,6 +2,7 @@ from Screens.Screen import Screen
 from Components.Button import Button
 from Components.ActionMap import HelpableActionMap, ActionMap, NumberActionMap
 from Components.ChoiceList import ChoiceList, ChoiceEntryComponent
+from Components.MovieCache import MOVIE_CACHE_FILE
 from Components.MovieList import MovieList, resetMoviePlayState, AUDIO_EXTENSIONS, DVD_EXTENSIONS, IMAGE_EXTENSIONS, moviePlayState
 from Components.DiskInfo import DiskInfo
 from Components.Pixmap import Pixmap, MultiPixmap
@@ -211,6 +212,7 @@ def moveServiceFiles(serviceref, dest, name=None, allowCopy=True):
 				print("[MovieSelection] Failed to undo move:", item)
 		# rethrow exception
 		raise
+	return [item[1] for item in movedList]
 
 
 def copyServiceFiles(serviceref, dest, name=None):
@@ -549,6 +551,8 @@ class MovieSelection(Screen, SelectionEventInfo, InfoBarBase, ProtectedScreen):
 
 		self["list"] = MovieList(None, list_type=self.settings["listtype"], sort_type=self.settings["moviesort"], descr_state=self.settings["description"])
 		self.list = self["list"]
+		self.list.onLoadProgress.append(self.reloadProgress)
+		self.list.onLoadFinished.append(self.reloadFinished)
 		self.selectedmovie = selectedmovie
 
 		self.playGoTo = None  # 1 - preview next item / -1 - preview previous
@@ -1368,7 +1372,13 @@ class MovieSelection(Screen, SelectionEventInfo, InfoBarBase, ProtectedScreen):
 			self["freeDiskSpace"].path = path
 		if self.reload_sel is None:
 			self.reload_sel = self.getCurrent()
-		self["list"].reload(self.current_ref, self.selected_tags)
+		# the list is shown while it is loaded, reloadFinished is called when it is sorted
+		self["list"].reload(self.current_ref, self.selected_tags, progressive=True)
+
+	def reloadProgress(self):
+		self["waitingtext"].visible = False
+
+	def reloadFinished(self):
 		self.updateTags()
 		title = _("Recorded files...")
 		if config.usage.setup_level.index >= 2: # expert+
@@ -1892,14 +1902,16 @@ class MovieSelection(Screen, SelectionEventInfo, InfoBarBase, ProtectedScreen):
 						# Move the files to the trash can in a way that their CTIME is
 						# set to "now". A simple move would not correctly update the
 						# ctime, and hence trigger a very early purge.
-						trash = Tools.Trashcan.createTrashFolder(cur_path)
-						trash = os.path.join(trash, os.path.split(cur_path)[1])
+						trashFolder = Tools.Trashcan.createTrashFolder(cur_path)
+						trash = os.path.join(trashFolder, os.path.split(cur_path)[1])
 						os.mkdir(trash)
+						trashed = []
 						for root, dirnames, filenames in os.walk(cur_path):
 							trashroot = os.path.join(trash, root[len(cur_path) + 1:])
 							for fn in filenames:
 								print("Move %s -> %s" % (os.path.join(root, fn), os.path.join(trashroot, fn)))
 								os.rename(os.path.join(root, fn), os.path.join(trashroot, fn))
+								trashed.append(os.path.join(trashroot, fn))
 							for dn in dirnames:
 								print("MkDir", os.path.join(trashroot, dn))
 								os.mkdir(os.path.join(trashroot, dn))
@@ -1909,6 +1921,7 @@ class MovieSelection(Screen, SelectionEventInfo, InfoBarBase, ProtectedScreen):
 								print("rmdir", os.path.join(trashroot, dn))
 								os.rmdir(os.path.join(root, dn))
 						os.rmdir(cur_path)
+						Tools.Trashcan.addToIndex(trashFolder, trashed)
 						self["list"].removeService(current)
 						self.showActionFeedback(_("Deleted") + " " + name)
 						# Files were moved to .Trash, ok.
@@ -1928,7 +1941,7 @@ class MovieSelection(Screen, SelectionEventInfo, InfoBarBase, ProtectedScreen):
 				self.session.open(MessageBox, msg, MessageBox.TYPE_ERROR)
 				return
 			for fn in os.listdir(cur_path):
-				if (fn != '.') and (fn != '..'):
+				if fn not in ('.', '..', MOVIE_CACHE_FILE):
 					ffn = os.path.join(cur_path, fn)
 					if os.path.isdir(ffn):
 						subdirs += 1
@@ -1946,6 +1959,8 @@ class MovieSelection(Screen, SelectionEventInfo, InfoBarBase, ProtectedScreen):
 				return
 			else:
 				try:
+					if os.path.exists(os.path.join(cur_path, MOVIE_CACHE_FILE)):
+						os.remove(os.path.join(cur_path, MOVIE_CACHE_FILE))
 					os.rmdir(cur_path)
 				except Exception as e:
 					print("[MovieSelection] Failed delete", e)
@@ -1979,7 +1994,7 @@ class MovieSelection(Screen, SelectionEventInfo, InfoBarBase, ProtectedScreen):
 					if cur_path.startswith(trash):
 						msg = _("Deleted items") + "\n"
 					else:
-						moveServiceFiles(current, trash, name, allowCopy=False)
+						Tools.Trashcan.addToIndex(trash, moveServiceFiles(current, trash, name, allowCopy=False))
 						self["list"].removeService(current)
 						# Files were moved to .Trash, ok.
 						from Screens.InfoBarGenerics import resumePointsInstance
@@ -71,15 +71,15 @@ def InitOSDCalibration():
 	BoxInfo.setItem("OSDCalibration", BoxInfo.getItem("CanChangeOsdPosition") or BoxInfo.getItem("CanChangeOsdPositionAML") or BoxInfo.getItem("CanChangeOsdAlpha"))
 	BoxInfo.setItem("OSD3DCalibration", access("/proc/stb/fb/3dmode", W_OK))
 	print(f"[OSDCalibration] Setting OSD position to (X={config.osd.dst_left.value}, Y={config.osd.dst_top.value}) and size to (W={config.osd.dst_width.value}, H={config.osd.dst_height.value}).")
-	config.osd.dst_left.addNotifier(setLeft)
-	config.osd.dst_top.addNotifier(setTop)
-	config.osd.dst_width.addNotifier(setWidth)
-	config.osd.dst_height.addNotifier(setHeight)
+	config.osd.dst_left.addNotifier(setLeft, coalesce=100)
+	config.osd.dst_top.addNotifier(setTop, coalesce=100)
+	config.osd.dst_width.addNotifier(setWidth, coalesce=100)
+	config.osd.dst_height.addNotifier(setHeight, coalesce=100)
 	if BoxInfo.getItem("CanChangeOsdAlpha"):
-		config.osd.alpha.addNotifier(setAlpha)
+		config.osd.alpha.addNotifier(setAlpha, coalesce=100)
 	if BoxInfo.getItem("OSD3DCalibration"):
 		config.osd.threeDmode.addNotifier(set3DMode)
-		config.osd.threeDznorm.addNotifier(set3DZnorm)
+		config.osd.threeDznorm.addNotifier(set3DZnorm, coalesce=100)
 
 
 class OSDCalibration(Setup):
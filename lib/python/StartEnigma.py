@@ -6,6 +6,7 @@ import Tools.RedirectOutput
 import enigma  # Establish enigma2 connections to processing methods.
 import eBaseImpl
 import eConsoleImpl
+from Tools.Profile import profile, profile_final
 enigma.eTimer = eBaseImpl.eTimer
 enigma.eSocketNotifier = eBaseImpl.eSocketNotifier
 enigma.eConsoleAppContainer = eConsoleImpl.eConsoleAppContainer
@@ -282,7 +283,7 @@ class PowerKey:
 
 
 if enigma.eAVControl.getInstance().hasScartSwitch():
-	enigma.eProfileWrite("Scart")
+	profile("Scart")
 	print("[StartEnigma] Initialising Scart module")
 	from Screens.Scart import Scart
 
@@ -315,17 +316,17 @@ class AutoScartControl:
 def runScreenTest():
 	config.misc.startCounter.value += 1
 	config.misc.startCounter.save()
-	enigma.eProfileWrite("ReadPluginList")
+	profile("ReadPluginList")
 	enigma.pauseInit()
-	plugins.readPluginList(resolveFilename(SCOPE_PLUGINS))
+	plugins.readPluginList(resolveFilename(SCOPE_PLUGINS), lazy=True)
 	enigma.resumeInit()
-	enigma.eProfileWrite("Session")
+	profile("Session")
 	nav = Navigation()
 	session = Session(desktop=enigma.getDesktop(0), summaryDesktop=enigma.getDesktop(1), navigation=nav)
 	CiHandler.setSession(session)
 	powerOffTimer.setSession(session)
 	screensToRun = [p.fnc for p in plugins.getPlugins(PluginDescriptor.WHERE_WIZARD)]
-	enigma.eProfileWrite("Wizards")
+	profile("Wizards")
 	screensToRun += wizardManager.getWizards()
 	screensToRun.append((100, InfoBar.InfoBar))
 	screensToRun.sort(key=lambda x: x[0])  # works in both Pythons but let's not use sort method here first we must see if we have work network in the wizard.
@@ -342,23 +343,24 @@ def runScreenTest():
 		else:
 			session.open(screen, *args)
 	runNextScreen(session, screensToRun)
-	enigma.eProfileWrite("VolumeControl")
+	profile("VolumeControl")
 	vol = VolumeControl(session)
-	enigma.eProfileWrite("Processing Screen")
+	profile("Processing Screen")
 	processing = Processing(session)
-	enigma.eProfileWrite("PowerKey")
+	profile("PowerKey")
 	power = PowerKey(session)
 	if enigma.getVFDSymbolsPoll():
-		enigma.eProfileWrite("VFDSymbolsCheck")
+		profile("VFDSymbolsCheck")
 		from Components.VfdSymbols import SymbolsCheck
 		SymbolsCheck(session)
 	# we need session.scart to access it from within menu.xml
 	session.scart = AutoScartControl(session) if enigma.eAVControl.getInstance().hasScartSwitch() else None
-	enigma.eProfileWrite("Trashcan")
+	profile("Trashcan")
 	import Tools.Trashcan
 	Tools.Trashcan.init(session)
-	enigma.eProfileWrite("RunReactor")
+	profile("RunReactor")
 	enigma.eProfileDone()
+	profile_final()
 	runReactor()
 	from Screens.SleepTimerEdit import isNextWakeupTime
 	# get currentTime
@@ -391,7 +393,9 @@ def runScreenTest():
 	session.nav.shutdown()
 	session.doShutdown()
 	VolumeControl.instance.saveVolumeState()
-	configfile.save()
+	from Screens.InfoBarGenerics import resumePointsInstance
+	resumePointsInstance.saveResumePoints()
+	configfile.save(immediate=True, snapshot=True)
 
 	return 0
 
@@ -432,7 +436,7 @@ def dump(dir, p=""):
 #                               #
 #################################
 
-enigma.eProfileWrite("Twisted")
+profile("Twisted")
 print("[StartEnigma] Initializing Twisted.")
 try:  # Configure the twisted processor.
 	from twisted.python.runtime import platform
@@ -494,10 +498,10 @@ def localeNotifier(configElement):
 
 # Initialize the country, language and locale data.
 #
-enigma.eProfileWrite("International")
+profile("International")
 from Components.International import international
 
-enigma.eProfileWrite("BoxInfo")
+profile("BoxInfo")
 from Components.SystemInfo import BoxInfo
 
 BRAND = BoxInfo.getItem("brand")
@@ -546,11 +550,11 @@ config.plugins = ConfigSubsection()
 config.plugins.remotecontroltype = ConfigSubsection()
 config.plugins.remotecontroltype.rctype = ConfigInteger(default=0)
 
-enigma.eProfileWrite("InitSetupDevices")
+profile("InitSetupDevices")
 import Components.SetupDevices
 Components.SetupDevices.InitSetupDevices()
 
-enigma.eProfileWrite("InfoBar")
+profile("InfoBar")
 from Screens import InfoBar
 
 def setEPGCachePath(configElement):
@@ -558,11 +562,11 @@ def setEPGCachePath(configElement):
 		configElement.value = join(configElement.value, "epg.dat")
 	enigma.eEPGCache.getInstance().setCacheFile(configElement.value)
 
-enigma.eProfileWrite("ScreenSummary")
+profile("ScreenSummary")
 # from Screens.SimpleSummary import SimpleSummary
 from Screens.Screen import ScreenSummary
 
-enigma.eProfileWrite("LoadBouquets")
+profile("LoadBouquets")
 config.misc.load_unlinked_userbouquets = ConfigSelection(default="1", choices=[("0", _("Off")), ("1", _("Top")), ("2", _("Bottom"))])
 if config.misc.load_unlinked_userbouquets.value.lower() in ("true", "false"):
 	config.misc.load_unlinked_userbouquets.value = "1" if config.misc.load_unlinked_userbouquets.value.lower() == "true" else "0"
@@ -573,21 +577,21 @@ def setLoadUnlinkedUserbouquets(configElement):
 config.misc.load_unlinked_userbouquets.addNotifier(setLoadUnlinkedUserbouquets)
 enigma.eDVBDB.getInstance().reloadBouquets()
 
-enigma.eProfileWrite("ParentalControl")
+profile("ParentalControl")
 import Components.ParentalControl
 Components.ParentalControl.InitParentalControl()
 
-enigma.eProfileWrite("Navigation")
+profile("Navigation")
 from Navigation import Navigation
 
-enigma.eProfileWrite("ReadSkin")
+profile("ReadSkin")
 from skin import readSkin
 
-enigma.eProfileWrite("InitFallbackFiles")
+profile("InitFallbackFiles")
 from Tools.Directories import InitFallbackFiles, resolveFilename, SCOPE_PLUGINS, SCOPE_CURRENT_SKIN
 InitFallbackFiles()
 
-enigma.eProfileWrite("ConfigMisc")
+profile("ConfigMisc")
 config.misc.radiopic = ConfigText(default=resolveFilename(SCOPE_CURRENT_SKIN, "radio.mvi"))
 config.misc.blackradiopic = ConfigText(default=resolveFilename(SCOPE_CURRENT_SKIN, "black.mvi"))
 config.misc.startCounter = ConfigInteger(default=0)  # number of e2 starts...
@@ -605,86 +609,86 @@ config.misc.SyncTimeUsing = ConfigSelection(default="0", choices=[
 ])
 config.misc.NTPserver = ConfigText(default="pool.ntp.org", fixed_size=False)
 
-enigma.eProfileWrite("AutoRunPlugins")
+profile("AutoRunPlugins")
 # Initialize autorun plugins and plugin menu entries.
 from Components.PluginComponent import plugins
 
-enigma.eProfileWrite("StartWizard")
+profile("StartWizard")
 from Screens.Wizard import wizardManager
 from Screens.StartWizard import *
 from Tools.BoundFunction import boundFunction
 from Plugins.Plugin import PluginDescriptor
 
-enigma.eProfileWrite("ScreenGlobals")
+profile("ScreenGlobals")
 from Screens.Globals import Globals
 from Screens.SessionGlobals import SessionGlobals
 from Screens.Screen import Screen
 Screen.globalScreen = Globals()
 
-enigma.eProfileWrite("Standby")
+profile("Standby")
 import Screens.Standby
 from Screens.Menu import MainMenu, mdom
 
-enigma.eProfileWrite("GlobalActionMap")
+profile("GlobalActionMap")
 from GlobalActions import globalActionMap
 
-enigma.eProfileWrite("Scart")
+profile("Scart")
 from Screens.Scart import Scart
 
-enigma.eProfileWrite("CIHandler")
+profile("CIHandler")
 from Screens.Ci import CiHandler
 
-enigma.eProfileWrite("VolumeControl")
+profile("VolumeControl")
 from Components.VolumeControl import VolumeControl
 
-enigma.eProfileWrite("Processing")
+profile("Processing")
 from Screens.Processing import Processing
 
-enigma.eProfileWrite("StackTracePrinter")
+profile("StackTracePrinter")
 from Components.StackTrace import StackTracePrinter
 StackTracePrinterInst = StackTracePrinter()
 
 from time import localtime, strftime
 from Tools.StbHardware import setFPWakeuptime, setRTCtime
 
-enigma.eProfileWrite("InitSkins")
+profile("InitSkins")
 from skin import InitSkins
 InitSkins()
 
-enigma.eProfileWrite("InitInputDevices")
+profile("InitInputDevices")
 from Components.InputDevice import InitInputDevices
 InitInputDevices()
 import Components.InputHotplug
 
-enigma.eProfileWrite("InitAVSwitch")
+profile("InitAVSwitch")
 from Components.AVSwitch import InitAVSwitch
 InitAVSwitch()
 
-enigma.eProfileWrite("InitHDMIRecord")
+profile("InitHDMIRecord")
 from Components.HdmiRecord import InitHdmiRecord
 InitHdmiRecord()
 
-enigma.eProfileWrite("InitRecordingConfig")
+profile("InitRecordingConfig")
 from Components.RecordingConfig import InitRecordingConfig
 InitRecordingConfig()
 
-enigma.eProfileWrite("InitUsageConfig")
+profile("InitUsageConfig")
 from Components.UsageConfig import InitUsageConfig, DEFAULTKEYMAP
 InitUsageConfig()
 
-enigma.eProfileWrite("InitTimeZones")
+profile("InitTimeZones")
 from Components.Timezones import InitTimeZones
 InitTimeZones()
 
-enigma.eProfileWrite("AutoLogManager")
+profile("AutoLogManager")
 from Screens.LogManager import AutoLogManager
 AutoLogManager()
 
-enigma.eProfileWrite("NTPSyncPoller")
+profile("NTPSyncPoller")
 from Components.NetworkTime import ntpSyncPoller
 ntpSyncPoller.startTimer()
 
-enigma.eProfileWrite("KeymapParser")
+profile("KeymapParser")
 from Components.ActionMap import loadKeymap
 loadKeymap(DEFAULTKEYMAP)
 if config.usage.keymap.value != DEFAULTKEYMAP:
@@ -693,34 +697,34 @@ if config.usage.keymap.value != DEFAULTKEYMAP:
 if exists(config.usage.keymap_usermod.value):
 	loadKeymap(config.usage.keymap_usermod.value)
 
-enigma.eProfileWrite("InitNetwork")
+profile("InitNetwork")
 from Components.Network import InitNetwork
 InitNetwork()
 
-enigma.eProfileWrite("InitLCD")
+profile("InitLCD")
 from Components.Lcd import IconCheck, InitLcd
 InitLcd()
 IconCheck()
 
 enigma.eAVControl.getInstance().disableHDMIIn()
 
-enigma.eProfileWrite("PowerOffTimer")
+profile("PowerOffTimer")
 from Components.PowerOffTimer import powerOffTimer
 
-enigma.eProfileWrite("InitOSDCalibration")
+profile("InitOSDCalibration")
 from Screens.OSDCalibration import InitOSDCalibration
 InitOSDCalibration()
 
-enigma.eProfileWrite("EPGCacheCheck")
+profile("EPGCacheCheck")
 from Components.EpgLoadSave import EpgCacheLoadCheck, EpgCacheSaveCheck
 EpgCacheSaveCheck()
 EpgCacheLoadCheck()
 
-enigma.eProfileWrite("InitRFmod")
+profile("InitRFmod")
 from Components.RFmod import InitRFmod
 InitRFmod()
 
-enigma.eProfileWrite("InitCiConfig")
+profile("InitCiConfig")
 from Screens.Ci import InitCiConfig
 InitCiConfig()
 
@@ -1,4 +1,4 @@
-from Components.Task import PythonTask, Task, Job, job_manager as JobManager
+from Components.Task import PythonTask, Task, Job, deviceResource, job_manager as JobManager
 from Tools.Directories import fileExists
 from enigma import eTimer
 from os import path
@@ -24,6 +24,8 @@ class CopyFileJob(Job):
 	def __init__(self, srcfile, destfile, name):
 		Job.__init__(self, _("Copying files"))
 		cmdline = 'cp -Rf "%s" "%s"' % (srcfile, destfile)
+		self.addResource(deviceResource(srcfile))
+		self.addResource(deviceResource(destfile))
 		AddFileProcessTask(self, cmdline, srcfile, destfile, name)
 
 
@@ -31,6 +33,8 @@ class MoveFileJob(Job):
 	def __init__(self, srcfile, destfile, name):
 		Job.__init__(self, _("Moving files"))
 		cmdline = 'mv -f "%s" "%s"' % (srcfile, destfile)
+		self.addResource(deviceResource(srcfile))
+		self.addResource(deviceResource(destfile))
 		AddFileProcessTask(self, cmdline, srcfile, destfile, name)
 
 
@@ -81,4 +85,5 @@ def deleteFiles(fileList, name):
 	job = Job(_("Deleting files"))
 	task = DeleteFolderTask(job, name)
 	task.openFiles(fileList)
+	job.addResource(deviceResource(fileList))
 	JobManager.AddJob(job)
@@ -28,3 +28,73 @@ def LoadPixmap(path, desktop=None, cached=None, width=0, height=0, scaletoFit=0,
 	if ptr and desktop:
 		desktop.makeCompatiblePixmap(ptr)
 	return ptr
+
+
+class PixmapCache:
+	# Decoded pixmaps keyed by file and rendering size. The least recently used
+	# pixmaps are dropped when the estimated memory use exceeds the budget.
+	def __init__(self, budget=8 * 1024 * 1024):
+		self.budget = budget
+		self.used = 0
+		self.pixmaps = {}  # key -> (pixmap, bytes), least recently used first
+		self.hits = 0
+		self.misses = 0
+		self.evictions = 0
+
+	def setBudget(self, budget):
+		self.budget = budget
+		self.evict()
+
+	def getKey(self, path, width=0, height=0, scaletoFit=0, align=RT_HALIGN_CENTER):
+		# only svg files are rendered to the requested size
+		if path[-4:] == ".svg":
+			return (path, width, height, scaletoFit, align)
+		return (path,)
+
+	def lookup(self, key):
+		entry = self.pixmaps.pop(key, None)
+		if entry is None:
+			self.misses += 1
+			return None
+		self.hits += 1
+		self.pixmaps[key] = entry
+		return entry[0]
+
+	def add(self, key, ptr):
+		entry = self.pixmaps.pop(key, None)
+		if entry is not None:
+			self.used -= entry[1]
+		size = ptr.size()
+		self.pixmaps[key] = (ptr, size.width() * size.height() * 4)
+		self.used += size.width() * size.height() * 4
+		self.evict()
+
+	def evict(self):
+		while self.used > self.budget and self.pixmaps:
+			self.used -= self.pixmaps.pop(next(iter(self.pixmaps)))[1]
+			self.evictions += 1
+
+	def get(self, path, desktop=None, width=0, height=0, scaletoFit=0, align=RT_HALIGN_CENTER):
+		key = self.getKey(path, width, height, scaletoFit, align)
+		ptr = self.lookup(key)
+		if ptr is None:
+			ptr = LoadPixmap(path, desktop, False, width, height, scaletoFit, align)
+			if ptr:
+				self.add(key, ptr)
+		return ptr
+
+	def prefetch(self, paths, desktop=None, width=0, height=0, scaletoFit=0, align=RT_HALIGN_CENTER):
+		# loads pixmaps which will be shown soon, e.g. the picons of the next page of a list
+		for path in paths:
+			if path:
+				key = self.getKey(path, width, height, scaletoFit, align)
+				if key not in self.pixmaps:
+					ptr = LoadPixmap(path, desktop, False, width, height, scaletoFit, align)
+					if ptr:
+						self.add(key, ptr)
+
+	def getStatistics(self):
+		return {"pixmaps": len(self.pixmaps), "used": self.used, "budget": self.budget, "hits": self.hits, "misses": self.misses, "evictions": self.evictions}
+
+
+pixmapCache = PixmapCache()
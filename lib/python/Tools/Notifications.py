@@ -1,22 +1,138 @@
 # -*- coding: utf-8 -*-
 import threading
-lock = threading.Lock()
-
-notifications = []
+from collections import deque
+from time import time
+
+PRIORITY_HIGH = 0
+PRIORITY_NORMAL = 1
+PRIORITY_LOW = 2
+
+
+class NotificationQueue:
+	# Notifications can be added from any thread, they are only appended to the
+	# inbox (deque.append is atomic) and sorted into the queues by the consumer.
+	# There a notification with an id replaces a queued one with the same id,
+	# equal notifications without id are only queued once, more than RATE_LIMIT
+	# notifications of one id within RATE_WINDOW seconds and anything beyond
+	# MAX_PENDING queued notifications are dropped.  Notifications with a
+	# callback are always queued, their caller waits for the answer.
+	MAX_PENDING = 50
+	RATE_LIMIT = 5
+	RATE_WINDOW = 10
+
+	def __init__(self):
+		self.inbox = deque()
+		self.queues = (deque(), deque(), deque())  # per priority, of [entry, key]
+		self.pending = {}  # key: [entry, key] of the notifications which may be merged
+		self.history = {}  # id: deque of the times of the last notifications
+		self.count = 0
+		self.lock = threading.Lock()  # only taken by the consumers
+		self.enqueued = 0
+		self.deduped = 0
+		self.dropped = 0
+
+	def add(self, entry, priority=PRIORITY_NORMAL):
+		self.inbox.append((time(), priority, entry))
+
+	def remove(self, id):
+		self.inbox.append((time(), None, id))
+
+	def process(self):
+		while self.inbox:
+			now, priority, entry = self.inbox.popleft()
+			if priority is None:
+				self.removeId(entry)
+			else:
+				self.queue(now, priority, entry)
+
+	def queue(self, now, priority, entry):
+		fnc, screen, args, kwargs, id = entry
+		key = None
+		if fnc is None:
+			key = id
+			if key is None:
+				try:
+					key = (screen, args, tuple(sorted(kwargs.items())))
+					hash(key)
+				except TypeError:
+					key = None
+			slot = self.pending.get(key)
+			if slot is not None:
+				slot[0] = entry  # the newest one takes the place of the queued one
+				self.deduped += 1
+				return
+			if id is not None:
+				times = self.history.setdefault(id, deque())
+				while times and times[0] < now - self.RATE_WINDOW:
+					times.popleft()
+				if len(times) >= self.RATE_LIMIT:
+					self.dropped += 1
+					print("[Notifications] Dropped notification id = %s, more than %d within %d seconds." % (id, self.RATE_LIMIT, self.RATE_WINDOW))
+					return
+				times.append(now)
+			if self.count >= self.MAX_PENDING:
+				self.dropped += 1
+				print("[Notifications] Dropped notification id = %s, %d notifications are pending." % (id, self.count))
+				return
+		slot = [entry, key]
+		if key is not None:
+			self.pending[key] = slot
+		self.queues[priority].append(slot)
+		self.count += 1
+		self.enqueued += 1
+
+	def removeId(self, id):
+		for queue in self.queues:
+			for slot in queue:
+				if slot[0] is not None and slot[0][4] == id:
+					print("[Notifications] RemovePopup id = %s" % id)
+					if slot[1] is not None:
+						del self.pending[slot[1]]
+					slot[0] = None
+					self.count -= 1
+
+	def pop(self):
+		# the next notification to show, the one of the highest priority first
+		with self.lock:
+			self.process()
+			for queue in self.queues:
+				while queue:
+					entry, key = queue.popleft()
+					if entry is not None:
+						if key is not None:
+							del self.pending[key]
+						self.count -= 1
+						return entry
+		return None
+
+	def __len__(self):
+		with self.lock:
+			self.process()
+			return self.count
+
+	def getStatistics(self):
+		with self.lock:
+			self.process()
+			return {"enqueued": self.enqueued, "deduped": self.deduped, "dropped": self.dropped, "pending": self.count}
+
+
+notifications = NotificationQueue()
+lock = notifications.lock
 notificationAdded = []
 
 # notifications which are currently on screen (and might be closed by similiar notifications)
 current_notifications = []
 
 
-def __AddNotification(fnc, screen, id, *args, **kwargs):
-	if ".MessageBox'>" in repr(screen):
+def __AddNotification(fnc, screen, id, priority, *args, **kwargs):
+	name = getattr(screen, "__name__", None)
+	if name == "MessageBox":
 		kwargs["simple"] = True
-	if ".Standby'>" in repr(screen):
+	if name == "Standby":
 		removeCIdialog()
-	lock.acquire(True)
-	notifications.append((fnc, screen, args, kwargs, id))
-	lock.release()
+	if getattr(screen, "__module__", None) == "Screens.Standby":
+		priority = PRIORITY_HIGH
+	notifications.add((fnc, screen, args, kwargs, id), priority)
 	for x in notificationAdded:
 		x()
 
@@ -26,16 +142,16 @@ def AddNotification(screen, *args, **kwargs):
 
 
 def AddNotificationWithCallback(fnc, screen, *args, **kwargs):
-	__AddNotification(fnc, screen, None, *args, **kwargs)
+	__AddNotification(fnc, screen, None, PRIORITY_NORMAL, *args, **kwargs)
 
 
 def AddNotificationParentalControl(fnc, screen, *args, **kwargs):
 	RemovePopup("Parental control")
-	__AddNotification(fnc, screen, "Parental control", *args, **kwargs)
+	__AddNotification(fnc, screen, "Parental control", PRIORITY_HIGH, *args, **kwargs)
 
 
 def AddNotificationWithID(id, screen, *args, **kwargs):
-	__AddNotification(None, screen, id, *args, **kwargs)
+	__AddNotification(None, screen, id, PRIORITY_NORMAL, *args, **kwargs)
 
 # we don't support notifications with callback and ID as this
 # would require manually calling the callback on cancelled popups.
@@ -43,13 +159,11 @@ def AddNotificationWithID(id, screen, *args, **kwargs):
 
 def RemovePopup(id):
 	# remove similiar notifications
-	for x in notifications:
-		if x[4] and x[4] == id:
-			print("[Notifications] RemovePopup id = %s" % id)
-			lock.acquire(True)
-			notifications.remove(x)
-			lock.release()
+	notifications.remove(id)
+	__closeCurrent(id)
+
 
+def __closeCurrent(id):
 	for x in current_notifications:
 		if x[0] == id:
 			print("[Notifications] found in current notifications")
@@ -59,11 +173,11 @@ def RemovePopup(id):
 from Screens.MessageBox import MessageBox
 
 
-def AddPopup(text, type, timeout, id=None):
+def AddPopup(text, type, timeout, id=None, priority=PRIORITY_NORMAL):
 	if id is not None:
-		RemovePopup(id)
+		__closeCurrent(id)  # a queued popup with this id is replaced by the new one
 	print("[Notifications] AddPopup, id =", id)
-	AddNotificationWithID(id, MessageBox, text=text, type=type, timeout=timeout, close_on_any_key=True)
+	__AddNotification(None, MessageBox, id, priority, text=text, type=type, timeout=timeout, close_on_any_key=True)
 
 
 def removeCIdialog():
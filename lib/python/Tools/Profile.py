@@ -1,56 +1,193 @@
 # -*- coding: utf-8 -*-
-# the implementation here is a bit crappy.
-import time
-from Tools.Directories import resolveFilename, SCOPE_CONFIG
+# Boot profiler.  StartEnigma marks the phases of the start with profile(),
+# the modules imported, the plugins and skins loaded and every profileSpan()
+# are traced nested below them until profile_final().  The trace is written
+# in the Chrome trace event format (chrome://tracing, Perfetto, speedscope),
+# the trace of the previous boot is kept and compared with the new one.
+#
+# Traces of other boots can be compared with:
+# PYTHONPATH=.:lib/python python lib/python/Tools/Profile.py old.json new.json
+import builtins
+import sys
+from contextlib import contextmanager
+from functools import wraps
+from json import dump, load
+from os import rename
+from threading import get_ident
+from time import perf_counter
 
-PERCENTAGE_START = 0
-PERCENTAGE_END = 100
+PROFILE_TRACE_FILE = "profile.json"
+PROFILE_PREVIOUS_TRACE_FILE = "profile.prev.json"
+PROFILE_REPORT_FILE = "profile.report"
+REPORT_LINES = 30
 
-profile_start = time.time()
 
-profile_data = {}
-total_time = 1
-profile_file = None
+class BootProfiler:
+	def __init__(self):
+		self.start = perf_counter()
+		self.thread = get_ident()
+		self.events = []  # (name, category, begin, end)
+		self.stack = []
+		self.phase = None
+		self.active = True
+		self.originalImport = builtins.__import__
+		builtins.__import__ = self.tracedImport
 
-try:
-	profile_old = open(resolveFilename(SCOPE_CONFIG, "profile"), "r").readlines()
+	def begin(self, name, category):
+		self.stack.append((name, category, perf_counter() - self.start))
 
-	t = None
-	for line in profile_old:
-		(t, id) = line[:-1].split('\t')
-		t = float(t)
-		total_time = t
-		profile_data[id] = t
-except:
-	print("no profile data available")
+	def end(self):
+		name, category, begin = self.stack.pop()
+		self.events.append((name, category, begin, perf_counter() - self.start))
 
-try:
-	profile_file = open(resolveFilename(SCOPE_CONFIG, "profile"), "w")
-except IOError:
-	print("WARNING: couldn't open profile file!")
+	def setPhase(self, name):
+		now = perf_counter() - self.start
+		if self.phase is not None:
+			self.events.append((self.phase[0], "phase", self.phase[1], now))
+		self.phase = (name, now) if name else None
+
+	def tracedImport(self, name, globals=None, locals=None, fromlist=(), level=0):
+		# only absolute imports of modules which are not loaded yet are traced
+		if level or name in sys.modules or not self.active or get_ident() != self.thread:
+			return self.originalImport(name, globals, locals, fromlist, level)
+		self.begin(name, "import")
+		try:
+			return self.originalImport(name, globals, locals, fromlist, level)
+		finally:
+			self.end()
+
+	def stop(self):
+		self.setPhase(None)
+		self.active = False
+		if builtins.__import__ == self.tracedImport:
+			builtins.__import__ = self.originalImport
+
+	def getTrace(self):
+		events = [{"name": name, "cat": category, "ph": "X", "ts": round(begin * 1000000), "dur": round((end - begin) * 1000000), "pid": 1, "tid": 1} for name, category, begin, end in self.events]
+		return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+
+def summarizeTrace(trace):
+	# (total, self) time in seconds per (category, name) of a trace
+	summary = {}
+	stack = []  # [end, key, duration, duration of the children]
+
+	def close(span):
+		total, own = summary.get(span[1], (0, 0))
+		summary[span[1]] = (total + span[2] / 1000000.0, own + (span[2] - span[3]) / 1000000.0)
+
+	for event in sorted(trace["traceEvents"], key=lambda event: (event["ts"], -event["dur"])):
+		while stack and stack[-1][0] <= event["ts"]:
+			close(stack.pop())
+		if stack:
+			stack[-1][3] += event["dur"]
+		stack.append([event["ts"] + event["dur"], (event["cat"], event["name"]), event["dur"], 0])
+	while stack:
+		close(stack.pop())
+	return summary
+
+
+def getTraceDuration(trace):
+	return max([(event["ts"] + event["dur"]) / 1000000.0 for event in trace["traceEvents"]] or [0])
+
+
+def compareTraces(old, new, lines=REPORT_LINES):
+	# the spans with the largest change of their own time between two boots
+	oldSummary = summarizeTrace(old)
+	newSummary = summarizeTrace(new)
+	oldDuration = getTraceDuration(old)
+	newDuration = getTraceDuration(new)
+	report = ["Boot took %.3fs, previous boot %.3fs (%+.3fs)." % (newDuration, oldDuration, newDuration - oldDuration), "", "%9s %9s %9s  %-8s %s" % ("change", "previous", "now", "category", "name")]
+	changes = []
+	for key in set(oldSummary) | set(newSummary):
+		oldTime = oldSummary.get(key, (0, 0))[1]
+		newTime = newSummary.get(key, (0, 0))[1]
+		changes.append((newTime - oldTime, oldTime, newTime, key))
+	changes.sort(key=lambda change: -abs(change[0]))
+	for delta, oldTime, newTime, (category, name) in changes[:lines]:
+		report.append("%+8.1fms %7.1fms %7.1fms  %-8s %s" % (delta * 1000, oldTime * 1000, newTime * 1000, category, name))
+	return report
+
+
+def writeTrace(profiler):
+	from Tools.Directories import SCOPE_CONFIG, resolveFilename
+	traceFile = resolveFilename(SCOPE_CONFIG, PROFILE_TRACE_FILE)
+	previousFile = resolveFilename(SCOPE_CONFIG, PROFILE_PREVIOUS_TRACE_FILE)
+	trace = profiler.getTrace()
+	try:
+		rename(traceFile, previousFile)
+	except OSError:
+		pass
+	try:
+		with open(traceFile, "w") as fd:
+			dump(trace, fd, separators=(",", ":"))
+	except OSError as err:
+		print("[Profile] Failed to write %s:" % traceFile, err)
+	try:
+		with open(previousFile, "r") as fd:
+			previous = load(fd)
+	except (OSError, ValueError):
+		return
+	report = compareTraces(previous, trace)
+	print("[Profile] %s" % report[0])
+	try:
+		with open(resolveFilename(SCOPE_CONFIG, PROFILE_REPORT_FILE), "w") as fd:
+			fd.write("\n".join(report) + "\n")
+	except OSError as err:
+		print("[Profile] Failed to write the report:", err)
+
+
+bootProfiler = None
 
 
 def profile(id):
-	now = time.time() - profile_start
-	if profile_file:
-		profile_file.write("%7.3f\t%s\n" % (now, id))
-
-		if id in profile_data:
-			t = profile_data[id]
-			if total_time:
-				perc = t * (PERCENTAGE_END - PERCENTAGE_START) / total_time + PERCENTAGE_START
-			else:
-				perc = PERCENTAGE_START
-			try:
-				f = open("/proc/progress", "w")
-				f.write("%d \n" % perc)
-				f.close()
-			except IOError:
-				pass
+	# start a new phase of the boot
+	global bootProfiler
+	if bootProfiler is None:
+		bootProfiler = BootProfiler()
+	if bootProfiler.active:
+		bootProfiler.setPhase(id)
+	try:
+		from enigma import eProfileWrite
+		eProfileWrite(id)  # progress display and the flat profile
+	except ImportError:
+		pass
+
+
+@contextmanager
+def profileSpan(name, category="span"):
+	if bootProfiler is None or not bootProfiler.active or get_ident() != bootProfiler.thread:
+		yield
+		return
+	bootProfiler.begin(name, category)
+	try:
+		yield
+	finally:
+		bootProfiler.end()
+
+
+def profileCall(category):
+	# decorator, calls are traced named after the function and its first argument
+	def decorator(func):
+		@wraps(func)
+		def wrapper(*args, **kwargs):
+			if bootProfiler is None or not bootProfiler.active:
+				return func(*args, **kwargs)
+			with profileSpan("%s %s" % (func.__name__, args[0] if args else ""), category):
+				return func(*args, **kwargs)
+		return wrapper
+	return decorator
 
 
 def profile_final():
-	global profile_file
-	if profile_file is not None:
-		profile_file.close()
-		profile_file = None
+	if bootProfiler is not None and bootProfiler.active:
+		bootProfiler.stop()
+		writeTrace(bootProfiler)
+
+
+if __name__ == "__main__":
+	with open(sys.argv[1], "r") as fd:
+		oldTrace = load(fd)
+	with open(sys.argv[2], "r") as fd:
+		newTrace = load(fd)
+	print("\n".join(compareTraces(oldTrace, newTrace)))
@@ -1,11 +1,24 @@
 # -*- coding: utf-8 -*-
 import time
 import os
+from heapq import heapify, heappop, heappush
+from json import dump, load
+from threading import Lock
 import enigma
 from Components.config import config
 from Components import Harddisk
 from twisted.internet import threads
 
+# index of the files in a trash folder, kept inside the trash folder
+TRASH_INDEX_FILE = ".e2trashindex"
+TRASH_INDEX_VERSION = 1
+# purge() runs in a thread and addToIndex() on the mainloop, both rewrite the
+# index. Files added to a trash folder while it is purged are queued and merged
+# by the purge, so the mainloop never waits for a purge to finish.
+indexLock = Lock()
+indexPurging = set()
+indexAdditions = {}
+
 
 def getTrashFolder(path):
 	# Returns trash folder without symlinks. Path may be file or directory or whatever.
@@ -101,28 +114,104 @@ class Trashcan:
 def purge(cleanset, ctimeLimit, reserveBytes):
 	# Remove expired items from trash, and attempt to have
 	# reserveBytes of free disk space.
+	eraser = enigma.eBackgroundFileEraser.getInstance()
 	for trash in cleanset:
 		if not os.path.isdir(trash):
 			print("[Trashcan] No trash.", trash)
-			return 0
+			continue
 		diskstat = os.statvfs(trash)
 		free = diskstat.f_bfree * diskstat.f_bsize
 		bytesToRemove = reserveBytes - free
-		candidates = []
 		print("[Trashcan] bytesToRemove", bytesToRemove, trash)
-		size = 0
-		for root, dirs, files in os.walk(trash, topdown=False):
+		with indexLock:
+			indexPurging.add(trash)
+		try:
+			index = TrashIndex(trash)
+			if not index.isValid():
+				index.rescan()
+			# The entries are a heap ordered by ctime (=deletion time), so only the removed items are visited.
+			entries = index.entries
+			removed = []
+			while entries and (entries[0][0] < ctimeLimit or bytesToRemove >= 0):
+				st_ctime, st_size, fn = heappop(entries)
+				if not os.path.exists(fn):
+					continue
+				if st_ctime < ctimeLimit:
+					print("[Trashcan] Too old:", fn, st_ctime)
+				eraser.erase(fn)
+				bytesToRemove -= st_size
+				removed.append(fn)
+			index.removeEmptyDirectories(removed)
+			with indexLock:
+				# A rescan may have found the queued files already.
+				known = set(entry[2] for entry in entries)
+				index.add([path for path in indexAdditions.pop(trash, []) if path not in known])
+				index.save()
+				indexPurging.discard(trash)
+		finally:
+			with indexLock:
+				# Without the merge the next purge notices the queued files.
+				indexAdditions.pop(trash, None)
+				indexPurging.discard(trash)
+		print("[Trashcan] Size after purging:", index.getSize(), trash)
+
+
+class TrashIndex:
+	# (ctime, size, path) of the files in a trash folder, stored as a heap so
+	# the files deleted first are purged first without walking the folder.
+	#
+	# MovieSelection adds the files it moves to the trash. When the mtime of
+	# the trash folder is not the one of the last update, the top level names
+	# are compared with the index and the folder is only walked again if they
+	# differ.
+	def __init__(self, trash):
+		self.trash = trash
+		self.filename = os.path.join(trash, TRASH_INDEX_FILE)
+		self.entries = []
+		self.mtime = None
+		try:
+			with open(self.filename, "r") as fd:
+				data = load(fd)
+			if data.get("version") == TRASH_INDEX_VERSION:
+				self.entries = [tuple(entry) for entry in data["entries"]]
+				self.mtime = data["mtime"]
+				heapify(self.entries)
+		except (IOError, OSError, ValueError, KeyError, TypeError, AttributeError):
+			self.entries = []
+			self.mtime = None
+
+	def getName(self, path):
+		return os.path.relpath(path, self.trash).split(os.sep, 1)[0]
+
+	def getSize(self):
+		return sum(entry[1] for entry in self.entries)
+
+	def isValid(self):
+		try:
+			mtime = os.stat(self.trash).st_mtime_ns
+			if mtime == self.mtime:
+				return True
+			# Files being erased by eBackgroundFileEraser are renamed to *.del.
+			names = set(name for name in os.listdir(self.trash) if name != TRASH_INDEX_FILE and not name.endswith(".del"))
+		except OSError:
+			return False
+		if names != set(self.getName(entry[2]) for entry in self.entries):
+			print("[Trashcan] Index does not match", self.trash)
+			return False
+		self.mtime = mtime
+		return True
+
+	def rescan(self):
+		print("[Trashcan] Rebuilding index", self.trash)
+		self.entries = []
+		for root, dirs, files in os.walk(self.trash, topdown=False):
 			for name in files:
+				if name.endswith(".del") or (name == TRASH_INDEX_FILE and root == self.trash):
+					continue
 				try:
 					fn = os.path.join(root, name)
 					st = os.stat(fn)
-					if st.st_ctime < ctimeLimit:
-						print("[Trashcan] Too old:", name, st.st_ctime)
-						enigma.eBackgroundFileEraser.getInstance().erase(fn)
-						bytesToRemove -= st.st_size
-					else:
-						candidates.append((st.st_ctime, fn, st.st_size))
-						size += st.st_size
+					self.entries.append((st.st_ctime, st.st_size, fn))
 				except Exception as e:
 					print("[Trashcan] Failed to stat %s:" % name, e)
 			# Remove empty directories if possible
@@ -131,16 +220,50 @@ def purge(cleanset, ctimeLimit, reserveBytes):
 					os.rmdir(os.path.join(root, name))
 				except:
 					pass
-		candidates.sort()
-		# Now we have a list of ctime, candidates, size. Sorted by ctime (=deletion time)
-		print("[Trashcan] Bytes to remove remaining:", bytesToRemove, trash)
-		for st_ctime, fn, st_size in candidates:
-			if bytesToRemove < 0:
+		heapify(self.entries)
+
+	def add(self, paths):
+		for path in paths:
+			try:
+				st = os.stat(path)
+				heappush(self.entries, (st.st_ctime, st.st_size, path))
+			except OSError as e:
+				print("[Trashcan] Failed to stat %s:" % path, e)
+
+	def removeEmptyDirectories(self, paths):
+		for directory in set(os.path.dirname(path) for path in paths):
+			while directory != self.trash and directory.startswith(self.trash):
+				try:
+					os.rmdir(directory)
+				except OSError:
+					break
+				directory = os.path.dirname(directory)
+
+	def save(self):
+		# Our own changes, including writing the index, are part of the index.
+		for attempt in range(2):
+			try:
+				self.mtime = os.stat(self.trash).st_mtime_ns
+				with open(self.filename, "w") as fd:
+					dump({"version": TRASH_INDEX_VERSION, "mtime": self.mtime, "entries": self.entries}, fd, separators=(',', ':'))
+				if os.stat(self.trash).st_mtime_ns == self.mtime:
+					break
+			except (IOError, OSError) as e:
+				print("[Trashcan] Failed to write %s:" % self.filename, e)
 				break
-			enigma.eBackgroundFileEraser.getInstance().erase(fn)
-			bytesToRemove -= st_size
-			size -= st_size
-		print("[Trashcan] Size after purging:", size, trash)
+
+
+def addToIndex(trash, paths):
+	# Records files just moved into the trash folder.
+	with indexLock:
+		if trash in indexPurging:
+			indexAdditions.setdefault(trash, []).extend(paths)
+			return
+		index = TrashIndex(trash)
+		index.add(paths)
+		if index.isValid():
+			index.save()
+		# Otherwise the trash folder is walked by the next purge.
 
 
 def cleanAll(trash):
@@ -1,8 +1,11 @@
 from glob import glob
+from marshal import dumps as marshalDumps, loads as marshalLoads
 from os.path import dirname, getmtime, isfile, join as pathjoin, splitext
-from os import listdir, unlink
+from os import listdir, makedirs, rename, stat, unlink
+from time import time
 from traceback import print_exc
-from xml.etree.ElementTree import Element, ElementTree, fromstring
+from weakref import WeakKeyDictionary
+from xml.etree.ElementTree import Element, ElementTree, SubElement, fromstring
 
 from enigma import BT_ALPHABLEND, BT_ALPHATEST, BT_HALIGN_CENTER, BT_HALIGN_LEFT, BT_HALIGN_RIGHT, BT_KEEP_ASPECT_RATIO, BT_SCALE, BT_VALIGN_BOTTOM, BT_VALIGN_CENTER, BT_VALIGN_TOP, addFont, eLabel, eListbox, eListboxPythonMultiContent, ePixmap, ePoint, eRect, eRectangle, eSize, eSlider, eSubtitleWidget, eWidget, eWindow, eWindowStyleManager, eWindowStyleSkinned, getDesktop, gFont, getFontFaces, gMainDC, gRGB
 
@@ -12,6 +15,7 @@ from Components.Sources.Source import ObsoleteSource
 from Tools.Directories import SCOPE_CONFIG, SCOPE_LCDSKIN, SCOPE_GUISKIN, SCOPE_FONTS, SCOPE_SKINS, pathExists, resolveFilename, fileReadLines, fileReadXML
 from Tools.Import import my_import
 from Tools.LoadPixmap import LoadPixmap
+from Tools.Profile import profileCall
 
 MODULE_NAME = __name__.split(".")[-1].capitalize()
 
@@ -62,6 +66,19 @@ config.skin.primary_skin = ConfigText(default=DEFAULT_SKIN)
 config.skin.display_skin = ConfigText(default=DEFAULT_DISPLAY_SKIN)
 config.skin.FallbackFont = ConfigSelection(default="fallback.font", choices=[("fallback.font", "Fallback Font 1"), ("AbyssinicaSIL-Regular.ttf", "Fallback Font 2")])
 config.skin.autorefresh = ConfigEnableDisable(default=False)
+# Parsed skin files are kept in this directory, see readSkinXML().
+SKIN_CACHE_DIR = resolveFilename(SCOPE_CONFIG, "skincache/")
+SKIN_CACHE_VERSION = 1
+# Results of the attribute parsers, these are only valid for the current colors,
+# fonts and resolutions and so they are cleared whenever skin data is loaded.
+parseCache = {}
+# Results of collectAttributes() for each skin node, they go with the node when
+# an embedded skin is dropped.  Cleared together with the parseCache.
+attributeCache = WeakKeyDictionary()
+embeddedSkins = {}  # Dictionary of parsed embedded screen skins.
+layoutStatistics = {}  # Dictionary of [compiles, compile time, cached applies, cached apply time] for each screen.
+layoutMisses = 0  # Number of collectAttributes() calls which were not answered from the attributeCache.
+
 currentPrimarySkin = None
 currentDisplaySkin = None
 callbacks = []
@@ -158,6 +175,7 @@ def InitSkins():
 
 # Method to load a skin XML file into the skin data structures.
 #
+@profileCall("skin")
 def loadSkin(filename, scope=SCOPE_SKINS, desktop=getDesktop(GUI_SKIN_ID), screenID=GUI_SKIN_ID):
 	global windowStyles, resolutions
 	filename = resolveFilename(scope, filename)
@@ -166,11 +184,13 @@ def loadSkin(filename, scope=SCOPE_SKINS, desktop=getDesktop(GUI_SKIN_ID), scree
 	debugMode = "config.crash.debugSkin=True" in lines
 	if debugMode:
 		print(f"[Skin] Loading skin file '{filename}'.")
-	domSkin = fileReadXML(filename, source=MODULE_NAME)
+	domSkin = readSkinXML(filename)
 	if domSkin is not None:
 		# For loadSingleSkinData colors, bordersets etc. are applied one after
 		# the other in order of ascending priority.
 		loadSingleSkinData(desktop, screenID, domSkin, filename, scope=scope)
+		parseCache.clear()
+		attributeCache.clear()
 		resolution = resolutions.get(screenID, (0, 0, 0))
 		if debugMode:
 			print(f"[Skin] Skin resolution is {resolution[0]}x{resolution[1]} and color depth is {resolution[2]} bits.")
@@ -207,9 +227,60 @@ def loadSkin(filename, scope=SCOPE_SKINS, desktop=getDesktop(GUI_SKIN_ID), scree
 	return False
 
 
+# Method to read a skin XML file.  The parsed DOM is also stored in the skin cache
+# as marshal data, which is used instead of the XML file as long as the size and
+# modification time of the XML file are unchanged.
+#
+def readSkinXML(filename):
+	def elementToData(element):
+		children = [elementToData(child) for child in element]
+		text = element.text if not children or (element.text and not element.text.isspace()) else None  # Drop the indentation.
+		tail = element.tail if element.tail and not element.tail.isspace() else None
+		if children or text is not None or tail is not None:
+			return (element.tag, element.attrib, text, tail, children)
+		return (element.tag, element.attrib)
+
+	def dataToElement(data, parent=None):
+		element = Element(data[0], data[1]) if parent is None else SubElement(parent, data[0], data[1])
+		if len(data) > 2:
+			element.text = data[2]
+			element.tail = data[3]
+			for child in data[4]:
+				dataToElement(child, element)
+		return element
+
+	try:
+		status = stat(filename)
+	except OSError:
+		return fileReadXML(filename, source=MODULE_NAME)  # Let fileReadXML() report the error.
+	key = [SKIN_CACHE_VERSION, filename, status.st_mtime_ns, status.st_size]
+	cacheName = filename.strip("/").replace("/", "_")
+	cacheFilename = pathjoin(SKIN_CACHE_DIR, f"{cacheName}.bin")
+	try:
+		with open(cacheFilename, "rb") as fd:
+			data = marshalLoads(fd.read())  # Reading all at once is a lot faster than marshal.load().
+		if data[0] == key:
+			return dataToElement(data[1])
+	except (OSError, EOFError, ValueError, TypeError, IndexError):
+		pass
+	domSkin = fileReadXML(filename, source=MODULE_NAME)
+	if domSkin is not None:
+		try:
+			makedirs(SKIN_CACHE_DIR, exist_ok=True)
+			with open(f"{cacheFilename}.tmp", "wb") as fd:
+				fd.write(marshalDumps((key, elementToData(domSkin))))
+			rename(f"{cacheFilename}.tmp", cacheFilename)
+		except (OSError, ValueError) as err:
+			print(f"[Skin] Error: Unable to write skin cache file '{cacheFilename}'!  ({err})")
+	return domSkin
+
+
 def reloadSkins():
 	global colors, domScreens, fonts, menus, parameters, setups, switchPixmap
 	domScreens.clear()
+	parseCache.clear()
+	attributeCache.clear()
+	embeddedSkins.clear()
 	colors.clear()
 	colors = {
 		"key_back": gRGB(0x00313131),
@@ -243,7 +314,7 @@ def loadSkinTemplates(skinTemplatesFileNames):
 	if skinTemplatesFileNames:
 		for skinTemplatesFileName in skinTemplatesFileNames:
 			print(f"[Skin] Loading XML templates from '{skinTemplatesFileName}'.")
-			domStyles = fileReadXML(skinTemplatesFileName, source=MODULE_NAME)
+			domStyles = readSkinXML(skinTemplatesFileName)
 			if domStyles is not None:
 				for template in domStyles.findall("template"):
 					addTemplate(template, skinTemplatesFileName)
@@ -349,6 +420,9 @@ def parseBoolean(attribute, value):
 
 
 def parseColor(value, default=0x00FFFFFF):
+	key = ("color", value, default)
+	if key in parseCache:
+		return parseCache[key]
 	if value[0] == "#":
 		try:
 			value = gRGB(int(value[1:], 0x10))
@@ -360,6 +434,7 @@ def parseColor(value, default=0x00FFFFFF):
 	else:
 		skinError(f"The color '{value}' must be #aarrggbb or valid named color, using #{default:08X}")
 		value = gRGB(default)
+	parseCache[key] = value
 	return value
 
 
@@ -411,6 +486,9 @@ def parseCoordinate(value, parent, size=0, font=None, scale=(1, 1)):
 			return max(int((parent - size) // 2) if size else 0, 0)
 		elif value == "*":
 			return None
+		key = ("coordinate", value, parent, size, font, scale)
+		if key in parseCache:
+			return parseCache[key]
 		if font is None:
 			font = "Body"
 			if "w" in value or "h" in value:
@@ -438,11 +516,15 @@ def parseCoordinate(value, parent, size=0, font=None, scale=(1, 1)):
 			except Exception as err:
 				print(f"[Skin] Error ({type(err).__name__} - {err}): Coordinate '{value}', calculated to '{val}', can't be evaluated!")
 				result = 0
+		parseCache[key] = 0 if result < 0 else result
 	# print(f"[Skin] parseCoordinate DEBUG: value='{value}', parent='{parent}', size={size}, font='{font}', scale='{scale}', result='{result}'.")
 	return 0 if result < 0 else result
 
 
 def parseFont(value, scale=((1, 1), (1, 1))):
+	key = ("font", value, scale)
+	if key in parseCache:
+		return parseCache[key]
 	if ";" in value:
 		(name, size) = value.split(";")
 		try:
@@ -468,7 +550,8 @@ def parseFont(value, scale=((1, 1), (1, 1))):
 			name = font[0]
 			size = font[1] if size is None else size
 	# print(f"[Skin] DEBUG: Scale font {size} -> {int(size * scale[1][0] / scale[1][1])}.")
-	return gFont(name, int(size * scale[1][0] / scale[1][1]))
+	font = parseCache[key] = gFont(name, int(size * scale[1][0] / scale[1][1]))
+	return font
 
 
 def parseGradient(value):
@@ -849,6 +932,21 @@ def parseZoom(mode, zoomType):
 
 
 def collectAttributes(skinAttributes, node, context, skinPath=None, ignore=(), filenames=frozenset(("pixmap", "pointer", "seekPointer", "seek_pointer", "backgroundPixmap", "selectionPixmap", "sliderPixmap", "scrollbarBackgroundPixmap", "scrollbarForegroundPixmap", "scrollbarbackgroundPixmap", "scrollbarBackgroundPicture", "scrollbarSliderPicture"))):
+	global layoutMisses
+	# The result only depends on the node and the state of the context, which is
+	# changed by the layout contexts, so both the attributes and the new context
+	# state are remembered.
+	key = (skinPath, ignore, filenames, context.__class__, tuple(sorted(context.__dict__.items())))
+	nodeCache = attributeCache.get(node)
+	if nodeCache is None:
+		nodeCache = attributeCache[node] = {}
+	cached = nodeCache.get(key)
+	if cached is not None:
+		skinAttributes.extend(cached[0])
+		context.__dict__.update(cached[1])
+		return
+	layoutMisses += 1
+	start = len(skinAttributes)
 	size = None
 	pos = None
 	font = None
@@ -858,13 +956,17 @@ def collectAttributes(skinAttributes, node, context, skinPath=None, ignore=(), f
 		if attrib not in ignore:
 			newValue = value
 			if attrib in filenames:
-				# DEBUG: Why does a SCOPE_LCDSKIN image replace the GUI image?!?!?!
-				pngFile = resolveFilename(SCOPE_GUISKIN, value, path_prefix=skinPath)
-				if isfile(pngFile):
-					newValue = pngFile
-				else:
-					lcdFile = resolveFilename(SCOPE_LCDSKIN, value, path_prefix=skinPath)
-					newValue = lcdFile if isfile(lcdFile) else pngFile
+				fileKey = ("filename", value, skinPath)
+				newValue = parseCache.get(fileKey)
+				if newValue is None:
+					# DEBUG: Why does a SCOPE_LCDSKIN image replace the GUI image?!?!?!
+					pngFile = resolveFilename(SCOPE_GUISKIN, value, path_prefix=skinPath)
+					if isfile(pngFile):
+						newValue = pngFile
+					else:
+						lcdFile = resolveFilename(SCOPE_LCDSKIN, value, path_prefix=skinPath)
+						newValue = lcdFile if isfile(lcdFile) else pngFile
+					parseCache[fileKey] = newValue
 			# Bit of a hack this, really.  When a window has a flag (e.g. wfNoBorder)
 			# it needs to be set at least before the size is set, in order for the
 			# window dimensions to be calculated correctly in all situations.
@@ -896,6 +998,7 @@ def collectAttributes(skinAttributes, node, context, skinPath=None, ignore=(), f
 		skinAttributes.append(("position", pos))
 	if size is not None:  # The "size" attribute must be after the "position" attribute.
 		skinAttributes.append(("size", size))
+	nodeCache[key] = (skinAttributes[start:], dict(context.__dict__))
 
 
 class AttributeParser:
@@ -2147,6 +2250,8 @@ class SkinError(Exception):
 
 
 def readSkin(screen, skin, names, desktop):
+	startTime = time()
+	startMisses = layoutMisses
 	if not isinstance(names, list):
 		names = [names]
 	for name in names:  # Try all skins, first existing one has priority.
@@ -2174,19 +2279,25 @@ def readSkin(screen, skin, names, desktop):
 			skin = screen.skin[0] % tuple([int(x * getSkinFactor()) for x in screen.skin[1:]])
 		else:
 			skin = screen.skin
-		print(f"[Skin] Parsing embedded skin '{myName}'.")
-		if isinstance(skin, tuple):
-			for xml in skin:
-				candidate = fromstring(xml)
-				if candidate.tag == "screen":
-					screenID = candidate.attrib.get("id")
-					if (not screenID) or (parseInteger(screenID) == DISPLAY_SKIN_ID):
-						myScreen = candidate
-						break
+		myScreen = embeddedSkins.get(skin)  # Embedded skins are parsed once for all instances of a screen.
+		if myScreen is None:
+			print(f"[Skin] Parsing embedded skin '{myName}'.")
+			if isinstance(skin, tuple):
+				for xml in skin:
+					candidate = fromstring(xml)
+					if candidate.tag == "screen":
+						screenID = candidate.attrib.get("id")
+						if (not screenID) or (parseInteger(screenID) == DISPLAY_SKIN_ID):
+							myScreen = candidate
+							break
+				else:
+					print("[Skin] No suitable screen found!")
 			else:
-				print("[Skin] No suitable screen found!")
-		else:
-			myScreen = fromstring(skin)
+				myScreen = fromstring(skin)
+			if myScreen is not None:
+				if len(embeddedSkins) >= 256:  # Screens which build their skin at run time must not fill the memory.
+					embeddedSkins.clear()
+				embeddedSkins[skin] = myScreen
 		if myScreen is not None:
 			screen.parsedSkin = myScreen
 	if myScreen is None:
@@ -2476,6 +2587,19 @@ def readSkin(screen, skin, names, desktop):
 	except Exception as err:
 		print(f"[Skin] Error: Screen '{myName}' {str(err)}!")
 		print_exc()
+	# Statistics of the screen layouts, a layout is compiled if any of its attributes had to be parsed.
+	duration = time() - startTime
+	statistics = layoutStatistics.setdefault(myName, [0, 0.0, 0, 0.0])
+	if layoutMisses == startMisses:
+		statistics[2] += 1
+		statistics[3] += duration
+		mode = "applied from cache"
+	else:
+		statistics[0] += 1
+		statistics[1] += duration
+		mode = "compiled"
+	if config.crash.debugScreens.value:
+		print(f"[Skin] Screen '{myName}' layout {mode} in {duration * 1000:.1f}ms.")
 
 	from Components.GUIComponent import GUIComponent
 	unusedComponents = [x for x in set(screen.keys()) - usedComponents if isinstance(x, GUIComponent)]
@@ -2487,11 +2611,21 @@ def readSkin(screen, skin, names, desktop):
 	usedComponents = None
 
 
+# Return the layout statistics of all screens as a list of (name, compiles, compile
+# time, cached applies, cached apply time) sorted by the total time spent.
+#
+def getLayoutStatistics():
+	return sorted([(name,) + tuple(values) for name, values in layoutStatistics.items()], key=lambda x: x[2] + x[4], reverse=True)
+
+
 # Return a set of all the widgets found in a screen. Panels will be expanded
 # recursively until all referenced widgets are captured. This code only performs
 # a simple scan of the XML and no skin processing is performed.
 #
 def findWidgets(name):
+	key = ("widgets", name)
+	if key in parseCache:
+		return parseCache[key]
 	widgetSet = set()
 	element, path = domScreens.get(name, (None, None))
 	if element is not None:
@@ -2514,6 +2648,7 @@ def findWidgets(name):
 				name = panel.get("name", None)
 				if name:
 					widgetSet.update(findWidgets(name))
+	widgetSet = parseCache[key] = frozenset(widgetSet)
 	return widgetSet
 
 
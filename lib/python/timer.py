@@ -1,5 +1,7 @@
 # -*- coding: utf-8 -*-
 from bisect import insort
+from heapq import heappop, heappush
+from itertools import count
 from time import time, localtime, mktime
 from enigma import eTimer
 import datetime
@@ -150,6 +152,19 @@ class Timer:
 		self.timer_list = []
 		self.processed_timers = []
 
+		# priority queue of the entries in timer_list, keyed on getNextActivation().
+		# when an entry is queued again its older heap items become stale and are
+		# dropped when they reach the top (lazy invalidation). disabled entries
+		# are parked until they get enabled again.
+		# everything which changes the activation time of an entry in timer_list
+		# has to call timeChanged(), checkActivations() still catches entries
+		# which were moved earlier without it.
+		self.activations = []
+		self.activation_seq = {}
+		self.activation_counter = count()
+		self.activation_list = self.timer_list
+		self.parked_activations = {}
+
 		self.timer = eTimer()
 		self.timer.callback.append(self.calcNextActivation)
 		self.lastActivation = time()
@@ -186,6 +201,7 @@ class Timer:
 		else:
 			if entry not in self.timer_list:
 				insort(self.timer_list, entry)
+			self.queueActivation(entry)
 			if not noRecalc:
 				self.calcNextActivation()
 
@@ -210,6 +226,62 @@ class Timer:
 #		else:
 #			print("no NAV")
 
+	def queueActivation(self, entry):
+		seq = next(self.activation_counter)
+		self.activation_seq[id(entry)] = seq
+		self.parked_activations.pop(id(entry), None)
+		heappush(self.activations, (entry.getNextActivation(), seq, entry))
+
+	def dequeueActivation(self, entry):
+		self.activation_seq.pop(id(entry), None)
+		self.parked_activations.pop(id(entry), None)
+
+	def rebuildActivations(self):
+		self.activations = []
+		self.activation_seq = {}
+		self.parked_activations = {}
+		self.activation_list = self.timer_list
+		for entry in self.timer_list:
+			self.queueActivation(entry)
+
+	def checkActivations(self):
+		# the heap is rebuilt when most of its items are stale, or when an entry
+		# is due before the first one of the heap (its time was changed without
+		# timeChanged()), this replaces the sort of timer_list on every tick.
+		if len(self.activations) > 2 * len(self.activation_seq) + 64:
+			self.rebuildActivations()
+			return
+		first = self.getFirstActivation()
+		when = first.getNextActivation() if first is not None else None
+		for entry in self.timer_list:
+			if not entry.disabled and (when is None or entry.getNextActivation() < when):
+				print("[timer] Activation of %s was changed without timeChanged(), requeueing the timers." % entry)
+				self.rebuildActivations()
+				return
+
+	def getFirstActivation(self):
+		# returns the enabled entry of timer_list which has to be activated first
+		if self.activation_list is not self.timer_list:
+			self.rebuildActivations()
+		if self.parked_activations:
+			for entry in [entry for entry in self.parked_activations.values() if not entry.disabled]:
+				self.queueActivation(entry)
+		heap = self.activations
+		while heap:
+			when, seq, entry = heap[0]
+			if self.activation_seq.get(id(entry)) != seq:
+				heappop(heap)
+			elif entry.disabled:
+				heappop(heap)
+				del self.activation_seq[id(entry)]
+				self.parked_activations[id(entry)] = entry
+			elif entry.getNextActivation() != when:
+				heappop(heap)
+				self.queueActivation(entry)
+			else:
+				return entry
+		return None
+
 	def setNextActivation(self, now, when):
 		delay = int((when - now) * 1000)
 		self.timer.start(delay, 1)
@@ -226,17 +298,16 @@ class Timer:
 				x.resetState()
 				self.addTimerEntry(x, noRecalc=1)
 
+		self.checkActivations()
 		self.processActivation()
 		self.lastActivation = now
 
 		min = int(now) + self.MaxWaitTime
 
-		self.timer_list and self.timer_list.sort()  # resort/refresh list, try to fix hanging timers
-
 		# calculate next activation point
-		timer_list = [t for t in self.timer_list if not t.disabled]
-		if timer_list:
-			w = timer_list[0].getNextActivation()
+		entry = self.getFirstActivation()
+		if entry is not None:
+			w = entry.getNextActivation()
 			if w < min:
 				min = w
 
@@ -258,6 +329,7 @@ class Timer:
 			except:
 				print("[timer] Failed to remove, not in list")
 				return
+			self.dequeueActivation(timer)
 		# give the timer a chance to re-enqueue
 		if timer.state == TimerEntry.StateEnded:
 			timer.state = TimerEntry.StateWaiting
@@ -265,6 +337,7 @@ class Timer:
 
 	def doActivate(self, w):
 		self.timer_list.remove(w)
+		self.dequeueActivation(w)
 
 		# when activating a timer which has already passed,
 		# simply abort the timer. don't run trough all the stages.
@@ -281,6 +354,7 @@ class Timer:
 		if w.state < TimerEntry.StateEnded:
 			# no, sort it into active list
 			insort(self.timer_list, w)
+			self.queueActivation(w)
 		else:
 			# yes. Process repeated, and re-add.
 			if w.repeated:
@@ -297,8 +371,8 @@ class Timer:
 		t = int(time()) + 1
 		# we keep on processing the first entry until it goes into the future.
 		while True:
-			timer_list = [tmr for tmr in self.timer_list if not tmr.disabled]
-			if timer_list and timer_list[0].getNextActivation() < t:
-				self.doActivate(timer_list[0])
+			entry = self.getFirstActivation()
+			if entry is not None and entry.getNextActivation() < t:
+				self.doActivate(entry)
 			else:
 				break
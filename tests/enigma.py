@@ -307,6 +307,10 @@ class eActionMap:
 		pass
 
 
+def eProfileWrite(checkpoint):
+	pass
+
+
 # ENIGMA STARTUP:
 
 def init_nav():
@@ -0,0 +1,66 @@
+# -*- coding: utf-8 -*-
+# A minimal enigma module for the benchmarks.  The fake in enigma.py sets up
+# the paths, the config and the navigation, which imports most of the GUI.
+# install() it before any enigma2 module is imported.
+import sys
+import types
+
+
+class eTimer:
+	def __init__(self):
+		self.callback = []
+		self.active = False
+
+	def start(self, msec, singleshot=False):
+		self.active = True
+
+	def startLongTimer(self, seconds):
+		self.active = True
+
+	def stop(self):
+		self.active = False
+
+	def isActive(self):
+		return self.active
+
+
+class eEnv:
+	@staticmethod
+	def resolve(path):
+		for variable, value in (("${sysconfdir}", "/etc"), ("${datadir}", "/usr/share"), ("${libdir}", "/usr/lib")):
+			path = path.replace(variable, value)
+		return path
+
+
+class eActionMap:
+	@staticmethod
+	def getInstance():
+		return None
+
+
+def getDesktop(screen):
+	return None
+
+
+def eGetEnigmaDebugLvl():
+	return 0
+
+
+def getPrevAsciiCode():
+	return 0
+
+
+def eProfileWrite(checkpoint):
+	pass
+
+
+def fakeModule(name, **attributes):
+	# replaces a module which can't be imported without the GUI
+	module = types.ModuleType(name)
+	module.__dict__.update(attributes)
+	sys.modules[name] = module
+	return module
+
+
+def install():
+	sys.modules["enigma"] = sys.modules[__name__]
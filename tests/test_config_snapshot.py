@@ -0,0 +1,85 @@
+# -*- coding: utf-8 -*-
+# startup benchmark for the settings snapshot, run with
+# PYTHONPATH=.:..:../lib/python/ python test_config_snapshot.py
+import fake_enigma
+import os
+import random
+import tempfile
+import time
+
+import tests
+
+
+def createSettings(filename, sections, entries):
+	rnd = random.Random(sections * entries)
+	lines = []
+	for section in range(sections):
+		for entry in range(entries):
+			lines.append("config.bench%d.sub%d.entry%d=%d\n" % (section, entry % 5, entry, rnd.randrange(1000)))
+	with open(filename, "w") as fd:
+		fd.writelines(lines)
+	return len(lines)
+
+
+def test_config_snapshot(sections=60, entries=50):
+	fake_enigma.install()
+	fake_enigma.fakeModule("Components.Harddisk", harddiskmanager=None)
+	fake_enigma.fakeModule("Components.Language", language=None)
+	from Components.config import ConfigFile, ConfigSelection, ConfigSubsection, config
+
+	directory = tempfile.mkdtemp()
+	configFile = ConfigFile()
+	configFile.CONFIG_FILE = os.path.join(directory, "settings")
+	configFile.SNAPSHOT_FILE = os.path.join(directory, "settings.snapshot")
+	count = createSettings(configFile.CONFIG_FILE, sections, entries)
+
+	start = time.perf_counter()
+	with open(configFile.CONFIG_FILE) as fd:
+		config.setSavedValue(config.parseLines(fd))
+	text_time = time.perf_counter() - start
+	text = config.pickle()
+
+	with open(configFile.CONFIG_FILE) as fd:
+		configFile.saveSnapshot(config.parseLines(fd))
+	start = time.perf_counter()
+	config.setSavedValue(configFile.loadSnapshot())
+	snapshot_time = time.perf_counter() - start
+
+	print("[test_config_snapshot] %d lines: text %.2fms, snapshot %.2fms" % (count, text_time * 1000, snapshot_time * 1000))
+
+	if config.pickle() != text:
+		raise tests.TestError("snapshot differs from the settings file")
+	os.utime(configFile.CONFIG_FILE, ns=(0, 0))
+	if configFile.loadSnapshot() is not None:
+		raise tests.TestError("outdated snapshot was used")
+
+	# only the save at shutdown writes the snapshot, from the settings in memory
+	os.remove(configFile.SNAPSHOT_FILE)
+	config.unpickle(text.splitlines())
+	configFile.save(immediate=True)
+	if os.path.exists(configFile.SNAPSHOT_FILE):
+		raise tests.TestError("snapshot was written by a normal save")
+	configFile.save(snapshot=True)
+	snapshot = configFile.loadSnapshot()
+	if snapshot is None:
+		raise tests.TestError("snapshot was not written by the shutdown save")
+	config.setSavedValue(snapshot)
+	if config.pickle() != text:
+		raise tests.TestError("snapshot of the shutdown save differs from the settings file")
+
+	# a load right after a save reads the saved settings, not the file before it
+	os.remove(configFile.SNAPSHOT_FILE)
+	config.benchload = ConfigSubsection()
+	config.benchload.mode = ConfigSelection(choices=["fast", "slow", "off"], default="fast")
+	config.benchload.mode.value = "slow"
+	config.benchload.mode.save()
+	configFile.save(immediate=True)
+	config.benchload.mode.value = "off"
+	config.benchload.mode.save()
+	configFile.save()
+	configFile.load()
+	if config.benchload.mode.saved_value != "off":
+		raise tests.TestError("load lost the pending save")
+
+
+test_config_snapshot()
@@ -0,0 +1,84 @@
+# -*- coding: utf-8 -*-
+# benchmark for the folder size cache, run with
+# PYTHONPATH=.:..:../lib/python/ python test_foldersize.py
+import os
+import tempfile
+import time
+
+import fake_enigma
+import tests
+
+
+def createTree(path, directories, files):
+	for directory in range(directories):
+		dirpath = os.path.join(path, "dir%d" % directory, "sub")
+		os.makedirs(dirpath)
+		for file in range(files):
+			with open(os.path.join(dirpath, "file%d" % file), "wb") as fd:
+				fd.write(b"x" * (file * 512))
+	# hardlinks are only counted once
+	os.link(os.path.join(path, "dir0", "sub", "file1"), os.path.join(path, "dir1", "link"))
+
+
+def walkSize(path):
+	total = 0
+	have = set()
+	for dirpath, dirnames, filenames in os.walk(path):
+		total += os.lstat(dirpath).st_blocks * 512
+		for name in filenames:
+			st = os.lstat(os.path.join(dirpath, name))
+			if (st.st_dev, st.st_ino) not in have:
+				have.add((st.st_dev, st.st_ino))
+				total += st.st_blocks * 512
+	return total
+
+
+def test_foldersize(directories=100, files=50):
+	fake_enigma.install()
+	from Components.FolderSize import MAX_AGE, FolderSizeCache
+
+	path = tempfile.mkdtemp()
+	createTree(path, directories, files)
+	cache = FolderSizeCache(os.path.join(tempfile.mkdtemp(), "foldersize.cache"))
+
+	start = time.perf_counter()
+	size = cache.getSizeSync(path)
+	scan_time = time.perf_counter() - start
+	# the files are new, so wait for them to become old for the cached run
+	for key, entry in list(cache.directories.items()):
+		cache.directories[key] = entry[:4] + (False,) + entry[5:]
+	start = time.perf_counter()
+	cached = cache.getSizeSync(path)
+	cached_time = time.perf_counter() - start
+
+	print("[test_foldersize] %d files: scan %.3fs, cached %.3fs" % (directories * files, scan_time, cached_time))
+
+	expected = walkSize(path)
+	if size != expected or cached != expected:
+		raise tests.TestError("size %d/%d differs from %d" % (size, cached, expected))
+	os.remove(os.path.join(path, "dir2", "sub", "file3"))
+	if cache.getSizeSync(path) != walkSize(path):
+		raise tests.TestError("removed file was not noticed")
+	# unchanged directories are not written again
+	cache.dirty = False
+	cache.getSizeSync(path)
+	if cache.dirty:
+		raise tests.TestError("unchanged sizes made the cache dirty")
+	# a file grown in place does not change the mtime of its directory
+	directory = os.path.join(path, "dir3", "sub")
+	mtime = os.stat(directory).st_mtime_ns
+	with open(os.path.join(directory, "file4"), "ab") as fd:
+		fd.write(b"x" * 65536)
+	os.utime(directory, ns=(mtime, mtime))
+	key = os.path.normpath(directory)
+	cache.directories[key] = cache.directories[key][:4] + (False, time.time() - MAX_AGE - 1)
+	if cache.getSizeSync(path) != walkSize(path):
+		raise tests.TestError("file grown in place was not noticed after MAX_AGE")
+	cache.save(force=True)
+	reloaded = FolderSizeCache(cache.filename)
+	reloaded.load()
+	if reloaded.totals.get(path) != walkSize(path):
+		raise tests.TestError("size was not stored")
+
+
+test_foldersize()
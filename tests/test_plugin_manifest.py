@@ -0,0 +1,181 @@
+# -*- coding: utf-8 -*-
+# benchmark for the lazy plugin loading, run with
+# PYTHONPATH=.:..:../lib/python/ python test_plugin_manifest.py
+import gc
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import fake_enigma
+import tests
+
+PLUGIN_SOURCE = """from Plugins.Plugin import PluginDescriptor
+
+# the work a plugin does when it is imported
+TABLE = [("entry %%d" %% i) * 8 for i in range(%d)]
+SHOWN = ["setup"]
+
+
+def main(session, **kwargs):
+	return len(TABLE)
+
+
+def menu(menuid, **kwargs):
+	return [("Bench", main, "bench", 50)] if menuid in SHOWN else []
+
+
+def Plugins(**kwargs):
+	return [
+		PluginDescriptor(name="Bench %d", description="benchmark plugin", where=PluginDescriptor.WHERE_PLUGINMENU, icon="plugin.png", fnc=main),
+		PluginDescriptor(name="Bench %d", where=PluginDescriptor.WHERE_MENU, fnc=menu)
+	]
+"""
+
+CONFIG_PLUGIN_SOURCE = """from Components.config import ConfigSelection, ConfigSubsection, config
+from Plugins.Plugin import PluginDescriptor
+
+config.plugins.benchconfig = ConfigSubsection()
+config.plugins.benchconfig.mode = ConfigSelection(choices=["fast", "slow"], default="fast")
+
+
+def main(session, **kwargs):
+	pass
+
+
+def Plugins(**kwargs):
+	return PluginDescriptor(name="Bench config", where=PluginDescriptor.WHERE_PLUGINMENU, fnc=main)
+"""
+
+
+NESTED_CONFIG_PLUGIN_SOURCE = """from Components.config import ConfigSelection, config
+from Plugins.Plugin import PluginDescriptor
+
+config.usage.benchnested = ConfigSelection(choices=["on", "off"], default="on")
+
+
+def main(session, **kwargs):
+	pass
+
+
+def Plugins(**kwargs):
+	return PluginDescriptor(name="Bench config nested", where=PluginDescriptor.WHERE_PLUGINMENU, fnc=main)
+"""
+
+
+def createConfigPlugins(path):
+	# plugins which define settings when they are imported, in a section of
+	# their own and in a section which is already there
+	os.makedirs(os.path.join(path, "BenchConfig"))
+	open(os.path.join(path, "BenchConfig", "__init__.py"), "w").close()
+	for name, source in (("Settings", CONFIG_PLUGIN_SOURCE), ("Nested", NESTED_CONFIG_PLUGIN_SOURCE)):
+		directory = os.path.join(path, "BenchConfig", name)
+		os.mkdir(directory)
+		open(os.path.join(directory, "__init__.py"), "w").close()
+		with open(os.path.join(directory, "plugin.py"), "w") as fd:
+			fd.write(source)
+
+
+def createPlugins(path, count, size):
+	category = os.path.join(path, "Bench")
+	os.makedirs(category)
+	open(os.path.join(category, "__init__.py"), "w").close()
+	for plugin in range(count):
+		directory = os.path.join(category, "Plugin%d" % plugin)
+		os.mkdir(directory)
+		open(os.path.join(directory, "__init__.py"), "w").close()
+		with open(os.path.join(directory, "plugin.py"), "w") as fd:
+			fd.write(PLUGIN_SOURCE % (size, plugin, plugin))
+
+
+def unloadPlugins():
+	for name in [name for name in sys.modules if name.startswith("Plugins.Bench")]:
+		del sys.modules[name]
+	gc.collect()
+
+
+def loadedPlugins():
+	return len([name for name in sys.modules if name.startswith("Plugins.Bench.") and name.endswith(".plugin")])
+
+
+def readPlugins(component, path):
+	tracemalloc.start()
+	start = time.perf_counter()
+	component.readPluginList(path, lazy=True)
+	duration = time.perf_counter() - start
+	memory = tracemalloc.get_traced_memory()[0]
+	tracemalloc.stop()
+	return component, duration, memory
+
+
+def test_plugin_manifest(count=50, size=5000):
+	fake_enigma.install()
+	fake_enigma.fakeModule("Components.Harddisk", harddiskmanager=None)
+	fake_enigma.fakeModule("Components.Language", language=None)
+	fake_enigma.fakeModule("Components.ActionMap", loadKeymap=lambda filename: None)
+	fake_enigma.fakeModule("Components.International", international=type("International", (), {"getLocale": lambda self: "en_US"})())
+	from Components.config import ConfigSubsection, config
+	config.plugins = ConfigSubsection()
+	config.usage = ConfigSubsection()
+	import Plugins
+	from Components.PluginComponent import PluginComponent
+	from Components.PluginManifest import pluginManifest
+	from Plugins.Plugin import PluginDescriptor
+
+	path = tempfile.mkdtemp()
+	createPlugins(path, count, size)
+	createConfigPlugins(path)
+	Plugins.__path__.insert(0, path)
+	pluginManifest.filename = os.path.join(tempfile.mkdtemp(), "plugins.manifest")
+
+	# the first start imports the plugins and writes the manifest
+	imported, import_time, import_memory = readPlugins(PluginComponent(), path)
+	if loadedPlugins() != count:
+		raise tests.TestError("%d of %d plugins imported" % (loadedPlugins(), count))
+	unloadPlugins()
+
+	lazy, lazy_time, lazy_memory = readPlugins(PluginComponent(), path)
+	print("[test_plugin_manifest] %d plugins: import %.3fs %dkB, manifest %.3fs %dkB, saved %.3fs %dkB" % (count, import_time, import_memory // 1024, lazy_time, lazy_memory // 1024, import_time - lazy_time, (import_memory - lazy_memory) // 1024))
+
+	if loadedPlugins():
+		raise tests.TestError("%d plugins imported with the manifest" % loadedPlugins())
+	if [(p.name, p.description, p.where, p.iconstr) for p in imported.pluginList] != [(p.name, p.description, p.where, p.iconstr) for p in lazy.pluginList]:
+		raise tests.TestError("descriptors of the manifest differ")
+	if [p for p in imported.pluginList if not p.name.startswith("Bench config")] != [p for p in lazy.pluginList if not p.name.startswith("Bench config")]:
+		raise tests.TestError("descriptors of the manifest don't compare equal")
+	# the settings of a plugin must be there without opening it
+	if "Plugins.BenchConfig.Settings.plugin" not in sys.modules or "Plugins.BenchConfig.Nested.plugin" not in sys.modules:
+		raise tests.TestError("plugin defining settings was not imported")
+
+	# menus ask the plugins every time, the entries may depend on the settings
+	if lazy.getPluginsForMenu("mainmenu"):
+		raise tests.TestError("unexpected menu entries")
+	if loadedPlugins() != count:
+		raise tests.TestError("plugins were not imported for the menu")
+	sys.modules["Plugins.Bench.Plugin0.plugin"].SHOWN.append("mainmenu")
+	if len(lazy.getPluginsForMenu("mainmenu")) != 1:
+		raise tests.TestError("menu entries of an imported plugin were not asked again")
+	unloadPlugins()
+	lazy, lazy_time, lazy_memory = readPlugins(PluginComponent(), path)
+
+	# a plugin is imported when it is started
+	plugin = lazy.getPlugins(PluginDescriptor.WHERE_PLUGINMENU)[0]
+	if plugin(session=None) != size or 'session' not in plugin.fnc.__code__.co_varnames or loadedPlugins() != 1:
+		raise tests.TestError("plugin was not imported when called")
+
+	# a changed plugin is imported again
+	unloadPlugins()
+	source = os.path.join(path, "Bench", "Plugin1", "plugin.py")
+	os.utime(source, ns=(os.stat(source).st_atime_ns, os.stat(source).st_mtime_ns + 1000000000))
+	lazy, lazy_time, lazy_memory = readPlugins(PluginComponent(), path)
+	if loadedPlugins() != 1:
+		raise tests.TestError("changed plugin was not imported")
+
+	# a reload of the already imported plugins keeps the plugin defining settings at the start
+	lazy.readPluginList(path)
+	if pluginManifest.plugins["BenchConfig/Settings"][1] is not None:
+		raise tests.TestError("plugin defining settings became lazy")
+
+
+test_plugin_manifest()
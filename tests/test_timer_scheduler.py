@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+# micro benchmark for the timer.Timer activation queue, run with
+# PYTHONPATH=.:..:../lib/python/ python test_timer_scheduler.py
+import fake_enigma
+import fake_time
+import random
+import time
+
+import tests
+
+
+def test_timer_scheduler(activations=10000):
+	fake_enigma.install()
+	import timer
+
+	class BenchmarkEntry(timer.TimerEntry):
+		activations = 0
+
+		def activate(self):
+			BenchmarkEntry.activations += 1
+			return True
+
+		def getNextActivation(self):
+			if self.state == self.StateWaiting:
+				return self.begin - self.prepare_time
+			if self.state == self.StatePrepared:
+				return self.begin
+			return self.end
+
+	at = time.time()
+	rnd = random.Random(activations)
+	t = timer.Timer()
+	timers = []
+	# every entry is activated three times (prepare, start, end)
+	for x in range(activations // 3 + 1):
+		begin = int(at) + rnd.randrange(100, 86400 * 7)
+		entry = BenchmarkEntry(begin, begin + rnd.randrange(60, 3 * 3600))
+		timers.append(entry)
+		t.addTimerEntry(entry, noRecalc=1)
+
+	start = time.perf_counter()
+	while BenchmarkEntry.activations < activations and t.timer_list:
+		# jump to the next activation, like the mainloop would
+		fake_time.setTime(t.next)
+		t.calcNextActivation()
+	duration = time.perf_counter() - start
+
+	print("[test_timer_scheduler] %d activations of %d timers in %.3fs" % (BenchmarkEntry.activations, len(timers), duration))
+
+	if BenchmarkEntry.activations < activations:
+		raise tests.TestError("not all activations were processed")
+
+	# an entry moved earlier without timeChanged() is still activated in time
+	late = BenchmarkEntry(int(time.time()) + 86400 * 30, int(time.time()) + 86400 * 30 + 60)
+	t.addTimerEntry(late)
+	late.begin = int(time.time()) + 50
+	late.end = late.begin + 60
+	t.calcNextActivation()
+	if t.next != late.getNextActivation():
+		raise tests.TestError("activation changed without timeChanged() was missed")
+	# stale heap items are compacted
+	for x in range(1000):
+		t.timeChanged(t.timer_list[0])
+	if len(t.activations) > 2 * len(t.timer_list) + 64:
+		raise tests.TestError("%d heap items for %d timers" % (len(t.activations), len(t.timer_list)))
+
+
+fake_time.setTime(1175385600)
+test_timer_scheduler()
@@ -0,0 +1,75 @@
+# -*- coding: utf-8 -*-
+# benchmark for the timer conflict index, run with
+# PYTHONPATH=.:..:../lib/python/ python test_timerindex.py
+import os
+import random
+import time
+
+from Components.TimerIndex import TimerIntervalIndex
+
+import tests
+
+
+class FakeTimer:
+	def __init__(self, begin, end, repeated=0):
+		self.begin = begin
+		self.end = end
+		self.repeated = repeated
+
+
+def createTimers(count, base_time):
+	rnd = random.Random(count)
+	timers = []
+	for x in range(count):
+		begin = base_time + rnd.randrange(0, 86400 * 28, 300)
+		repeated = rnd.random() < 0.1 and rnd.randrange(1, 0x80) or 0
+		timers.append(FakeTimer(begin, begin + rnd.randrange(900, 3 * 3600, 300), repeated))
+	return timers
+
+
+def naiveOverlapping(timers, timer):
+	# what the sanity check did before: look at every timer
+	return [x for x in timers if x is not timer and (x.repeated or timer.repeated or (x.begin < timer.end and x.end > timer.begin))]
+
+
+def test_timerindex(count):
+	base_time = 1175385600  # 2007-04-01
+	timers = createTimers(count, base_time)
+
+	start = time.time()
+	index = TimerIntervalIndex()
+	loaded = []
+	naive_candidates = 0
+	for timer in timers:
+		naive_candidates += len(naiveOverlapping(loaded, timer))
+		loaded.append(timer)
+	naive_time = time.time() - start
+
+	start = time.time()
+	index_candidates = 0
+	for timer in timers:
+		index_candidates += len(index.getOverlapping(timer))
+		index.add(timer)
+	index_time = time.time() - start
+
+	print("[test_timerindex] %d timers: full scan %.3fs (%d candidates), index %.3fs (%d candidates)" % (count, naive_time, naive_candidates, index_time, index_candidates))
+
+	for timer in timers:
+		if timer.repeated:
+			continue
+		found = set(index.getOverlapping(timer))
+		for x in timers:
+			if x is not timer and not x.repeated and x.begin < timer.end and x.end > timer.begin and x not in found:
+				raise tests.TestError("index missed an overlapping timer")
+
+	for timer in timers:
+		index.remove(timer)
+	if len(index) or len(index.single) or len(index.weeklySingle) or len(index.weeklyRepeated):
+		raise tests.TestError("index not empty after removing all timers")
+
+
+os.environ['TZ'] = 'CET'
+time.tzset()
+
+test_timerindex(1000)
+test_timerindex(5000)